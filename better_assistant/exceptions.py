@@ -12,3 +12,21 @@ class DataNotCreatedException(Exception):
 
 class NoDataException(Exception):
     pass
+
+class DuplicateDataException(Exception):
+    pass
+
+class QueueFullException(Exception):
+    pass
+
+class QueueTimeoutException(Exception):
+    pass
+
+class UpstreamTimeoutException(Exception):
+    pass
+
+class TemplateException(Exception):
+    pass
+
+class InvalidDataException(Exception):
+    pass
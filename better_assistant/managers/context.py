@@ -0,0 +1,72 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from better_assistant.utils.tokens import estimate_message_tokens, estimate_messages_tokens
+
+
+class DialogContextManager:
+    """
+    서버에 저장된 대화 내역으로 LLM 입력 메시지를 구성하고, 토큰 예산 안의 최근 내역을 캐시
+    이 replica에서 대화를 수정/삭제하면 바로 무효화되지만, 다른 replica의 변경은 HISTORY_CACHE_TTL초 동안 반영되지 않음
+    """
+
+    def __init__(self, chat_service: "ChatService"): # noqa
+        self.chat_service = chat_service
+        self.token_budget = int(os.getenv("HISTORY_TOKEN_BUDGET", "4096"))
+        self.cache_size = int(os.getenv("HISTORY_CACHE_SIZE", "1024"))
+        self.cache_ttl = float(os.getenv("HISTORY_CACHE_TTL", "30"))
+        self.max_messages = int(os.getenv("HISTORY_MAX_MESSAGES", "200"))
+        self._cache: "OrderedDict[str, Tuple[float, List[Dict[str, str]]]]" = OrderedDict()
+        chat_service.add_change_listener(self.invalidate)
+
+    async def get_history(self, dialog_id: str) -> List[Dict[str, str]]:
+        """토큰 예산 안에 들어오는 최근 대화 내역 (캐시 우선)"""
+        cached = self._cache.get(dialog_id)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            self._cache.move_to_end(dialog_id)
+            return cached[1]
+
+        content = await self.chat_service.get_dialog_content(dialog_id, last_n=self.max_messages)
+        history = self.window([{"content": msg["content"], "role": msg["role"]} for msg in content])
+        self._store(dialog_id, history)
+        return history
+
+    async def build_messages(self, dialog_id: str, user_input: str) -> List[Dict[str, str]]:
+        """저장된 내역 + 사용자 입력으로 LLM에 보낼 메시지 구성"""
+        user_msg = {"content": user_input, "role": "user"}
+        budget = self.token_budget - estimate_message_tokens(user_msg)
+        history = await self.get_history(dialog_id)
+        return self.window(history, budget) + [user_msg]
+
+    def append(self, dialog_id: str, msgs: List[Dict[str, str]]):
+        """저장된 turn을 캐시에도 반영, 캐시에 없는 대화는 다음 조회 때 DB에서 읽음"""
+        cached = self._cache.get(dialog_id)
+        if cached is None:
+            return
+        self._store(dialog_id, self.window(cached[1] + msgs))
+
+    def invalidate(self, dialog_id: str):
+        self._cache.pop(dialog_id, None)
+
+    def window(self, messages: List[Dict[str, str]], budget: int = None) -> List[Dict[str, str]]:
+        """budget 토큰을 넘지 않는 가장 최근 메시지들만 남김"""
+        budget = self.token_budget if budget is None else budget
+        if estimate_messages_tokens(messages) <= budget:
+            return messages
+
+        used = 0
+        start = len(messages)
+        for index in range(len(messages) - 1, -1, -1):
+            used += estimate_message_tokens(messages[index])
+            if used > budget:
+                break
+            start = index
+        return messages[start:]
+
+    def _store(self, dialog_id: str, history: List[Dict[str, str]]):
+        self._cache[dialog_id] = (time.monotonic(), history)
+        self._cache.move_to_end(dialog_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
@@ -1,13 +1,13 @@
-from typing import List
+from typing import List, Optional
 
 from better_assistant.models import Dialog, MongoFilter, MongoUpdate
 from better_assistant.models.models import Msg
-from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils import MongoClientWrapper, get_mongo_client
 
 
 class HistoryManager:
-    def __init__(self):
-        self.mongo = MongoClientWrapper()
+    def __init__(self, mongo_client: Optional[MongoClientWrapper] = None):
+        self.mongo = mongo_client or get_mongo_client()
 
     async def get_dialogs(self):
         filter_obj = (
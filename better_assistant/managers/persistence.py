@@ -0,0 +1,143 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from better_assistant.utils.metrics import Counter, Gauge, Histogram
+
+DIALOG_WRITE_QUEUE_DEPTH = Gauge("dialog_write_queue_depth", "Dialog turns waiting in the write-behind queue")
+DIALOG_WRITE_FLUSH_SECONDS = Histogram(
+    "dialog_write_flush_duration_seconds",
+    "Time to write one batch of dialog turns including retries",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+DIALOG_WRITE_TURNS = Counter("dialog_write_turns_total", "Dialog turns written by the write-behind queue", ("outcome",))
+
+
+class DialogWriteQueue:
+    """생성된 대화 turn을 모아 background에서 bulk write로 저장하는 write-behind queue"""
+
+    def __init__(self, chat_service: "ChatService"): # noqa
+        self.chat_service = chat_service
+        self.batch_size = int(os.getenv("DIALOG_WRITE_BATCH_SIZE", "100"))
+        self.flush_interval = float(os.getenv("DIALOG_WRITE_FLUSH_INTERVAL", "0.5"))
+        self.max_retries = int(os.getenv("DIALOG_WRITE_MAX_RETRIES", "5"))
+        self.queue: "asyncio.Queue[Optional[Tuple[str, List[Dict[str, Any]]]]]" = asyncio.Queue(
+            maxsize=int(os.getenv("DIALOG_WRITE_QUEUE_SIZE", "10000"))
+        )
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flushed_turns = 0
+        self.failed_turns = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """남은 turn을 모두 저장한 뒤 background task 종료"""
+        if self._task is None:
+            return
+        await self.queue.put(None)
+        await self._task
+        self._task = None
+
+    async def enqueue(self, dialog_id: str, msgs: List[Dict[str, Any]]):
+        """queue에 넣고 바로 반환, queue가 가득 찼거나 worker가 없으면 직접 저장"""
+        if self._task is None:
+            await self.chat_service.add_msgs_to_dialog(dialog_id, msgs)
+            return
+        try:
+            self.queue.put_nowait((dialog_id, msgs))
+            DIALOG_WRITE_QUEUE_DEPTH.set(self.queue.qsize())
+        except asyncio.QueueFull:
+            logger.warning("Dialog write queue is full, writing turn synchronously")
+            await self.chat_service.add_msgs_to_dialog(dialog_id, msgs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "flushes": self.flushes,
+            "flushed_turns": self.flushed_turns,
+            "failed_turns": self.failed_turns,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+        }
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            DIALOG_WRITE_QUEUE_DEPTH.set(self.queue.qsize())
+            if batch:
+                await self._flush(batch)
+
+    async def _collect(self) -> Tuple[List[Tuple[str, List[Dict[str, Any]]]], bool]:
+        """첫 turn이 들어온 뒤 batch_size 또는 flush_interval까지 모아서 반환"""
+        item = await self.queue.get()
+        if item is None:
+            return [], True
+
+        loop = asyncio.get_running_loop()
+        batch = [item]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _flush(self, batch: List[Tuple[str, List[Dict[str, Any]]]]):
+        # 같은 대화의 turn은 순서를 유지한 채 하나의 $push로 합침
+        msgs_by_dialog: Dict[str, List[Dict[str, Any]]] = {}
+        for dialog_id, msgs in batch:
+            msgs_by_dialog.setdefault(dialog_id, []).extend(msgs)
+
+        started = time.perf_counter()
+        rejected: List[str] = []
+        for attempt in range(self.max_retries + 1):
+            try:
+                failed, newly_rejected = await self.chat_service.add_msgs_to_dialogs(msgs_by_dialog)
+            except Exception as e:
+                logger.warning("Dialog write batch failed (attempt {}): {}", attempt + 1, e)
+            else:
+                # 형식이 틀리거나 삭제된 대화는 다시 시도하지 않고 해당 turn만 버림
+                rejected.extend(newly_rejected)
+                msgs_by_dialog = {dialog_id: msgs_by_dialog[dialog_id] for dialog_id in failed}
+                if not failed:
+                    break
+            if attempt < self.max_retries:
+                await asyncio.sleep(min(0.1 * 2 ** attempt, 5.0) * random.uniform(0.5, 1.5))
+        else:
+            logger.error("Dropped dialog turns after retries: {}", list(msgs_by_dialog))
+        if rejected:
+            logger.error("Dropped dialog turns for invalid or deleted dialogs: {}", rejected)
+
+        lost = set(rejected) | set(msgs_by_dialog)
+        dropped = sum(1 for dialog_id, _ in batch if dialog_id in lost)
+        self.failed_turns += dropped
+
+        elapsed = time.perf_counter() - started
+        self.flushes += 1
+        self.flushed_turns += len(batch) - dropped
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        DIALOG_WRITE_FLUSH_SECONDS.observe(elapsed)
+        DIALOG_WRITE_TURNS.inc("written", value=len(batch) - dropped)
+        if dropped:
+            DIALOG_WRITE_TURNS.inc("dropped", value=dropped)
@@ -0,0 +1,156 @@
+import ipaddress
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import List, Tuple, Union
+
+from fastapi import Request
+from loguru import logger
+
+from better_assistant.models import MongoFilter, MongoUpdate
+from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.metrics import Counter
+
+RATE_LIMIT_REJECTIONS = Counter("rate_limit_rejections_total", "Requests rejected by the rate limiter", ("key_type",))
+
+
+class RateLimiter(ABC):
+    """key별 요청 허용 여부를 판단하는 rate limiter 기본 구조"""
+
+    @abstractmethod
+    async def hit(self, key: str) -> float:
+        """요청 1건을 기록하고 허용되면 0, 거절되면 재시도까지 남은 초를 반환"""
+
+
+class TokenBucketRateLimiter(RateLimiter):
+    """단일 프로세스용 in-memory token bucket"""
+
+    def __init__(self, rate_per_minute: int, burst: int, max_keys: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def hit(self, key: str) -> float:
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last) * self.rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+        else:
+            retry_after = (1 - tokens) / self.rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class MongoRateLimiter(RateLimiter):
+    """여러 replica가 공유하는 window 카운터, 원자적 $inc + TTL index로 관리"""
+
+    collection_name = "rate_limits"
+
+    def __init__(self, mongo_client: MongoClientWrapper, limit: int, window_seconds: int = 60):
+        self.mongo_client = mongo_client
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    async def hit(self, key: str) -> float:
+        now = time.time()
+        window_start = int(now // self.window_seconds) * self.window_seconds
+        window_end = window_start + self.window_seconds
+
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", f"{key}:{window_start}")
+            .build()
+            )
+        update_obj = (
+            MongoUpdate()
+            .increment("count", 1)
+            .set_on_insert("expires_at", datetime.fromtimestamp(window_end + self.window_seconds, tz=timezone.utc))
+            .build()
+        )
+        try:
+            count = await self.mongo_client.increment(
+                filter_obj, update_obj, "count", collection_name=self.collection_name
+            )
+        except Exception as e:
+            # 저장소 장애로 생성 기능 전체가 막히지 않도록 허용
+            logger.warning("Rate limit check failed, allowing request: {}", e)
+            return 0.0
+
+        if count <= self.limit:
+            return 0.0
+        return window_end - now
+
+
+def create_rate_limiter(mongo_client: MongoClientWrapper) -> RateLimiter:
+    """RATE_LIMIT_BACKEND(memory|mongo) 환경변수에 맞는 rate limiter 생성"""
+    per_minute = int(os.getenv("RATE_LIMIT_PER_MINUTE", "10"))
+    if os.getenv("RATE_LIMIT_BACKEND", "memory") == "mongo":
+        return MongoRateLimiter(mongo_client, limit=per_minute)
+    return TokenBucketRateLimiter(per_minute, burst=int(os.getenv("RATE_LIMIT_BURST", str(per_minute))))
+
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+@lru_cache(maxsize=8)
+def _trusted_networks(value: str) -> List[Network]:
+    return [ipaddress.ip_network(network.strip(), strict=False) for network in value.split(",") if network.strip()]
+
+
+def _is_trusted(address: str, networks: List[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_address(request: Request) -> str:
+    """
+    요청한 client 주소
+
+    RATE_LIMIT_FORWARDED_HEADER는 직접 연결한 peer가 RATE_LIMIT_TRUSTED_PROXIES(IP/CIDR 목록)에 속할 때만 읽음
+    그 외에는 client가 header를 임의로 넣어 제한을 피할 수 있으므로 peer 주소를 사용
+    header는 오른쪽부터 신뢰하는 proxy를 건너뛰고 처음 나오는 주소를 사용 (앞쪽 값은 client가 넣을 수 있음)
+    """
+    peer = request.client.host if request.client else "unknown"
+    header = os.getenv("RATE_LIMIT_FORWARDED_HEADER")
+    networks = _trusted_networks(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", ""))
+    if not header or not _is_trusted(peer, networks):
+        return peer
+    addresses = [address.strip() for address in request.headers.get(header, "").split(",") if address.strip()]
+    for address in reversed(addresses):
+        if not _is_trusted(address, networks):
+            return address
+    return addresses[0] if addresses else peer
+
+
+async def rate_limit_key(request: Request) -> str:
+    """
+    RATE_LIMIT_KEY(ip|project|dialog|global) 환경변수에 맞는 요청 key
+
+    project/dialog는 요청 body의 project_id/dialog_id를 사용하고, 없으면(배치 생성 등) ip로 대체
+    """
+    mode = os.getenv("RATE_LIMIT_KEY", "ip")
+    if mode == "global":
+        return "global"
+    if mode in ("project", "dialog"):
+        try:
+            body = await request.json()
+            value = body[f"{mode}_id"]
+            if isinstance(value, str) and value:
+                return f"{mode}:{value}"
+        except Exception:
+            pass
+    return f"ip:{client_address(request)}"
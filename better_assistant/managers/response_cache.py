@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from better_assistant.exceptions import DataNotFoundException
+from better_assistant.models import MongoFilter, MongoUpdate
+from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.cache import TTLCache
+
+
+class ResponseCache:
+    """동일한 모델 파라미터 + 메시지에 대한 생성 결과 캐시 (in-process LRU, 선택적으로 MongoDB 2차 캐시)"""
+
+    collection_name = "generate_cache"
+
+    def __init__(self, mongo_client: MongoClientWrapper):
+        self.mongo_client = mongo_client
+        self.enabled = os.getenv("GENERATE_CACHE_ENABLED", "false").lower() == "true"
+        self.use_mongo = os.getenv("GENERATE_CACHE_MONGO", "false").lower() == "true"
+        self.ttl = float(os.getenv("GENERATE_CACHE_TTL", "3600"))
+        self.memory = TTLCache(
+            max_entries=int(os.getenv("GENERATE_CACHE_MAX_ENTRIES", "1000")),
+            ttl=self.ttl,
+            max_bytes=int(os.getenv("GENERATE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            sizeof=lambda value: len(value.encode("utf-8")),
+        )
+        self.mongo_hits = 0
+
+    @staticmethod
+    def make_key(model: str, temperature: float, max_tokens: int, messages: List[Dict[str, str]]) -> str:
+        normalized = {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": [{"role": msg["role"], "content": msg["content"]} for msg in messages],
+        }
+        payload = json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        response = self.memory.get(key)
+        if response is not None or not self.use_mongo:
+            return response
+
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", key)
+            .greater_than("expires_at", datetime.now(timezone.utc))
+            .fields(["response"])
+            .build_with_projection()
+            )
+        try:
+            result = await self.mongo_client.find(filter_obj, collection_name=self.collection_name)
+        except DataNotFoundException:
+            return None
+        except Exception as e:
+            logger.warning("Response cache lookup failed: {}", e)
+            return None
+
+        response = result[0]["response"]
+        self.mongo_hits += 1
+        self.memory.set(key, response)
+        return response
+
+    async def set(self, key: str, response: str):
+        self.memory.set(key, response)
+        if not self.use_mongo:
+            return
+
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", key)
+            .build()
+            )
+        update_obj = (
+            MongoUpdate()
+            .set("response", response)
+            .set("expires_at", datetime.now(timezone.utc) + timedelta(seconds=self.ttl))
+            .build()
+        )
+        try:
+            await self.mongo_client.upsert(filter_obj, update_obj, collection_name=self.collection_name)
+        except Exception as e:
+            logger.warning("Response cache store failed: {}", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "mongo_hits": self.mongo_hits, **self.memory.stats()}
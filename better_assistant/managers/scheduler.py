@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from better_assistant.exceptions import QueueFullException, QueueTimeoutException
+from better_assistant.utils.metrics import Counter, Histogram
+
+SCHEDULER_REJECTIONS = Counter(
+    "generate_queue_rejections_total", "Generation requests rejected by the scheduler", ("reason",)
+)
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "generate_queue_wait_seconds",
+    "Time spent waiting for a generation slot",
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+class GenerationTicket:
+    """upstream 동시 실행 슬롯 1개, release는 여러 번 호출해도 한 번만 반영"""
+
+    def __init__(self, scheduler: "GenerationScheduler"):
+        self.scheduler = scheduler
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.scheduler._release()
+
+    async def wrap(self, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """stream이 끝나거나 취소되면 슬롯을 반납"""
+        try:
+            async for frame in stream:
+                yield frame
+        finally:
+            self.release()
+
+
+class GenerationScheduler:
+    """upstream LLM stream 동시 실행 수를 제한하고, 대기 요청은 key(프로젝트)별로 번갈아 처리"""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        max_wait: Optional[float] = None,
+    ):
+        self.max_concurrency = max_concurrency or int(os.getenv("GENERATE_MAX_CONCURRENCY", "8"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("GENERATE_MAX_QUEUE", "64"))
+        self.max_wait = max_wait or float(os.getenv("GENERATE_MAX_QUEUE_WAIT", "10"))
+        self.active = 0
+        self.queued = 0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    async def acquire(self, key: str) -> GenerationTicket:
+        """슬롯을 얻을 때까지 대기, 대기열이 가득 찼거나 max_wait을 넘기면 예외"""
+        if self.active < self.max_concurrency and self.queued == 0:
+            self.active += 1
+            return GenerationTicket(self)
+        if self.queued >= self.max_queue:
+            SCHEDULER_REJECTIONS.inc("queue_full")
+            raise QueueFullException(f"Generation queue is full ({self.queued} waiting)")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(waiter)
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # 시간 초과와 동시에 슬롯을 넘겨받은 경우
+                self._release()
+            else:
+                self._discard(key, waiter)
+            SCHEDULER_REJECTIONS.inc("queue_timeout")
+            raise QueueTimeoutException(f"Waited more than {self.max_wait}s for a generation slot")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 슬롯을 넘겨받은 직후 취소된 경우
+                self._release()
+            else:
+                self._discard(key, waiter)
+            raise
+        SCHEDULER_WAIT_SECONDS.observe(time.perf_counter() - started)
+        return GenerationTicket(self)
+
+    def stats(self) -> Dict[str, int]:
+        return {"active": self.active, "queued": self.queued, "max_concurrency": self.max_concurrency}
+
+    def _discard(self, key: str, waiter: asyncio.Future):
+        waiters = self._queues.get(key)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        self.queued -= 1
+        if not waiters:
+            del self._queues[key]
+
+    def _release(self):
+        self.active -= 1
+        while self.active < self.max_concurrency and self._queues:
+            key, waiters = next(iter(self._queues.items()))
+            waiter = waiters.popleft()
+            self.queued -= 1
+            if waiters:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if waiter.done():
+                continue
+            waiter.set_result(None)
+            self.active += 1
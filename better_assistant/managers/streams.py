@@ -0,0 +1,118 @@
+import asyncio
+import contextvars
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Optional
+
+from loguru import logger
+
+from better_assistant.managers.scheduler import GenerationTicket
+from better_assistant.utils.sse import format_sse
+
+
+class GenerationStream:
+    """
+    생성 1건의 SSE frame ring buffer
+    frame은 생성된 순서대로 1부터 번호가 매겨지며, GenerateService.generate가 붙이는 SSE id와 같음
+    """
+
+    def __init__(self, generation_id: str, max_frames: int):
+        self.generation_id = generation_id
+        self.frames: Deque[str] = deque(maxlen=max_frames)
+        self.count = 0
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.condition = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def oldest_event_id(self) -> int:
+        return self.count - len(self.frames) + 1
+
+    async def append(self, frame: str):
+        async with self.condition:
+            self.frames.append(frame)
+            self.count += 1
+            self.condition.notify_all()
+
+    async def finish(self):
+        async with self.condition:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self.condition.notify_all()
+
+
+class StreamRegistry:
+    """
+    생성을 HTTP 연결과 분리해 background task로 실행하고 frame을 buffer에 보관
+    - client 연결이 끊겨도 생성은 끝까지 진행되어 대화에 저장됨
+    - Last-Event-ID로 다시 연결하면 buffer에 남은 이후 frame부터 이어서 전송
+    - 끝난 stream은 STREAM_RETENTION초 동안 재연결을 위해 보관
+    """
+
+    def __init__(self):
+        self.max_frames = int(os.getenv("STREAM_BUFFER_FRAMES", "2048"))
+        self.retention = float(os.getenv("STREAM_RETENTION", "60"))
+        self.shutdown_grace = float(os.getenv("STREAM_SHUTDOWN_GRACE", "30"))
+        self._streams: "OrderedDict[str, GenerationStream]" = OrderedDict()
+
+    def start(self, frames: AsyncIterator[str], ticket: GenerationTicket) -> GenerationStream:
+        """frame generator를 background에서 실행, 끝나면 ticket 반납"""
+        self._purge()
+        stream = GenerationStream(uuid.uuid4().hex, self.max_frames)
+        # 요청의 trace를 이어받지 않도록 빈 context에서 실행, 요청이 끝난 뒤의 span이 요청 trace에 붙지 않음
+        stream.task = asyncio.create_task(self._produce(stream, frames, ticket), context=contextvars.Context())
+        self._streams[stream.generation_id] = stream
+        return stream
+
+    def get(self, generation_id: str) -> Optional[GenerationStream]:
+        self._purge()
+        return self._streams.get(generation_id)
+
+    async def subscribe(self, stream: GenerationStream, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+        """last_event_id 이후의 frame을 반환, buffer에서 이미 밀려난 frame은 건너뜀"""
+        next_id = (last_event_id or 0) + 1
+        while True:
+            async with stream.condition:
+                await stream.condition.wait_for(lambda wanted=next_id: stream.count >= wanted or stream.done)
+                next_id = max(next_id, stream.oldest_event_id)
+                # buffer 전체를 복사하지 않고 아직 보내지 않은 frame만 뒤에서부터 꺼냄 (deque는 양 끝 index가 빠름)
+                frames = [stream.frames[-position] for position in range(stream.count - next_id + 1, 0, -1)]
+                done = stream.done
+            for frame in frames:
+                yield frame
+            next_id += len(frames)
+            if done and next_id > stream.count:
+                return
+
+    async def stop(self):
+        """진행 중인 생성이 끝나서 저장될 때까지 STREAM_SHUTDOWN_GRACE초 기다린 뒤 남은 생성은 취소"""
+        tasks = [stream.task for stream in self._streams.values() if stream.task and not stream.task.done()]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=self.shutdown_grace)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _produce(self, stream: GenerationStream, frames: AsyncIterator[str], ticket: GenerationTicket):
+        try:
+            async for frame in ticket.wrap(frames):
+                await stream.append(frame)
+        except Exception as e:
+            logger.error("Generation {} failed: {}", stream.generation_id, e)
+            await stream.append(format_sse("Generation failed", event="error", event_id=stream.count + 1))
+        finally:
+            await stream.finish()
+
+    def _purge(self):
+        now = time.monotonic()
+        expired = [
+            generation_id
+            for generation_id, stream in self._streams.items()
+            if stream.done and now - stream.finished_at > self.retention
+        ]
+        for generation_id in expired:
+            del self._streams[generation_id]
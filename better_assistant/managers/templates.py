@@ -0,0 +1,59 @@
+import os
+from typing import Any, Dict, Optional
+
+from better_assistant.exceptions import DataNotFoundException, TemplateException
+from better_assistant.utils.cache import TTLCache
+from better_assistant.utils.template import CompiledTemplate, compile_template, render_template
+
+
+class PromptTemplateManager:
+    """
+    프롬프트 내용을 template으로 컴파일해 (prompt_id, updated_at)별로 캐시하고 변수로 렌더링
+    프롬프트가 수정되면 updated_at이 바뀌어 새로 컴파일됨
+    """
+
+    def __init__(self, prompt_service: "PromptService"): # noqa
+        self.prompt_service = prompt_service
+        self.max_include_depth = int(os.getenv("TEMPLATE_MAX_INCLUDE_DEPTH", "5"))
+        self.max_includes = int(os.getenv("TEMPLATE_MAX_INCLUDES", "50"))
+        self.cache = TTLCache(
+            max_entries=int(os.getenv("TEMPLATE_CACHE_SIZE", "1000")),
+            ttl=float(os.getenv("TEMPLATE_CACHE_TTL", "3600")),
+        )
+
+    def compile(self, prompt_id: str, prompt: Dict[str, Any]) -> CompiledTemplate:
+        key = (prompt_id, str(prompt.get("updated_at")))
+        compiled = self.cache.get(key)
+        if compiled is None:
+            compiled = compile_template(prompt["prompt_content"])
+            self.cache.set(key, compiled)
+        return compiled
+
+    async def render(self, prompt_id: str, variables: Optional[Dict[str, Any]]) -> str:
+        """
+        프롬프트와 include된 버전을 모두 불러와 렌더링, 프롬프트가 없으면 DataNotFoundException
+        variables가 None이면 렌더링하지 않고 프롬프트 내용을 그대로 반환
+        """
+        prompt = await self.prompt_service.get_prompt(prompt_id)
+        if variables is None:
+            return prompt["prompt_content"]
+        template = self.compile(prompt_id, prompt)
+        templates = await self._load_includes(prompt["project_id"], template)
+        return render_template(template, variables, templates, self.max_include_depth)
+
+    async def _load_includes(self, project_id: str, template: CompiledTemplate) -> Dict[str, CompiledTemplate]:
+        templates: Dict[str, CompiledTemplate] = {}
+        pending = list(template.includes)
+        while pending:
+            version = pending.pop()
+            if version in templates:
+                continue
+            if len(templates) >= self.max_includes:
+                raise TemplateException("Too many included prompt versions")
+            try:
+                included = await self.prompt_service.get_prompt_by_version(project_id, version)
+            except DataNotFoundException:
+                raise TemplateException(f"Included prompt version not found: {version}")
+            templates[version] = self.compile(str(included["_id"]), included)
+            pending.extend(templates[version].includes)
+        return templates
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+import httpx
+from loguru import logger
+from openai import APIConnectionError, AsyncOpenAI
+
+from better_assistant.exceptions import UpstreamTimeoutException
+from better_assistant.utils.tracing import span
+
+
+class UpstreamEndpoint:
+    """API_BASE_URL 1개에 대한 AsyncOpenAI client와 진행 중인 요청 수"""
+
+    def __init__(self, base_url: Optional[str], api_key: Optional[str], http_client: httpx.AsyncClient):
+        self.base_url = base_url
+        # 재시도는 UpstreamPool이 connect 오류에 대해서만 직접 수행
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+        self.outstanding = 0
+        self.requests = 0
+        self.connect_errors = 0
+
+
+class UpstreamStream:
+    """upstream chat completion stream, 첫 chunk 대기 시간을 제한하고 닫힐 때 endpoint 요청 수를 반납"""
+
+    def __init__(self, endpoint: UpstreamEndpoint, stream, first_token_timeout: float):
+        self.endpoint = endpoint
+        self.stream = stream
+        self.first_token_timeout = first_token_timeout
+        self._iterator = stream.__aiter__()
+        self._first = True
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._first:
+            return await self._iterator.__anext__()
+        self._first = False
+        try:
+            return await asyncio.wait_for(self._iterator.__anext__(), self.first_token_timeout)
+        except asyncio.TimeoutError:
+            raise UpstreamTimeoutException(
+                f"No response from {self.endpoint.base_url} within {self.first_token_timeout}s"
+            )
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.endpoint.outstanding -= 1
+        await self.stream.close()
+
+
+class UpstreamPool:
+    """
+    API_BASE_URL(쉼표로 여러 개 지정 가능)별 upstream client 묶음
+    - 진행 중인 요청이 가장 적은 endpoint로 보내고, 같으면 번갈아 선택
+    - connect 오류만 jitter를 준 backoff 후 다른 endpoint로 재시도
+    """
+
+    def __init__(self):
+        api_key = os.getenv("API_KEY")
+        base_urls = [url.strip() for url in os.getenv("API_BASE_URL", "").split(",") if url.strip()] or [None]
+        self.connect_retries = int(os.getenv("UPSTREAM_CONNECT_RETRIES", "2"))
+        self.first_token_timeout = float(os.getenv("UPSTREAM_FIRST_TOKEN_TIMEOUT", "30"))
+        # 마지막 chunk로 실제 token 사용량을 받음, stream_options를 지원하지 않는 upstream이면 false
+        self.include_usage = os.getenv("UPSTREAM_INCLUDE_USAGE", "true").lower() == "true"
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30")),
+        )
+        timeout = httpx.Timeout(
+            connect=float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5")),
+            # stream에서는 chunk 사이 최대 대기 시간
+            read=float(os.getenv("UPSTREAM_READ_TIMEOUT", "60")),
+            write=10.0,
+            pool=float(os.getenv("UPSTREAM_POOL_TIMEOUT", "10")),
+        )
+        http2 = os.getenv("UPSTREAM_HTTP2", "false").lower() == "true"
+        self.endpoints = [
+            UpstreamEndpoint(base_url, api_key, self._create_http_client(limits, timeout, http2))
+            for base_url in base_urls
+        ]
+        self._next = 0
+
+    @staticmethod
+    def _create_http_client(limits: httpx.Limits, timeout: httpx.Timeout, http2: bool) -> httpx.AsyncClient:
+        try:
+            return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+        except ImportError:
+            # http2는 h2 패키지가 있어야 사용 가능
+            logger.warning("UPSTREAM_HTTP2 requires the h2 package, falling back to HTTP/1.1")
+            return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    def _pick(self, exclude: Optional[UpstreamEndpoint] = None) -> UpstreamEndpoint:
+        candidates = [endpoint for endpoint in self.endpoints if endpoint is not exclude] or self.endpoints
+        start = self._next % len(candidates)
+        self._next += 1
+        rotated = candidates[start:] + candidates[:start]
+        return min(rotated, key=lambda endpoint: endpoint.outstanding)
+
+    async def stream_chat(self, **kwargs) -> UpstreamStream:
+        """chat completion stream 요청, 응답 시작 후에는 재시도하지 않음"""
+        if self.include_usage:
+            kwargs.setdefault("stream_options", {"include_usage": True})
+        endpoint = None
+        for attempt in range(self.connect_retries + 1):
+            endpoint = self._pick(exclude=endpoint)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            try:
+                with span("upstream.stream_chat", base_url=str(endpoint.base_url), attempt=attempt):
+                    stream = await endpoint.client.chat.completions.create(stream=True, **kwargs)
+                return UpstreamStream(endpoint, stream, self.first_token_timeout)
+            except APIConnectionError as e:
+                endpoint.outstanding -= 1
+                if not isinstance(e.__cause__, (httpx.ConnectError, httpx.ConnectTimeout)):
+                    raise
+                endpoint.connect_errors += 1
+                if attempt == self.connect_retries:
+                    raise
+                logger.warning("Failed to connect to {}, retrying: {}", endpoint.base_url, e)
+                await asyncio.sleep(min(0.1 * 2 ** attempt, 2.0) * random.uniform(0.5, 1.5))
+            except BaseException:
+                endpoint.outstanding -= 1
+                raise
+
+    async def close(self):
+        for endpoint in self.endpoints:
+            await endpoint.client.close()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "base_url": endpoint.base_url,
+                "outstanding": endpoint.outstanding,
+                "requests": endpoint.requests,
+                "connect_errors": endpoint.connect_errors,
+            }
+            for endpoint in self.endpoints
+        ]
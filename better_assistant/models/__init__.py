@@ -1,9 +1,12 @@
 from better_assistant.models.models import (
+    BatchGenerateRequest,
+    BatchJob,
     Dialog,
     GenerateRequest,
     Msg,
     Project,
     Prompt,
+    PromptRevision,
 )
 from better_assistant.models.mongo import (
     MongoDocument,
@@ -33,5 +33,38 @@ class Dialog(MongoDocument):
 
 class GenerateRequest(BaseModel):
     dialog_id: str = Field(..., description="대화 ID")
-    messages: list[Msg] = Field(..., description="메시지 리스트, 사용자 입력 포함")
+    project_id: Optional[str] = Field(None, description="프로젝트 ID, 생성 대기열에서 프로젝트 간 공정한 순서 배분에 사용")
+    messages: Optional[list[Msg]] = Field(
+        None, description="메시지 리스트, 사용자 입력 포함. 생략하면 서버에 저장된 대화 내역을 사용"
+    )
     user_input: str = Field(..., description="사용자 입력")
+    prompt_id: Optional[str] = Field(
+        None, description="프롬프트 ID, 지정하면 프롬프트 내용을 system 메시지로 앞에 추가"
+    )
+    variables: Optional[Dict[str, Any]] = Field(
+        None, description="프롬프트 template 변수, 지정한 경우에만 프롬프트를 template으로 렌더링 (input은 user_input)"
+    )
+
+class BatchGenerateRequest(BaseModel):
+    prompt_id: str = Field(..., description="실행할 프롬프트 ID, 프롬프트 내용을 system 메시지로 사용")
+    inputs: list[str] = Field(..., min_length=1, description="사용자 입력 리스트, 입력마다 한 번씩 생성")
+    variables: Optional[Dict[str, Any]] = Field(
+        None, description="프롬프트 template 변수, 지정한 경우에만 입력마다 렌더링 (input은 각 입력)"
+    )
+
+class BatchJob(MongoDocument):
+    prompt_id: str = Field(..., description="프롬프트 ID")
+    project_id: str = Field(..., description="프로젝트 ID")
+    status: str = Field("queued", description="작업 상태 (queued|running|cancelling|completed|failed|cancelled|interrupted)")
+    total: int = Field(..., description="전체 입력 수")
+    completed: int = Field(0, description="생성에 성공한 입력 수")
+    failed: int = Field(0, description="생성에 실패한 입력 수")
+
+class PromptRevision(MongoDocument):
+    prompt_id: str = Field(..., description="프롬프트 ID")
+    project_id: str = Field(..., description="프로젝트 ID")
+    revision: int = Field(..., description="프롬프트 안에서 1부터 증가하는 revision 번호")
+    parent_id: Optional[str] = Field(None, description="이전 revision ID")
+    content_hash: str = Field(..., description="내용의 sha256, prompt_blobs의 hash")
+    chain: list[str] = Field(..., description="내용 복원에 필요한 blob hash 목록 (자기 자신부터 전체 저장 blob까지)")
+    size: int = Field(..., description="내용 byte 크기")
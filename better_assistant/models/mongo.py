@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
@@ -11,6 +11,8 @@ class MongoFilter:
     def __init__(self):
         self.filter: Dict[str, Any] = {}
         self.projection: Dict[str, Any] = {"_id": 0}
+        self.sort_spec: List[Tuple[str, int]] = []
+        self.limit_count: int = 0
 
     def equals(self, field: str, value: Any) -> "MongoFilter":
         self.filter[field] = value
@@ -28,6 +30,10 @@ class MongoFilter:
         self.filter[field] = {"$lt": value}
         return self
 
+    def between(self, field: str, low: Any, high: Any) -> "MongoFilter":
+        self.filter[field] = {"$gte": low, "$lte": high}
+        return self
+
     def in_list(self, field: str, values: list) -> "MongoFilter":
         self.filter[field] = {"$in": values}
         return self
@@ -40,10 +46,26 @@ class MongoFilter:
         self.filter[field] = {"$exists": value}
         return self
 
+    def array_size(self, field: str, count: int) -> "MongoFilter":
+        """배열 field의 길이가 count인 문서"""
+        self.filter[field] = {"$size": count}
+        return self
+
     def regex(self, field: str, pattern: str) -> "MongoFilter":
         self.filter[field] = {"$regex": pattern}
         return self
 
+    def text_search(self, query: str) -> "MongoFilter":
+        """text index 검색, collection에 text index가 있어야 함"""
+        self.filter["$text"] = {"$search": query}
+        return self
+
+    def text_score(self, field: str = "score") -> "MongoFilter":
+        """text_search 관련도를 field로 반환하고 관련도 높은 순으로 정렬"""
+        self.projection[field] = {"$meta": "textScore"}
+        self.sort_spec.append((field, {"$meta": "textScore"}))
+        return self
+
     def fields(self, include: list[str] = None, exclude: list[str] = None) -> "MongoFilter":
         """
         Specify which fields to include or exclude in the result.
@@ -58,8 +80,32 @@ class MongoFilter:
                 self.projection[field] = 0
         return self
 
+    def slice(self, field: str, value: Any) -> "MongoFilter":
+        """배열 field의 일부만 반환, value는 개수 또는 [skip, limit]"""
+        self.projection[field] = {"$slice": value}
+        return self
+
+    def size(self, field: str, array_field: str) -> "MongoFilter":
+        """array_field의 길이를 field로 반환"""
+        self.projection[field] = {"$size": f"${array_field}"}
+        return self
+
+    def sort(self, field: str, direction: int = 1) -> "MongoFilter":
+        self.sort_spec.append((field, direction))
+        return self
+
+    def limit(self, count: int) -> "MongoFilter":
+        self.limit_count = count or 0
+        return self
+
     def build_with_projection(self) -> Dict[str, Dict[str, Any]]:
-        return {"filter": self.filter, "projection": self.projection}
+        built = {"filter": self.filter, "projection": self.projection}
+        if self.sort_spec:
+            built["sort"] = self.sort_spec
+        if self.limit_count:
+            built["limit"] = self.limit_count
+        return built
+
     def build(self) -> Dict[str, Any]:
         return self.filter
 
@@ -74,6 +120,12 @@ class MongoUpdate:
         self.update["$set"][field] = value
         return self
 
+    def set_on_insert(self, field: str, value: Any) -> "MongoUpdate":
+        if "$setOnInsert" not in self.update:
+            self.update["$setOnInsert"] = {}
+        self.update["$setOnInsert"][field] = value
+        return self
+
     def unset(self, field: str) -> "MongoUpdate":
         if "$unset" not in self.update:
             self.update["$unset"] = {}
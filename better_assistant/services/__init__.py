@@ -1,4 +1,15 @@
+from better_assistant.services.batch import BatchService
+from better_assistant.services.cache import (
+    CachedProjectService,
+    CachedPromptService,
+    CacheInvalidationListener,
+)
 from better_assistant.services.chat import ChatService
+from better_assistant.services.deletion import ProjectDeletionService
+from better_assistant.services.detail import ProjectDetailService
 from better_assistant.services.generate import GenerateService
 from better_assistant.services.project import ProjectService
 from better_assistant.services.prompt import PromptService
+from better_assistant.services.revision import PromptRevisionService
+from better_assistant.services.search import SearchService
+from better_assistant.services.transfer import ProjectTransferService
@@ -0,0 +1,316 @@
+import asyncio
+import contextvars
+import os
+import random
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+from loguru import logger
+
+from better_assistant.exceptions import (
+    DataNotFoundException,
+    QueueFullException,
+    QueueTimeoutException,
+    TemplateException,
+)
+from better_assistant.managers.scheduler import GenerationScheduler
+from better_assistant.managers.templates import PromptTemplateManager
+from better_assistant.models import BatchGenerateRequest, BatchJob, MongoFilter, MongoUpdate
+from better_assistant.models.models import KST_TIMEZONE
+from better_assistant.services.generate import GenerateService
+from better_assistant.services.prompt import PromptService
+from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.tracing import traced
+
+
+class BatchService:
+    """
+    하나의 프롬프트를 여러 입력에 대해 실행하는 background batch 작업
+    - 프롬프트 내용을 그대로 system 메시지로 사용, variables가 있으면 입력마다 {{ input }}과 함께 렌더링
+    - 작업별로 BATCH_CONCURRENCY개까지 동시에 생성하고, upstream 슬롯은 /generate와 같은 scheduler에서 받음
+    - 결과는 BATCH_RESULT_FLUSH_SIZE개마다 batch_results에 저장하고 작업 문서의 진행률을 갱신
+    - 실행 중인 작업은 BATCH_HEARTBEAT_INTERVAL초마다 작업 문서의 updated_at을 갱신하고 다른 replica의 취소 요청을 확인
+    """
+
+    jobs_collection = "batch_jobs"
+    results_collection = "batch_results"
+
+    def __init__(
+        self,
+        mongo_client: MongoClientWrapper,
+        prompt_service: PromptService,
+        generate_service: GenerateService,
+        scheduler: GenerationScheduler,
+    ):
+        self.mongo_client = mongo_client
+        self.prompt_service = prompt_service
+        self.generate_service = generate_service
+        self.scheduler = scheduler
+        self.template_manager = generate_service.template_manager or PromptTemplateManager(prompt_service)
+        self.concurrency = int(os.getenv("BATCH_CONCURRENCY", "4"))
+        self.max_inputs = int(os.getenv("BATCH_MAX_INPUTS", "1000"))
+        self.flush_size = int(os.getenv("BATCH_RESULT_FLUSH_SIZE", "20"))
+        self.heartbeat_interval = float(os.getenv("BATCH_HEARTBEAT_INTERVAL", "30"))
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._stopping = False
+
+    @traced()
+    async def create_job(self, batch_request: BatchGenerateRequest) -> str:
+        """작업 문서를 만들고 background에서 실행 시작, 프롬프트가 없으면 예외"""
+        prompt = await self.prompt_service.get_prompt(batch_request.prompt_id)
+        job = BatchJob(
+            prompt_id=batch_request.prompt_id, project_id=prompt["project_id"], total=len(batch_request.inputs)
+        )
+        job_id = str(await self.mongo_client.insert(job, self.jobs_collection))
+
+        # 요청의 trace를 이어받지 않도록 빈 context에서 실행
+        task = asyncio.create_task(
+            self._run(job_id, batch_request.prompt_id, batch_request.inputs, batch_request.variables),
+            context=contextvars.Context(),
+        )
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return job_id
+
+    @traced()
+    async def get_job(self, job_id: str) -> dict:
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(job_id))
+            .fields(["prompt_id", "project_id", "status", "total", "completed", "failed", "created_at", "updated_at"])
+            .build_with_projection()
+            )
+        return (await self.mongo_client.find(filter_obj, collection_name=self.jobs_collection))[0]
+
+    async def iter_results(self, job_id: str) -> AsyncIterator[Dict[str, any]]:
+        """저장된 결과를 입력 순서대로 반환"""
+        filter_obj = (
+            MongoFilter()
+            .equals("job_id", job_id)
+            .fields(["index", "input", "output", "error", "usage"])
+            .sort("index", 1)
+            .build_with_projection()
+            )
+        async for data in self.mongo_client.find_iter(filter_obj, collection_name=self.results_collection):
+            yield data
+
+    @traced()
+    async def cancel_job(self, job_id: str) -> bool:
+        """
+        실행 중인 작업을 취소, 이미 끝난 작업이면 False
+        다른 replica에서 실행 중이면 cancelling으로 표시하고, 실행 중인 replica가 다음 heartbeat에서 취소
+        """
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return True
+
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(job_id))
+            .in_list("status", ["queued", "running"])
+            .build()
+            )
+        try:
+            await self.mongo_client.update(
+                filter_obj,
+                MongoUpdate().set("status", "cancelling").set_updated_at().build(),
+                collection_name=self.jobs_collection,
+            )
+        except DataNotFoundException:
+            # 없는 작업이면 여기서 DataNotFoundException
+            await self.get_job(job_id)
+            return False
+        return True
+
+    async def recover(self):
+        """
+        서버 시작 시 heartbeat가 끊긴 작업을 정리, 실행하던 replica가 stop 없이 종료된 경우
+        running/queued는 interrupted, cancelling은 cancelled로 표시
+        """
+        cutoff = datetime.now(KST_TIMEZONE) - timedelta(seconds=self.heartbeat_interval * 3)
+        filter_obj = (
+            MongoFilter()
+            .in_list("status", ["queued", "running", "cancelling"])
+            .less_than("updated_at", cutoff)
+            .fields(["_id", "status"])
+            .build_with_projection()
+            )
+        try:
+            jobs = await self.mongo_client.find(filter_obj, collection_name=self.jobs_collection)
+        except DataNotFoundException:
+            return
+        except Exception as e:
+            logger.error("Failed to recover batch jobs: {}", e)
+            return
+
+        for job in jobs:
+            status = "cancelled" if job["status"] == "cancelling" else "interrupted"
+            # 조회 후 heartbeat를 남긴 작업은 그대로 둠
+            guard = (
+                MongoFilter()
+                .equals("_id", job["_id"])
+                .equals("status", job["status"])
+                .less_than("updated_at", cutoff)
+                .build()
+                )
+            try:
+                await self.mongo_client.update(
+                    guard, MongoUpdate().set("status", status).set_updated_at().build(),
+                    collection_name=self.jobs_collection,
+                )
+                logger.info("Marked stale batch job {} as {}", job["_id"], status)
+            except DataNotFoundException:
+                continue
+            except Exception as e:
+                logger.error("Failed to recover batch job {}: {}", job["_id"], e)
+
+    async def stop(self):
+        """서버 종료 시 실행 중인 작업을 멈추고 interrupted로 표시"""
+        self._stopping = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job_id: str, prompt_id: str, inputs: List[str], variables: Optional[Dict[str, any]]):
+        await self._update_job(job_id, MongoUpdate().set("status", "running"))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending: List[Dict[str, any]] = []
+
+        async def run_one(index: int, user_input: str):
+            async with semaphore:
+                try:
+                    result = await self._generate_one(job_id, prompt_id, index, user_input, variables)
+                except Exception as e:
+                    # 실행 중 프롬프트가 삭제되는 등 입력 하나의 실패는 결과에 남기고 나머지 입력은 계속 실행
+                    logger.warning("Batch job {} input {} failed: {}", job_id, index, e)
+                    result = self._new_result(job_id, index, user_input)
+                    result["error"] = f"{type(e).__name__}: {str(e)}"
+            pending.append(result)
+            if len(pending) >= self.flush_size:
+                batch = pending[:]
+                pending.clear()
+                await self._flush(job_id, batch)
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, asyncio.current_task()))
+        status = "completed"
+        try:
+            # run_one 밖으로 예외가 나오면 TaskGroup이 나머지 입력을 취소
+            async with asyncio.TaskGroup() as group:
+                for index, user_input in enumerate(inputs):
+                    group.create_task(run_one(index, user_input))
+        except asyncio.CancelledError:
+            status = "interrupted" if self._stopping else "cancelled"
+        except Exception as e:
+            logger.error("Batch job {} failed: {}", job_id, e)
+            status = "failed"
+        finally:
+            heartbeat.cancel()
+            if pending:
+                await self._flush(job_id, pending)
+            await self._update_job(job_id, MongoUpdate().set("status", status))
+
+    async def _generate_one(
+        self, job_id: str, prompt_id: str, index: int, user_input: str, variables: Optional[Dict[str, any]]
+    ) -> Dict[str, any]:
+        result = self._new_result(job_id, index, user_input)
+        if variables is not None:
+            variables = {"input": user_input, **variables}
+        try:
+            system_prompt = await self.template_manager.render(prompt_id, variables)
+        except TemplateException as e:
+            result["error"] = f"{type(e).__name__}: {str(e)}"
+            return result
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_input}]
+        ticket = await self._acquire(job_id)
+        try:
+            result["output"], result["usage"] = await self.generate_service.complete(messages)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {str(e)}"
+        finally:
+            ticket.release()
+        return result
+
+    @staticmethod
+    def _new_result(job_id: str, index: int, user_input: str) -> Dict[str, any]:
+        return {"job_id": job_id, "index": index, "input": user_input, "output": None, "error": None, "usage": None}
+
+    async def _heartbeat(self, job_id: str, run_task: asyncio.Task):
+        # 실행 중임을 기록하고, cancelling으로 바뀌었거나 작업 문서가 삭제되었으면 작업을 취소
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(job_id))
+            .build()
+            )
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                job = await self.mongo_client.find_and_update(
+                    filter_obj, MongoUpdate().set_updated_at().build(), ["status"],
+                    collection_name=self.jobs_collection,
+                )
+            except DataNotFoundException:
+                job = {"status": "deleted"}
+            except Exception as e:
+                logger.warning("Failed to record heartbeat for batch job {}: {}", job_id, e)
+                continue
+            if job["status"] in ("cancelling", "deleted"):
+                logger.info("Cancelling batch job {} ({})", job_id, job["status"])
+                run_task.cancel()
+                return
+
+    async def _acquire(self, job_id: str):
+        # batch 작업은 기다려도 되므로 대기열이 가득 차거나 시간이 초과되면 잠시 후 다시 요청
+        while True:
+            try:
+                return await self.scheduler.acquire(f"batch:{job_id}")
+            except (QueueFullException, QueueTimeoutException):
+                await asyncio.sleep(random.uniform(0.5, 1.5))
+
+    async def _flush(self, job_id: str, results: List[Dict[str, any]]):
+        now = datetime.now(KST_TIMEZONE)
+        operations = [
+            (
+                MongoFilter().equals("job_id", job_id).equals("index", result["index"]).build(),
+                MongoUpdate().set("input", result["input"]).set("output", result["output"])
+                .set("error", result["error"]).set("usage", result["usage"]).set("created_at", now).build(),
+            )
+            for result in results
+        ]
+        failed_count = sum(1 for result in results if result["error"])
+        try:
+            failed = await self.mongo_client.bulk_update(
+                operations, collection_name=self.results_collection, upsert=True
+            )
+            if failed:
+                logger.error("Failed to store {} results for batch job {}", len(failed), job_id)
+            updated = await self._update_job(
+                job_id,
+                MongoUpdate().increment("completed", len(results) - failed_count).increment("failed", failed_count),
+            )
+            if not updated:
+                # 프로젝트 삭제로 작업 문서가 지워졌으면 방금 저장한 결과도 남지 않게 지움
+                await self.mongo_client.delete_many(
+                    MongoFilter().equals("job_id", job_id).build(), collection_name=self.results_collection
+                )
+        except Exception as e:
+            logger.error("Failed to store results for batch job {}: {}", job_id, e)
+
+    async def _update_job(self, job_id: str, update: MongoUpdate) -> bool:
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(job_id))
+            .build()
+            )
+        try:
+            return await self.mongo_client.update(
+                filter_obj, update.set_updated_at().build(), collection_name=self.jobs_collection
+            )
+        except DataNotFoundException:
+            logger.warning("Batch job {} no longer exists", job_id)
+            return False
@@ -0,0 +1,189 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from loguru import logger
+
+from better_assistant.models import Project, Prompt
+from better_assistant.services.project import ProjectService
+from better_assistant.services.prompt import PromptService
+from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.cache import TTLCache
+from better_assistant.utils.tracing import traced
+
+
+def _read_cache() -> TTLCache:
+    return TTLCache(
+        max_entries=int(os.getenv("READ_CACHE_MAX_ENTRIES", "1000")),
+        ttl=float(os.getenv("READ_CACHE_TTL", "30")),
+    )
+
+
+class CachedProjectService(ProjectService):
+    """프로젝트 조회 결과를 캐시하고, 같은 서비스의 생성/수정/삭제 시 무효화"""
+
+    def __init__(self, mongo_client: MongoClientWrapper):
+        super().__init__(mongo_client)
+        self.cache = _read_cache()
+
+    @traced()
+    async def get_projects(self, limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict[str, any]]:
+        key = ("projects", limit, after)
+        result = self.cache.get(key)
+        if result is None:
+            result = await super().get_projects(limit=limit, after=after)
+            self.cache.set(key, result)
+        return list(result)
+
+    @traced()
+    async def get_project(self, project_id: str) -> dict:
+        key = ("project", project_id)
+        result = self.cache.get(key)
+        if result is None:
+            result = await super().get_project(project_id)
+            self.cache.set(key, result)
+        return dict(result)
+
+    async def create_project(self, project: Project) -> ObjectId:
+        result = await super().create_project(project)
+        self.invalidate()
+        return result
+
+    async def update_project(self, project_id: str, project: Project) -> bool:
+        try:
+            return await super().update_project(project_id, project)
+        finally:
+            self.invalidate(project_id)
+
+    async def delete_project(self, project_id: str) -> bool:
+        try:
+            return await super().delete_project(project_id)
+        finally:
+            self.invalidate(project_id)
+
+    async def mark_deleting(self, project_id: str) -> bool:
+        try:
+            return await super().mark_deleting(project_id)
+        finally:
+            self.invalidate(project_id)
+
+    def invalidate(self, project_id: Optional[str] = None):
+        """프로젝트 목록과, project_id가 주어지면 해당 프로젝트 캐시 제거"""
+        self.cache.invalidate(lambda key: key[0] == "projects" or key == ("project", project_id))
+
+
+class CachedPromptService(PromptService):
+    """프로젝트별 프롬프트 목록과 단건 조회를 캐시하고, 같은 서비스의 생성/수정/삭제 시 무효화"""
+
+    def __init__(self, mongo_client: MongoClientWrapper):
+        super().__init__(mongo_client)
+        self.cache = _read_cache()
+
+    @traced()
+    async def get_prompts(
+        self, project_id: str, limit: Optional[int] = None, after: Optional[str] = None
+    ) -> List[Dict[str, any]]:
+        key = (project_id, limit, after)
+        result = self.cache.get(key)
+        if result is None:
+            result = await super().get_prompts(project_id, limit=limit, after=after)
+            self.cache.set(key, result)
+        return list(result)
+
+    @traced()
+    async def get_prompt(self, prompt_id: str) -> dict:
+        # 수정/삭제 시 전체 무효화되므로 prompt_id만으로 구분
+        key = ("prompt", prompt_id)
+        result = self.cache.get(key)
+        if result is None:
+            result = await super().get_prompt(prompt_id)
+            self.cache.set(key, result)
+        return dict(result)
+
+    @traced()
+    async def get_prompt_by_version(self, project_id: str, prompt_version: str) -> dict:
+        key = (project_id, "version", prompt_version)
+        result = self.cache.get(key)
+        if result is None:
+            result = await super().get_prompt_by_version(project_id, prompt_version)
+            self.cache.set(key, result)
+        return dict(result)
+
+    async def create_prompt(self, prompt: Prompt) -> ObjectId:
+        result = await super().create_prompt(prompt)
+        self.invalidate(prompt.project_id)
+        return result
+
+    async def update_prompt(self, prompt_id: str, prompt: Prompt) -> bool:
+        # prompt_id만으로는 프로젝트를 알 수 없어 전체 무효화 (쓰기 빈도가 낮음)
+        try:
+            return await super().update_prompt(prompt_id, prompt)
+        finally:
+            self.invalidate()
+
+    async def delete_prompt(self, prompt_id: str) -> bool:
+        try:
+            return await super().delete_prompt(prompt_id)
+        finally:
+            self.invalidate()
+
+    def invalidate(self, project_id: Optional[str] = None):
+        if project_id is None:
+            self.cache.clear()
+        else:
+            self.cache.invalidate(lambda key: key[0] == project_id)
+
+
+class CacheInvalidationListener:
+    """다른 replica의 변경도 반영되도록 change stream을 구독해 캐시를 무효화"""
+
+    def __init__(
+        self,
+        mongo_client: MongoClientWrapper,
+        project_service: CachedProjectService,
+        prompt_service: CachedPromptService,
+    ):
+        self.mongo_client = mongo_client
+        self.project_service = project_service
+        self.prompt_service = prompt_service
+        self.enabled = os.getenv("READ_CACHE_CHANGE_STREAM", "false").lower() == "true"
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self.enabled:
+            return
+        self._tasks = [
+            asyncio.create_task(self._listen("projects", self._on_project_change)),
+            asyncio.create_task(self._listen("prompts", self._on_prompt_change)),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _listen(self, collection_name: str, on_change):
+        while True:
+            try:
+                async for change in self.mongo_client.watch(collection_name):
+                    on_change(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Change stream on {} stopped, retrying: {}", collection_name, e)
+            # 끊겨 있는 동안 놓친 변경이 있을 수 있으므로 재연결 전에 전체 무효화
+            on_change({})
+            await asyncio.sleep(5)
+
+    def _on_project_change(self, change: Dict[str, any]):
+        document_id = change.get("documentKey", {}).get("_id")
+        if document_id is None:
+            self.project_service.cache.clear()
+        else:
+            self.project_service.invalidate(str(document_id))
+
+    def _on_prompt_change(self, change: Dict[str, any]):
+        project_id = (change.get("fullDocument") or {}).get("project_id")
+        self.prompt_service.invalidate(project_id)
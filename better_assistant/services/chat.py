@@ -1,47 +1,155 @@
-from datetime import datetime
-from typing import Dict, List
+import asyncio
+import os
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 from bson import ObjectId
 
+from better_assistant.exceptions import DataNotCreatedException, DataNotFoundException, InvalidDataException
 from better_assistant.models import Dialog, MongoFilter, MongoUpdate
 from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.tracing import traced
+
+# 위치를 확보한 뒤 실패한 bucket write를 같은 위치로 다시 시도하는 횟수
+BUCKET_WRITE_RETRIES = 3
 
 
 class ChatService:
+    """
+    대화 저장 방식은 DIALOG_STORAGE 환경변수로 선택
+    - embedded: 대화 문서의 dialog_content 배열에 모든 메시지 저장
+    - bucketed: 메시지는 dialog_messages collection에 DIALOG_BUCKET_SIZE개씩 나눠 저장하고,
+      대화 문서에는 message_count와 updated_at만 유지
+    """
+
     def __init__(self, mongo_client: MongoClientWrapper):
         self.mongo_client = mongo_client
+        self.bucketed = os.getenv("DIALOG_STORAGE", "embedded") == "bucketed"
+        self.bucket_size = int(os.getenv("DIALOG_BUCKET_SIZE", "100"))
+        self._change_listeners: List[Callable[[str], None]] = []
+
+    def add_change_listener(self, listener: Callable[[str], None]):
+        """대화가 수정되거나 삭제되면 dialog_id로 호출할 callback 등록 (대화 내역 캐시 무효화용)"""
+        self._change_listeners.append(listener)
+
+    def _notify_change(self, dialog_id: str):
+        for listener in self._change_listeners:
+            listener(dialog_id)
 
-    async def get_dialogs(self, project_id: str) -> List[Dict[str, any]]:
+    def _dialogs_filter(self, project_id: str, limit: Optional[int], after: Optional[str]) -> dict:
         filter_obj = (
             MongoFilter()
             .equals("project_id", project_id)
             .fields(["dialog_title", "updated_at", "_id"])
-            .build_with_projection()
             )
-        result: List[Dict[str, any]] = await self.mongo_client.find(filter_obj, collection_name="dialogs")
-
-        for data in result:
-            for key, value in data.items():
-                if isinstance(value, datetime):
-                    data[key] = value.strftime("%Y-%m-%d %H:%M:%S")
-                if isinstance(value, ObjectId):
-                    data[key] = value.__str__()
+        if limit or after:
+            filter_obj.sort("_id", 1).limit(limit)
+        if after:
+            filter_obj.greater_than("_id", ObjectId(after))
+        return filter_obj.build_with_projection()
+
+    @traced()
+    async def get_dialogs(
+        self, project_id: str, limit: Optional[int] = None, after: Optional[str] = None
+    ) -> List[Dict[str, any]]:
+        filter_obj = self._dialogs_filter(project_id, limit, after)
+        try:
+            result: List[Dict[str, any]] = await self.mongo_client.find(filter_obj, collection_name="dialogs")
+        except DataNotFoundException:
+            if after:
+                return []
+            raise
         return result
 
-    async def get_dialog(self, project_id: str, dialog_id: str) -> dict:
+    async def iter_dialogs(self, project_id: str) -> AsyncIterator[Dict[str, any]]:
+        filter_obj = self._dialogs_filter(project_id, None, None)
+        async for data in self.mongo_client.find_iter(filter_obj, collection_name="dialogs"):
+            yield data
+
+    @traced()
+    async def get_dialog(
+        self, project_id: str, dialog_id: str, last_n: Optional[int] = None, before: Optional[int] = None
+    ) -> dict:
+        """
+        대화 조회, last_n/before로 메시지 일부만 조회
+
+        Args:
+            last_n (int): 범위 끝에서부터 가져올 메시지 수
+            before (int): 이 index 이전의 메시지만 조회 (이전 응답의 next_before)
+        """
         filter_obj = (
             MongoFilter()
             .equals("_id", ObjectId(dialog_id))
             .equals("project_id", project_id)
-            .fields(["dialog_title", "dialog_content", "updated_at", "project_id"])
+            .fields(["dialog_title", "created_at", "updated_at", "project_id"])
+            )
+        if self.bucketed:
+            filter_obj.fields(["message_count"])
+        else:
+            filter_obj.size("message_count", "dialog_content")
+            content_slice = self._content_slice(last_n, before)
+            if content_slice is None:
+                filter_obj.fields(["dialog_content"])
+            else:
+                filter_obj.slice("dialog_content", content_slice)
+        result = (await self.mongo_client.find(filter_obj.build_with_projection(), collection_name="dialogs"))[0]
+
+        message_count = result.pop("message_count", 0)
+        end = message_count if before is None else before
+        start = max(0, end - last_n) if last_n else 0
+        if self.bucketed:
+            result["dialog_content"] = await self._read_buckets(dialog_id, start, min(end, message_count))
+        elif end <= start:
+            result["dialog_content"] = []
+
+        result["message_count"] = message_count
+        result["next_before"] = start if start > 0 else None
+        return result
+
+    @traced()
+    async def get_dialog_content(self, dialog_id: str, last_n: Optional[int] = None) -> List[Dict[str, any]]:
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(dialog_id))
+            )
+        if self.bucketed:
+            filter_obj.fields(["message_count"])
+        elif last_n:
+            filter_obj.slice("dialog_content", -last_n)
+        else:
+            filter_obj.fields(["dialog_content"])
+        result = (await self.mongo_client.find(filter_obj.build_with_projection(), collection_name="dialogs"))[0]
+
+        if not self.bucketed:
+            return result.get("dialog_content", [])
+        message_count = result.get("message_count", 0)
+        start = max(0, message_count - last_n) if last_n else 0
+        return await self._read_buckets(dialog_id, start, message_count)
+
+    @traced()
+    async def check_dialog(self, dialog_id: str):
+        """형식이 틀린 dialog_id면 InvalidDataException, 대화가 없으면 DataNotFoundException"""
+        if not ObjectId.is_valid(dialog_id):
+            raise InvalidDataException(f"Invalid dialog id: {dialog_id}")
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(dialog_id))
+            .fields(["_id"])
             .build_with_projection()
             )
-        result = await self.mongo_client.find(filter_obj, collection_name="dialogs")
-        return Dialog.from_dict(data=result[0]).to_dict()
+        await self.mongo_client.find(filter_obj, collection_name="dialogs")
 
+    @traced()
     async def create_dialog(self, dialog: Dialog) -> ObjectId:
-        return await self.mongo_client.insert(dialog, "dialogs")
+        if not self.bucketed:
+            return await self.mongo_client.insert(dialog, "dialogs")
+
+        msgs = [msg.model_dump() for msg in dialog.dialog_content]
+        dialog_id = await self.mongo_client.insert(dialog.model_copy(update={"dialog_content": []}), "dialogs")
+        if msgs:
+            await self._append_to_buckets(str(dialog_id), msgs)
+        return dialog_id
 
+    @traced()
     async def update_dialog(self, dialog_id: str, dialog: Dialog) -> bool:
         filter_obj = (
             MongoFilter()
@@ -54,9 +162,16 @@ class ChatService:
             .set_updated_at()
             .build()
         )
-        return await self.mongo_client.update(filter_obj, update_obj, collection_name="dialogs")
+        try:
+            return await self.mongo_client.update(filter_obj, update_obj, collection_name="dialogs")
+        finally:
+            self._notify_change(dialog_id)
 
+    @traced()
     async def add_msg_to_dialog(self, dialog_id: str, msg: Dict[str, any]) -> bool:
+        if self.bucketed:
+            return await self._append_to_buckets(dialog_id, [msg])
+
         filter_obj = (
             MongoFilter()
             .equals("_id", ObjectId(dialog_id))
@@ -70,7 +185,11 @@ class ChatService:
         )
         return await self.mongo_client.update(filter_obj, update_obj, collection_name="dialogs")
 
+    @traced()
     async def add_msgs_to_dialog(self, dialog_id: str, msgs: List[Dict[str, any]]) -> bool:
+        if self.bucketed:
+            return await self._append_to_buckets(dialog_id, msgs)
+
         filter_obj = (
             MongoFilter()
             .equals("_id", ObjectId(dialog_id))
@@ -84,10 +203,160 @@ class ChatService:
         )
         return await self.mongo_client.update(filter_obj, update_obj, collection_name="dialogs")
 
+    @traced()
+    async def add_msgs_to_dialogs(
+        self, msgs_by_dialog: Dict[str, List[Dict[str, any]]]
+    ) -> Tuple[List[str], List[str]]:
+        """
+        여러 대화에 메시지를 한 번의 bulk write로 추가
+
+        Returns:
+            (failed, rejected): 다시 시도할 dialog_id 목록과, 형식이 틀리거나 없는 대화라서 또는 bucket 위치를 이미
+            확보해서 다시 시도하면 안 되는 dialog_id 목록
+        """
+        if self.bucketed:
+            failed_ids, rejected_ids = [], []
+            for dialog_id, msgs in msgs_by_dialog.items():
+                if not ObjectId.is_valid(dialog_id):
+                    rejected_ids.append(dialog_id)
+                    continue
+                try:
+                    await self._append_to_buckets(dialog_id, msgs)
+                except (DataNotFoundException, DataNotCreatedException):
+                    rejected_ids.append(dialog_id)
+                except Exception:
+                    failed_ids.append(dialog_id)
+            return failed_ids, rejected_ids
+
+        # 잘못된 id 하나가 batch 전체를 실패시키지 않도록 id마다 확인하고, 없는 대화는 write 전에 걸러냄
+        object_ids = {dialog_id: ObjectId(dialog_id) for dialog_id in msgs_by_dialog if ObjectId.is_valid(dialog_id)}
+        existing = set()
+        if object_ids:
+            filter_obj = (
+                MongoFilter()
+                .in_list("_id", list(object_ids.values()))
+                .fields(["_id"])
+                .build_with_projection()
+                )
+            try:
+                existing = {
+                    str(data["_id"]) for data in await self.mongo_client.find(filter_obj, collection_name="dialogs")
+                }
+            except DataNotFoundException:
+                pass
+        rejected_ids = [dialog_id for dialog_id in msgs_by_dialog if dialog_id not in existing]
+        dialog_ids = [dialog_id for dialog_id in msgs_by_dialog if dialog_id in existing]
+        if not dialog_ids:
+            return [], rejected_ids
+
+        operations = [
+            (
+                MongoFilter().equals("_id", object_ids[dialog_id]).build(),
+                MongoUpdate().push_all("dialog_content", msgs_by_dialog[dialog_id]).set_updated_at().build(),
+            )
+            for dialog_id in dialog_ids
+        ]
+        failed = await self.mongo_client.bulk_update(operations, collection_name="dialogs")
+        return [dialog_ids[index] for index in failed], rejected_ids
+
+    @traced()
     async def delete_dialog(self, dialog_id: str) -> bool:
         filter_obj = (
             MongoFilter()
             .equals("_id", ObjectId(dialog_id))
             .build()
             )
-        return await self.mongo_client.delete(filter_obj, collection_name="dialogs")
+        try:
+            result = await self.mongo_client.delete(filter_obj, collection_name="dialogs")
+            if self.bucketed:
+                await self.mongo_client.delete_many(
+                    MongoFilter().equals("dialog_id", dialog_id).build(), collection_name="dialog_messages"
+                )
+        finally:
+            self._notify_change(dialog_id)
+        return result
+
+    def _content_slice(self, last_n: Optional[int], before: Optional[int]):
+        if before is None:
+            return -last_n if last_n else None
+        start = max(0, before - last_n) if last_n else 0
+        # $slice의 limit은 양수여야 하므로 빈 범위는 조회 후 비움
+        return [start, max(1, before - start)]
+
+    async def _append_to_buckets(self, dialog_id: str, msgs: List[Dict[str, any]]) -> bool:
+        """
+        message_count를 먼저 원자적으로 증가시켜 메시지 위치를 확보한 뒤 bucket에 기록
+
+        위치 확보 전에 실패하면 그대로 예외가 나므로 다시 호출해도 되지만, 확보한 뒤 bucket write가 끝내 실패하면
+        DataNotCreatedException: 다시 호출하면 새 위치를 확보해 메시지가 밀리거나 중복되므로 호출한 쪽은 재시도하지 않음
+        """
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(dialog_id))
+            .build()
+            )
+        update_obj = (
+            MongoUpdate()
+            .increment("message_count", len(msgs))
+            .set_updated_at()
+            .build()
+        )
+        dialog = await self.mongo_client.find_and_update(
+            filter_obj, update_obj, ["message_count", "project_id"], collection_name="dialogs"
+        )
+        message_count = dialog["message_count"]
+
+        msgs_by_bucket: Dict[int, List[Dict[str, any]]] = {}
+        for index, msg in enumerate(msgs, start=message_count - len(msgs)):
+            msgs_by_bucket.setdefault(index // self.bucket_size, []).append(
+                {"content": msg["content"], "role": msg["role"], "index": index}
+            )
+        # 메시지에 index가 있어 $addToSet으로 같은 write를 다시 해도 중복되지 않음
+        operations = [
+            (
+                MongoFilter().equals("dialog_id", dialog_id).equals("seq", seq).build(),
+                MongoUpdate()
+                .add_to_set("messages", {"$each": bucket_msgs})
+                .set("project_id", dialog["project_id"])
+                .build(),
+            )
+            for seq, bucket_msgs in msgs_by_bucket.items()
+        ]
+        for attempt in range(BUCKET_WRITE_RETRIES + 1):
+            try:
+                failed = await self.mongo_client.bulk_update(
+                    operations, collection_name="dialog_messages", upsert=True
+                )
+            except Exception:
+                # 어느 bucket까지 기록됐는지 모르므로 전부 다시 기록
+                failed = list(range(len(operations)))
+            if not failed:
+                return True
+            operations = [operations[index] for index in failed]
+            if attempt < BUCKET_WRITE_RETRIES:
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        raise DataNotCreatedException(f"Failed to write {len(operations)} message buckets for dialog: {dialog_id}")
+
+    async def _read_buckets(self, dialog_id: str, start: int, end: int) -> List[Dict[str, any]]:
+        """[start, end) 범위 index의 메시지를 bucket에서 읽어 순서대로 반환"""
+        if end <= start:
+            return []
+        filter_obj = (
+            MongoFilter()
+            .equals("dialog_id", dialog_id)
+            .between("seq", start // self.bucket_size, (end - 1) // self.bucket_size)
+            .fields(["messages"])
+            .sort("seq", 1)
+            .build_with_projection()
+            )
+        try:
+            buckets = await self.mongo_client.find(filter_obj, collection_name="dialog_messages")
+        except DataNotFoundException:
+            return []
+
+        # 동시에 추가된 메시지는 bucket 안에서 순서가 섞일 수 있어 index로 정렬
+        msgs = sorted(
+            (msg for bucket in buckets for msg in bucket["messages"] if start <= msg["index"] < end),
+            key=lambda msg: msg["index"],
+        )
+        return [{"content": msg["content"], "role": msg["role"]} for msg in msgs]
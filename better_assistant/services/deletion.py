@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+import os
+from typing import Dict, List
+
+from bson import ObjectId
+from loguru import logger
+
+from better_assistant.exceptions import DataNotFoundException
+from better_assistant.models import MongoFilter, MongoUpdate
+from better_assistant.services.cache import CachedPromptService
+from better_assistant.services.project import ProjectService
+from better_assistant.services.prompt import PromptService
+from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.tracing import traced
+
+
+class ProjectDeletionService:
+    """
+    프로젝트를 프롬프트, 대화, batch 작업과 함께 background에서 삭제
+    - 프로젝트를 deleting으로 표시해 목록/조회에서 숨긴 뒤 바로 반환
+    - 하위 문서는 PROJECT_DELETE_CHUNK_SIZE개씩 _id로 delete_many 하고 chunk 사이에 PROJECT_DELETE_CHUNK_PAUSE초 쉬어
+      긴 lock과 replication lag을 피함
+    - 진행률은 프로젝트 문서의 deletion에 누적되며, 재시작하면 deleting인 프로젝트의 삭제를 이어서 진행
+    """
+
+    def __init__(
+        self,
+        mongo_client: MongoClientWrapper,
+        project_service: ProjectService,
+        prompt_service: PromptService,
+    ):
+        self.mongo_client = mongo_client
+        self.project_service = project_service
+        self.prompt_service = prompt_service
+        self.chunk_size = int(os.getenv("PROJECT_DELETE_CHUNK_SIZE", "500"))
+        self.chunk_pause = float(os.getenv("PROJECT_DELETE_CHUNK_PAUSE", "0.05"))
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @traced()
+    async def delete_project(self, project_id: str) -> dict:
+        """삭제를 시작하고 현재 진행률을 반환, 이미 삭제 중이면 진행 중인 삭제를 그대로 사용"""
+        try:
+            await self.project_service.mark_deleting(project_id)
+        except DataNotFoundException:
+            # 없는 프로젝트면 여기서 DataNotFoundException
+            await self.project_service.get_deletion(project_id)
+        self._start(project_id)
+        return await self.project_service.get_deletion(project_id)
+
+    async def resume(self):
+        """서버 시작 시 끝나지 않은 삭제를 다시 시작"""
+        try:
+            async for project_id in self.project_service.iter_deleting_project_ids():
+                logger.info("Resuming deletion of project {}", project_id)
+                self._start(project_id)
+        except Exception as e:
+            logger.error("Failed to resume project deletions: {}", e)
+
+    async def stop(self):
+        """진행 중인 삭제를 멈춤, 진행률은 저장되어 있어 다음 시작 시 이어서 진행"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _start(self, project_id: str):
+        if project_id in self._tasks:
+            return
+        # 요청의 trace를 이어받지 않도록 빈 context에서 실행
+        task = asyncio.create_task(self._run(project_id), context=contextvars.Context())
+        self._tasks[project_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(project_id, None))
+
+    async def _run(self, project_id: str):
+        try:
+            await self._delete_chunks(project_id, "prompts")
+            await self._delete_chunks(project_id, "prompt_revisions")
+            await self._delete_chunks(project_id, "prompt_blobs")
+            await self._delete_chunks(project_id, "dialogs")
+            await self._delete_chunks(project_id, "batch_jobs")
+            await self.project_service.delete_project(project_id)
+            logger.info("Deleted project {}", project_id)
+        except asyncio.CancelledError:
+            raise
+        except DataNotFoundException:
+            # 다른 replica가 먼저 끝낸 경우
+            pass
+        except Exception as e:
+            logger.error("Failed to delete project {}, will retry on restart: {}", project_id, e)
+        finally:
+            if isinstance(self.prompt_service, CachedPromptService):
+                self.prompt_service.invalidate(project_id)
+
+    async def _delete_chunks(self, project_id: str, collection_name: str):
+        filter_obj = (
+            MongoFilter()
+            .equals("project_id", project_id)
+            .fields(["_id"])
+            .limit(self.chunk_size)
+            .build_with_projection()
+            )
+        while True:
+            try:
+                ids: List[ObjectId] = [
+                    data["_id"] for data in await self.mongo_client.find(filter_obj, collection_name=collection_name)
+                ]
+            except DataNotFoundException:
+                return
+
+            progress = MongoUpdate()
+            if collection_name == "dialogs":
+                # bucketed 방식의 메시지는 대화보다 먼저 지워야 대화가 없는 bucket이 남지 않음
+                deleted_messages = await self.mongo_client.delete_many(
+                    MongoFilter().in_list("dialog_id", [str(_id) for _id in ids]).build(),
+                    collection_name="dialog_messages",
+                )
+                progress.increment("deletion.dialog_messages", deleted_messages)
+            elif collection_name == "batch_jobs":
+                # batch_results에는 project_id가 없어 작업 ID로 지움
+                deleted_results = await self.mongo_client.delete_many(
+                    MongoFilter().in_list("job_id", [str(_id) for _id in ids]).build(),
+                    collection_name="batch_results",
+                )
+                progress.increment("deletion.batch_results", deleted_results)
+            deleted = await self.mongo_client.delete_many(
+                MongoFilter().in_list("_id", ids).build(), collection_name=collection_name
+            )
+            progress.increment(f"deletion.{collection_name}", deleted)
+            await self.mongo_client.update(
+                MongoFilter().equals("_id", ObjectId(project_id)).build(),
+                progress.set_updated_at().build(),
+                collection_name="projects",
+            )
+            await asyncio.sleep(self.chunk_pause)
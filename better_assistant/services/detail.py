@@ -0,0 +1,40 @@
+import asyncio
+from typing import Dict, Optional
+
+from better_assistant.exceptions import DataNotFoundException
+from better_assistant.services.chat import ChatService
+from better_assistant.services.project import ProjectService
+from better_assistant.services.prompt import PromptService
+from better_assistant.utils import next_cursor
+from better_assistant.utils.tracing import traced
+
+
+class ProjectDetailService:
+    def __init__(self, project_service: ProjectService, prompt_service: PromptService, chat_service: ChatService):
+        self.project_service = project_service
+        self.prompt_service = prompt_service
+        self.chat_service = chat_service
+
+    @traced()
+    async def get_project_detail(self, project_id: str, limit: Optional[int] = None) -> Dict[str, any]:
+        """프로젝트, 프롬프트 목록, 대화 목록을 동시에 조회해 하나의 detail로 조립"""
+        project_result, prompt_result, dialog_result = await asyncio.gather(
+            self.project_service.get_project(project_id),
+            self.prompt_service.get_prompts(project_id=project_id, limit=limit),
+            self.chat_service.get_dialogs(project_id=project_id, limit=limit),
+            return_exceptions=True,
+        )
+
+        # 순차 호출일 때와 같은 우선순위로 예외를 전달: 프로젝트 > 프롬프트 > 대화
+        if isinstance(project_result, BaseException):
+            raise project_result
+        for result in (prompt_result, dialog_result):
+            if isinstance(result, BaseException) and not isinstance(result, DataNotFoundException):
+                raise result
+
+        project_result["prompts"] = [] if isinstance(prompt_result, DataNotFoundException) else prompt_result
+        project_result["dialogs"] = [] if isinstance(dialog_result, DataNotFoundException) else dialog_result
+        if limit:
+            project_result["prompts_next_cursor"] = next_cursor(project_result["prompts"], limit)
+            project_result["dialogs_next_cursor"] = next_cursor(project_result["dialogs"], limit)
+        return project_result
@@ -1,44 +1,215 @@
-import asyncio
+import json
 import os
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from openai import AsyncOpenAI
+from loguru import logger
 
+from better_assistant.exceptions import UpstreamTimeoutException
+from better_assistant.managers.context import DialogContextManager
+from better_assistant.managers.persistence import DialogWriteQueue
+from better_assistant.managers.response_cache import ResponseCache
+from better_assistant.managers.templates import PromptTemplateManager
+from better_assistant.managers.upstream import UpstreamPool
 from better_assistant.models import GenerateRequest
-from better_assistant.services import ChatService
+from better_assistant.services.chat import ChatService
+from better_assistant.utils.log import sampled
+from better_assistant.utils.metrics import Counter, Histogram
+from better_assistant.utils.sse import coalesce, format_sse
+from better_assistant.utils.tokens import estimate_messages_tokens, estimate_tokens
+from better_assistant.utils.tracing import record_span, traced
+
+GENERATE_REQUESTS = Counter("generate_requests_total", "Generation streams by outcome", ("cached", "outcome"))
+GENERATE_TTFT_SECONDS = Histogram(
+    "generate_time_to_first_token_seconds",
+    "Time from request to the first streamed text",
+    ("cached",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+)
+GENERATE_STREAM_SECONDS = Histogram(
+    "generate_stream_duration_seconds",
+    "Total generation stream duration",
+    ("cached",),
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+GENERATE_TOKENS_PER_SECOND = Histogram(
+    "generate_tokens_per_second",
+    "Completion tokens per second of stream duration (upstream only)",
+    buckets=(5, 10, 20, 40, 80, 160, 320),
+)
+GENERATE_CHUNKS = Counter("generate_chunks_total", "Text chunks received (upstream) or replayed (cache)", ("cached",))
+GENERATE_FRAMES = Counter("generate_frames_total", "SSE data frames sent to clients", ("cached",))
+GENERATE_OUTPUT_CHARS = Counter("generate_output_chars_total", "Generated characters sent to clients", ("cached",))
+
+# chunk/요청마다 남기는 debug log는 LOG_LEVEL=DEBUG일 때만 format되고, 그중 LOG_SAMPLE_RATE 비율만 기록
+_event_logger = sampled()
 
 
 class GenerateService:
-    def __init__(self, chat_service: ChatService):
+    def __init__(
+        self,
+        chat_service: ChatService,
+        response_cache: Optional[ResponseCache] = None,
+        write_queue: Optional[DialogWriteQueue] = None,
+        template_manager: Optional[PromptTemplateManager] = None,
+    ):
         self.chat_service = chat_service
-        api_base_url = os.getenv("API_BASE_URL")
-        api_key = os.getenv("API_KEY")
+        self.response_cache = response_cache
+        self.write_queue = write_queue
+        self.template_manager = template_manager
+        self.context_manager = DialogContextManager(chat_service)
         self.model_name = os.getenv("MODEL_NAME")
-        self.client = AsyncOpenAI(api_key=api_key, base_url=api_base_url)
+        self.max_tokens = 1024
+        self.temperature = 1.2
+        self.flush_interval = float(os.getenv("SSE_FLUSH_INTERVAL", "0.05"))
+        self.flush_max_chars = int(os.getenv("SSE_FLUSH_MAX_CHARS", "512"))
+        self.upstream = UpstreamPool()
+
+    @traced()
+    async def prepare_messages(self, generate_request: GenerateRequest) -> List[Dict[str, str]]:
+        """
+        요청의 messages를 그대로 쓰거나, 비어 있으면 서버에 저장된 대화 내역으로 구성
+        prompt_id가 있으면 프롬프트를 system 메시지로 앞에 추가, variables가 있을 때만 template으로 렌더링
+        """
+        if generate_request.messages is None:
+            messages = await self.context_manager.build_messages(
+                generate_request.dialog_id, generate_request.user_input
+            )
+        else:
+            # 생성된 turn은 나중에 이 대화에 저장되므로, 저장 시점이 아니라 요청 시점에 대화를 확인
+            await self.chat_service.check_dialog(generate_request.dialog_id)
+            messages = [msg.model_dump() for msg in generate_request.messages]
+
+        if generate_request.prompt_id is not None and self.template_manager is not None:
+            variables = None
+            if generate_request.variables is not None:
+                variables = {"input": generate_request.user_input, **generate_request.variables}
+            system_prompt = await self.template_manager.render(generate_request.prompt_id, variables)
+            messages = [{"role": "system", "content": system_prompt}, *messages]
+        return messages
+
+    async def generate(self, generate_request: GenerateRequest, messages: List[Dict[str, str]]):
+        started = time.perf_counter()
+        started_ns = time.time_ns()
+        first_token_ms = None
+        cache_key = None
+        cached = None
+        if self.response_cache and self.response_cache.enabled:
+            cache_key = ResponseCache.make_key(self.model_name, self.temperature, self.max_tokens, messages)
+            cached = await self.response_cache.get(cache_key)
 
-    async def generate(self, generate_request: GenerateRequest):
-        stream = await self.client.chat.completions.create(
+        parts: List[str] = []
+        state: Dict[str, any] = {"usage": None, "chunks": 0}
+        event_id = 0
+        stream = None
+        cached_label = "true" if cached is not None else "false"
+
+        if cached is not None:
+            source = self._iter_cached(cached, state)
+        else:
+            stream = await self.upstream.stream_chat(
+                model=self.model_name,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+            )
+            source = coalesce(self._iter_content(stream, state), self.flush_interval, self.flush_max_chars)
+
+        try:
+            async for text in source:
+                if not parts:
+                    first_token_ms = (time.perf_counter() - started) * 1000
+                    GENERATE_TTFT_SECONDS.observe(first_token_ms / 1000, cached_label)
+                parts.append(text)
+                event_id += 1
+                yield format_sse(text, event_id=event_id)
+        except UpstreamTimeoutException as e:
+            logger.warning("{}", e)
+            GENERATE_REQUESTS.inc(cached_label, "upstream_timeout")
+            yield format_sse("Upstream timeout", event="error", event_id=event_id + 1)
+            return
+        finally:
+            # client 연결이 끊겨 취소된 경우에도 upstream을 읽는 task와 연결을 바로 닫음
+            await source.aclose()
+            if stream is not None:
+                await stream.close()
+            GENERATE_CHUNKS.inc(cached_label, value=state["chunks"])
+            GENERATE_FRAMES.inc(cached_label, value=event_id)
+            record_span(
+                "GenerateService.generate", started_ns,
+                cached=cached is not None, frames=event_id, ttft_ms=round(first_token_ms or 0.0, 3),
+            )
+
+        duration = time.perf_counter() - started
+        llm_response = "".join(parts)
+        GENERATE_REQUESTS.inc(cached_label, "ok")
+        GENERATE_STREAM_SECONDS.observe(duration, cached_label)
+        GENERATE_OUTPUT_CHARS.inc(cached_label, value=len(llm_response))
+        _event_logger.debug(
+            "Generated dialog {}: {} frames, {} chars in {}s (cached={})",
+            generate_request.dialog_id, event_id, len(llm_response), round(duration, 3), cached_label,
+        )
+        turn = [
+            {"content": generate_request.user_input, "role": "user"},
+            {"content": llm_response, "role": "assistant"}
+        ]
+        if self.write_queue:
+            await self.write_queue.enqueue(generate_request.dialog_id, turn)
+        else:
+            await self.chat_service.add_msgs_to_dialog(generate_request.dialog_id, turn)
+        self.context_manager.append(generate_request.dialog_id, turn)
+        if cache_key and cached is None and llm_response:
+            await self.response_cache.set(cache_key, llm_response)
+
+        token_counts = self._token_counts(messages, llm_response, state["usage"])
+        if cached is not None:
+            token_counts["cached"] = True
+        elif duration > 0:
+            GENERATE_TOKENS_PER_SECOND.observe(token_counts["completion_tokens"] / duration)
+        yield format_sse(json.dumps(token_counts), event="usage", event_id=event_id + 1)
+
+    async def complete(self, messages: List[Dict[str, str]]) -> Tuple[str, Dict[str, any]]:
+        """stream을 끝까지 모아 응답 전체와 token 수를 반환 (batch 작업용, 대화 저장/캐시 없음)"""
+        state: Dict[str, any] = {"usage": None, "chunks": 0}
+        stream = await self.upstream.stream_chat(
             model=self.model_name,
-            messages=generate_request.messages,
-            max_tokens=1024,
-            temperature=1.2,
-            stream=True
+            messages=messages,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
         )
+        try:
+            response = "".join([text async for text in self._iter_content(stream, state)])
+        finally:
+            await stream.close()
+        return response, self._token_counts(messages, response, state["usage"])
+
+    async def close(self):
+        await self.upstream.close()
+
+    def _token_counts(self, messages: List[Dict[str, str]], response: str, usage) -> Dict[str, any]:
+        if usage:
+            return {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+        return {
+            "prompt_tokens": estimate_messages_tokens(messages),
+            "completion_tokens": estimate_tokens(response),
+            "estimated": True,
+        }
 
-        llm_response = ""
+    async def _iter_cached(self, response: str, state: Dict[str, any]) -> AsyncIterator[str]:
+        """캐시된 응답을 실제 stream과 같은 frame 크기로 나눠서 반환"""
+        for start in range(0, len(response), self.flush_max_chars):
+            state["chunks"] += 1
+            yield response[start:start + self.flush_max_chars]
 
+    async def _iter_content(self, stream, state: Dict[str, any]) -> AsyncIterator[str]:
+        """upstream chunk에서 텍스트만 꺼내고, usage가 오면 state에 기록"""
         async for chunk in stream:
+            if chunk.usage:
+                state["usage"] = chunk.usage
+            if not chunk.choices:
+                continue
             content = chunk.choices[0].delta.content
-
             if content:
-                llm_response += content
-                yield f"data: {content}\n\n"
-
-            await asyncio.sleep(0.001)
-
-        await self.chat_service.add_msgs_to_dialog(
-            generate_request.dialog_id,
-            [
-                {"content": generate_request.user_input, "role": "user"},
-                {"content": llm_response, "role": "assistant"}
-            ]
-        )
+                state["chunks"] += 1
+                _event_logger.debug("Upstream chunk {}: {} chars", state["chunks"], len(content))
+                yield content
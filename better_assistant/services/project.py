@@ -1,46 +1,63 @@
-from datetime import datetime
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Optional
 
 from bson import ObjectId
 
+from better_assistant.exceptions import DataNotFoundException
 from better_assistant.models import MongoFilter, MongoUpdate, Project
 from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.tracing import traced
 
 
 class ProjectService:
     def __init__(self, mongo_client: MongoClientWrapper):
         self.mongo_client = mongo_client
 
-    async def get_projects(self) -> List[Dict[str, any]]:
+    def _projects_filter(self, limit: Optional[int], after: Optional[str]) -> dict:
         filter_obj = (
             MongoFilter()
             .exists("project_title")
+            .not_equals("status", "deleting")
             .fields(["project_title", "updated_at", "_id"])
-            .build_with_projection()
             )
-        result: List[Dict[str, any]] = await self.mongo_client.find(filter_obj, collection_name="projects")
+        if limit or after:
+            filter_obj.sort("_id", 1).limit(limit)
+        if after:
+            filter_obj.greater_than("_id", ObjectId(after))
+        return filter_obj.build_with_projection()
 
-        for data in result:
-            for key, value in data.items():
-                if isinstance(value, datetime):
-                    data[key] = value.strftime("%Y-%m-%d %H:%M:%S")
-                if isinstance(value, ObjectId):
-                    data[key] = value.__str__()
+    @traced()
+    async def get_projects(self, limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict[str, any]]:
+        filter_obj = self._projects_filter(limit, after)
+        try:
+            result: List[Dict[str, any]] = await self.mongo_client.find(filter_obj, collection_name="projects")
+        except DataNotFoundException:
+            if after:
+                return []
+            raise
         return result
 
+    async def iter_projects(self) -> AsyncIterator[Dict[str, any]]:
+        filter_obj = self._projects_filter(None, None)
+        async for data in self.mongo_client.find_iter(filter_obj, collection_name="projects"):
+            yield data
+
+    @traced()
     async def get_project(self, project_id: str) -> dict:
         filter_obj = (
             MongoFilter()
             .equals("_id", ObjectId(project_id))
-            .fields(["project_title", "updated_at"])
+            .not_equals("status", "deleting")
+            .fields(["project_title", "created_at", "updated_at"])
             .build_with_projection()
             )
         result = await self.mongo_client.find(filter_obj, collection_name="projects")
-        return Project.from_dict(data=result[0]).to_dict()
+        return result[0]
 
+    @traced()
     async def create_project(self, project: Project) -> ObjectId:
         return await self.mongo_client.insert(project, "projects")
 
+    @traced()
     async def update_project(self, project_id: str, project: Project) -> bool:
         filter_obj = (
             MongoFilter()
@@ -55,6 +72,7 @@ class ProjectService:
         )
         return await self.mongo_client.update(filter_obj, update_obj, collection_name="projects")
 
+    @traced()
     async def delete_project(self, project_id: str) -> bool:
         filter_obj = (
             MongoFilter()
@@ -62,3 +80,49 @@ class ProjectService:
             .build()
             )
         return await self.mongo_client.delete(filter_obj, collection_name="projects")
+
+    @traced()
+    async def mark_deleting(self, project_id: str) -> bool:
+        """목록/조회에서 숨기고 삭제 진행률을 0으로 초기화, 없거나 이미 삭제 중이면 DataNotFoundException"""
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(project_id))
+            .not_equals("status", "deleting")
+            .build()
+            )
+        update_obj = (
+            MongoUpdate()
+            .set("status", "deleting")
+            .set(
+                "deletion",
+                {
+                    "prompts": 0, "prompt_revisions": 0, "prompt_blobs": 0, "dialogs": 0, "dialog_messages": 0,
+                    "batch_jobs": 0, "batch_results": 0,
+                },
+            )
+            .set_updated_at()
+            .build()
+        )
+        return await self.mongo_client.update(filter_obj, update_obj, collection_name="projects")
+
+    @traced()
+    async def get_deletion(self, project_id: str) -> dict:
+        """삭제 중인 프로젝트의 진행률, 삭제가 끝났거나 없는 프로젝트면 DataNotFoundException"""
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(project_id))
+            .equals("status", "deleting")
+            .fields(["project_title", "status", "deletion", "updated_at"])
+            .build_with_projection()
+            )
+        return (await self.mongo_client.find(filter_obj, collection_name="projects"))[0]
+
+    async def iter_deleting_project_ids(self) -> AsyncIterator[str]:
+        filter_obj = (
+            MongoFilter()
+            .equals("status", "deleting")
+            .fields(["_id"])
+            .build_with_projection()
+            )
+        async for data in self.mongo_client.find_iter(filter_obj, collection_name="projects"):
+            yield str(data["_id"])
@@ -1,40 +1,93 @@
-from datetime import datetime
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Optional
 
 from bson import ObjectId
 
+from better_assistant.exceptions import DataNotFoundException, DuplicateDataException
 from better_assistant.models import MongoFilter, MongoUpdate, Prompt
+from better_assistant.services.revision import PromptRevisionService
 from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.tracing import traced
 
 
 class PromptService:
     def __init__(self, mongo_client: MongoClientWrapper):
         self.mongo_client = mongo_client
+        self.revision_service = PromptRevisionService(mongo_client)
 
-    async def get_prompts(self, project_id: str) -> List[Dict[str, any]]:
+    def _prompts_filter(self, project_id: str, limit: Optional[int], after: Optional[str]) -> dict:
         filter_obj = (
             MongoFilter()
             .equals("project_id", project_id)
             .fields(["prompt_version", "prompt_content", "updated_at", "_id"])
-            .build_with_projection()
             )
-        result: List[Dict[str, any]] = await self.mongo_client.find(filter_obj, collection_name="prompts")
-
-        for data in result:
-            for key, value in data.items():
-                if isinstance(value, datetime):
-                    data[key] = value.strftime("%Y-%m-%d %H:%M:%S")
-                if isinstance(value, ObjectId):
-                    data[key] = value.__str__()
+        if limit or after:
+            filter_obj.sort("_id", 1).limit(limit)
+        if after:
+            filter_obj.greater_than("_id", ObjectId(after))
+        return filter_obj.build_with_projection()
+
+    @traced()
+    async def get_prompts(
+        self, project_id: str, limit: Optional[int] = None, after: Optional[str] = None
+    ) -> List[Dict[str, any]]:
+        filter_obj = self._prompts_filter(project_id, limit, after)
+        try:
+            result: List[Dict[str, any]] = await self.mongo_client.find(filter_obj, collection_name="prompts")
+        except DataNotFoundException:
+            if after:
+                return []
+            raise
         return result
 
+    async def iter_prompts(self, project_id: str) -> AsyncIterator[Dict[str, any]]:
+        filter_obj = self._prompts_filter(project_id, None, None)
+        async for data in self.mongo_client.find_iter(filter_obj, collection_name="prompts"):
+            yield data
+
+    @traced()
+    async def get_prompt(self, prompt_id: str) -> dict:
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(prompt_id))
+            .fields(["project_id", "prompt_version", "prompt_content", "updated_at"])
+            .build_with_projection()
+            )
+        return (await self.mongo_client.find(filter_obj, collection_name="prompts"))[0]
+
+    @traced()
+    async def get_prompt_by_version(self, project_id: str, prompt_version: str) -> dict:
+        filter_obj = (
+            MongoFilter()
+            .equals("project_id", project_id)
+            .equals("prompt_version", prompt_version)
+            .fields(["_id", "project_id", "prompt_version", "prompt_content", "updated_at"])
+            .build_with_projection()
+            )
+        return (await self.mongo_client.find(filter_obj, collection_name="prompts"))[0]
+
+    @traced()
     async def create_prompt(self, prompt: Prompt) -> ObjectId:
-        return await self.mongo_client.insert(prompt, "prompts")
+        prompt_id = await self.mongo_client.insert(prompt, "prompts")
+        await self.revision_service.record(str(prompt_id), prompt.project_id, prompt.prompt_content)
+        return prompt_id
 
+    @traced()
     async def update_prompt(self, prompt_id: str, prompt: Prompt) -> bool:
+        """
+        읽은 내용이 그대로일 때만 수정하고, 수정된 뒤 새 내용을 revision으로 저장
+        읽은 뒤 다른 요청이 먼저 수정했으면 DuplicateDataException
+        """
         filter_obj = (
             MongoFilter()
             .equals("_id", ObjectId(prompt_id))
+            .fields(["project_id", "prompt_content"])
+            .build_with_projection()
+            )
+        current = (await self.mongo_client.find(filter_obj, collection_name="prompts"))[0]
+        guard = (
+            MongoFilter()
+            .equals("_id", ObjectId(prompt_id))
+            .equals("prompt_content", current["prompt_content"])
             .build()
             )
         update_obj = (
@@ -43,12 +96,29 @@ class PromptService:
             .set_updated_at()
             .build()
         )
-        return await self.mongo_client.update(filter_obj, update_obj, collection_name="prompts")
+        try:
+            await self.mongo_client.update(guard, update_obj, collection_name="prompts")
+        except DataNotFoundException:
+            # 삭제된 경우면 여기서 DataNotFoundException
+            await self.mongo_client.find(filter_obj, collection_name="prompts")
+            raise DuplicateDataException(f"Prompt {prompt_id} was updated concurrently")
+
+        try:
+            await self.revision_service.record(
+                prompt_id, current["project_id"], prompt.prompt_content, previous_content=current["prompt_content"]
+            )
+        except DuplicateDataException:
+            # 직전 수정의 revision 저장과 번호가 겹친 경우, head를 다시 읽어 한 번 더 저장
+            await self.revision_service.record(prompt_id, current["project_id"], prompt.prompt_content)
+        return True
 
+    @traced()
     async def delete_prompt(self, prompt_id: str) -> bool:
         filter_obj = (
             MongoFilter()
             .equals("_id", ObjectId(prompt_id))
             .build()
             )
-        return await self.mongo_client.delete(filter_obj, collection_name="prompts")
+        deleted = await self.mongo_client.delete(filter_obj, collection_name="prompts")
+        await self.revision_service.delete_revisions(prompt_id)
+        return deleted
@@ -0,0 +1,258 @@
+import asyncio
+import difflib
+import hashlib
+import os
+import zlib
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from better_assistant.exceptions import DataNotFoundException, DuplicateDataException
+from better_assistant.models import MongoFilter, MongoUpdate, PromptRevision
+from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.cache import TTLCache
+from better_assistant.utils.delta import apply_delta, decode_delta, encode_delta, make_delta
+from better_assistant.utils.tracing import traced
+
+REVISION_FIELDS = ["_id", "prompt_id", "revision", "parent_id", "content_hash", "size", "created_at"]
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class PromptRevisionService:
+    """
+    프롬프트 수정 이력을 변경 불가능한 revision으로 저장
+    - prompt_revisions: revision마다 1건, parent_id로 이전 revision을 가리키고 내용은 hash로만 참조
+    - prompt_blobs: 프로젝트 안에서 (project_id, hash)로 내용 1건만 저장해 같은 내용은 중복 저장하지 않음
+    - PROMPT_DELTA_MIN_BYTES 이상인 내용은 zlib으로 압축하고, 이전 revision 기준 줄 단위 delta가 더 작으면 delta로 저장
+    - delta chain은 PROMPT_DELTA_MAX_CHAIN개까지만 이어지고, revision에 chain을 함께 저장해 어떤 revision이든
+      blob 조회 1번으로 복원
+    """
+
+    def __init__(self, mongo_client: MongoClientWrapper):
+        self.mongo_client = mongo_client
+        self.delta_min_bytes = int(os.getenv("PROMPT_DELTA_MIN_BYTES", "1024"))
+        self.max_chain = int(os.getenv("PROMPT_DELTA_MAX_CHAIN", "10"))
+        # blob 내용은 바뀌지 않으므로 TTL 없이 크기로만 제한
+        self.cache = TTLCache(
+            max_entries=int(os.getenv("PROMPT_REVISION_CACHE_MAX_ENTRIES", "1000")),
+            ttl=float("inf"),
+            max_bytes=int(os.getenv("PROMPT_REVISION_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            sizeof=len,
+        )
+
+    @traced()
+    async def record(
+        self, prompt_id: str, project_id: str, content: str, previous_content: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        새 revision을 저장하고 반환, 마지막 revision과 내용이 같으면 새로 만들지 않고 마지막 revision을 반환
+
+        이력이 없는 기존 프롬프트라면 previous_content를 먼저 1번 revision으로 저장
+        동시에 같은 프롬프트를 수정해 revision 번호가 겹치면 DuplicateDataException
+        """
+        head = await self._head(prompt_id)
+        if head is None and previous_content is not None and previous_content != content:
+            head = await self._insert(prompt_id, project_id, previous_content, None)
+
+        digest = content_hash(content)
+        if head is not None and head["content_hash"] == digest:
+            return head
+        return await self._insert(prompt_id, project_id, content, head)
+
+    @traced()
+    async def get_revisions(
+        self, prompt_id: str, limit: Optional[int] = None, after: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """revision 번호 순으로 반환, after는 이전 페이지의 마지막 revision 번호"""
+        filter_obj = (
+            MongoFilter()
+            .equals("prompt_id", prompt_id)
+            .fields(REVISION_FIELDS)
+            .sort("revision", 1)
+            .limit(limit)
+            )
+        if after:
+            filter_obj.greater_than("revision", after)
+        try:
+            return await self.mongo_client.find(filter_obj.build_with_projection(), collection_name="prompt_revisions")
+        except DataNotFoundException:
+            if after:
+                return []
+            if not await self._backfill(prompt_id):
+                raise
+        return await self.mongo_client.find(filter_obj.build_with_projection(), collection_name="prompt_revisions")
+
+    @traced()
+    async def get_revision(self, prompt_id: str, revision: int) -> Dict[str, Any]:
+        """revision 정보와 복원한 prompt_content 반환"""
+        data = await self._find_revision(prompt_id, revision)
+        content = await self._content(data.pop("project_id"), data.pop("chain"))
+        return {**data, "prompt_content": content}
+
+    @traced()
+    async def diff(self, prompt_id: str, from_revision: int, to_revision: int, context: int = 3) -> Dict[str, Any]:
+        """두 revision 내용의 unified diff 반환"""
+        old, new = await asyncio.gather(
+            self.get_revision(prompt_id, from_revision), self.get_revision(prompt_id, to_revision)
+        )
+        lines = difflib.unified_diff(
+            old["prompt_content"].splitlines(keepends=True),
+            new["prompt_content"].splitlines(keepends=True),
+            fromfile=f"revision {from_revision}",
+            tofile=f"revision {to_revision}",
+            n=context,
+        )
+        return {
+            "from_revision": from_revision,
+            "to_revision": to_revision,
+            "identical": old["content_hash"] == new["content_hash"],
+            "diff": "".join(line if line.endswith("\n") else line + "\n" for line in lines),
+        }
+
+    @traced()
+    async def delete_revisions(self, prompt_id: str) -> int:
+        """프롬프트의 revision 삭제, blob은 같은 프로젝트의 다른 프롬프트와 공유될 수 있어 프로젝트 삭제 시 함께 삭제"""
+        return await self.mongo_client.delete_many(
+            MongoFilter().equals("prompt_id", prompt_id).build(), collection_name="prompt_revisions"
+        )
+
+    async def _head(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        filter_obj = (
+            MongoFilter()
+            .equals("prompt_id", prompt_id)
+            .fields(REVISION_FIELDS + ["chain"])
+            .sort("revision", -1)
+            .limit(1)
+            .build_with_projection()
+            )
+        try:
+            return (await self.mongo_client.find(filter_obj, collection_name="prompt_revisions"))[0]
+        except DataNotFoundException:
+            return None
+
+    async def _find_revision(self, prompt_id: str, revision: int) -> Dict[str, Any]:
+        filter_obj = (
+            MongoFilter()
+            .equals("prompt_id", prompt_id)
+            .equals("revision", revision)
+            .fields(REVISION_FIELDS + ["project_id", "chain"])
+            .build_with_projection()
+            )
+        try:
+            return (await self.mongo_client.find(filter_obj, collection_name="prompt_revisions"))[0]
+        except DataNotFoundException:
+            if revision != 1 or not await self._backfill(prompt_id):
+                raise
+        return (await self.mongo_client.find(filter_obj, collection_name="prompt_revisions"))[0]
+
+    async def _backfill(self, prompt_id: str) -> bool:
+        """이력 기능 이전에 만들어졌거나 가져온 프롬프트라면 현재 내용을 1번 revision으로 저장"""
+        if await self._head(prompt_id) is not None:
+            return False
+        filter_obj = (
+            MongoFilter()
+            .equals("_id", ObjectId(prompt_id))
+            .fields(["project_id", "prompt_content"])
+            .build_with_projection()
+            )
+        # 프롬프트가 없으면 DataNotFoundException
+        prompt = (await self.mongo_client.find(filter_obj, collection_name="prompts"))[0]
+        try:
+            await self.record(prompt_id, prompt["project_id"], prompt["prompt_content"])
+        except DuplicateDataException:
+            # 동시에 다른 요청이 먼저 저장한 경우
+            pass
+        return True
+
+    async def _insert(
+        self, prompt_id: str, project_id: str, content: str, head: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        chain = await self._store_blob(project_id, content, head)
+        revision = PromptRevision(
+            prompt_id=prompt_id,
+            project_id=project_id,
+            revision=head["revision"] + 1 if head else 1,
+            parent_id=str(head["_id"]) if head else None,
+            content_hash=chain[0],
+            chain=chain,
+            size=len(content.encode("utf-8")),
+        )
+        # (prompt_id, revision) unique index로 동시 수정 시 DuplicateDataException
+        revision_id = await self.mongo_client.insert(revision, "prompt_revisions")
+        return {"_id": revision_id, **revision.to_dict()}
+
+    async def _store_blob(self, project_id: str, content: str, head: Optional[Dict[str, Any]]) -> List[str]:
+        """내용을 blob으로 저장하고 복원에 필요한 hash chain 반환"""
+        digest = content_hash(content)
+        try:
+            return await self._blob_chain(project_id, digest)
+        except DataNotFoundException:
+            pass
+
+        raw = content.encode("utf-8")
+        update_obj = MongoUpdate().set_on_insert("size", len(raw))
+        if len(raw) < self.delta_min_bytes:
+            update_obj.set_on_insert("encoding", "text").set_on_insert("data", content).set_on_insert("chain", [digest])
+        else:
+            compressed = zlib.compress(raw)
+            delta = None
+            if head is not None and len(head["chain"]) < self.max_chain:
+                base = await self._content(project_id, head["chain"])
+                delta = encode_delta(make_delta(base, content))
+            if delta is not None and len(delta) < len(compressed):
+                update_obj.set_on_insert("encoding", "delta").set_on_insert("data", delta)
+                update_obj.set_on_insert("base", head["content_hash"]).set_on_insert("chain", [digest] + head["chain"])
+            else:
+                update_obj.set_on_insert("encoding", "zlib").set_on_insert("data", compressed)
+                update_obj.set_on_insert("chain", [digest])
+        self.cache.set((project_id, digest), content)
+
+        # 동시에 같은 내용을 저장하면 먼저 저장된 blob을 그대로 사용
+        filter_obj = MongoFilter().equals("project_id", project_id).equals("hash", digest).build()
+        await self.mongo_client.upsert(filter_obj, update_obj.build(), collection_name="prompt_blobs")
+        return await self._blob_chain(project_id, digest)
+
+    async def _blob_chain(self, project_id: str, digest: str) -> List[str]:
+        filter_obj = (
+            MongoFilter()
+            .equals("project_id", project_id)
+            .equals("hash", digest)
+            .fields(["chain"])
+            .build_with_projection()
+            )
+        return (await self.mongo_client.find(filter_obj, collection_name="prompt_blobs"))[0]["chain"]
+
+    async def _content(self, project_id: str, chain: List[str]) -> str:
+        """chain[0] blob의 내용 복원, 캐시에 있는 blob부터는 조회하지 않음"""
+        content = None
+        missing: List[str] = []
+        for digest in chain:
+            content = self.cache.get((project_id, digest))
+            if content is not None:
+                break
+            missing.append(digest)
+        if not missing:
+            return content
+
+        filter_obj = (
+            MongoFilter()
+            .equals("project_id", project_id)
+            .in_list("hash", missing)
+            .fields(["hash", "encoding", "data"])
+            .build_with_projection()
+            )
+        found = await self.mongo_client.find(filter_obj, collection_name="prompt_blobs")
+        blobs = {blob["hash"]: blob for blob in found}
+        for digest in reversed(missing):
+            blob = blobs[digest]
+            if blob["encoding"] == "text":
+                content = blob["data"]
+            elif blob["encoding"] == "zlib":
+                content = zlib.decompress(blob["data"]).decode("utf-8")
+            else:
+                content = apply_delta(content, decode_delta(blob["data"]))
+            self.cache.set((project_id, digest), content)
+        return content
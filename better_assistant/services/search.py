@@ -0,0 +1,169 @@
+import asyncio
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from bson import ObjectId
+
+from better_assistant.exceptions import DataNotFoundException, InvalidDataException
+from better_assistant.models import MongoFilter
+from better_assistant.services.chat import ChatService
+from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.highlight import compile_terms, highlight, query_terms
+from better_assistant.utils.tracing import traced
+
+SEARCH_TYPES = ("prompts", "dialogs")
+# 대화 1건에서 보여줄 최대 highlight 수 (제목 + 메시지)
+MAX_DIALOG_HIGHLIGHTS = 3
+
+
+class SearchService:
+    """
+    프로젝트 안의 프롬프트와 대화 내용을 text index로 검색
+    - 관련도(textScore) 순으로 정렬하고 offset/limit으로 페이지를 나눔, offset+limit은 SEARCH_MAX_RESULTS까지
+    - 프롬프트와 대화는 각각 offset+limit개까지 조회한 뒤 관련도로 합쳐서 자름
+    - 대화는 저장 방식에 따라 dialogs(embedded) 또는 dialog_messages(bucketed)의 text index를 사용
+    """
+
+    def __init__(self, mongo_client: MongoClientWrapper, chat_service: ChatService):
+        self.mongo_client = mongo_client
+        self.chat_service = chat_service
+        self.max_results = int(os.getenv("SEARCH_MAX_RESULTS", "1000"))
+
+    @traced()
+    async def search(
+        self, project_id: str, query: str, types: Sequence[str] = SEARCH_TYPES, limit: int = 20, offset: int = 0
+    ) -> Dict[str, Any]:
+        """검색 결과 한 페이지와 다음 페이지의 offset(없으면 None) 반환"""
+        if offset + limit > self.max_results:
+            raise InvalidDataException(f"offset + limit must be at most {self.max_results}")
+        pattern = compile_terms(query_terms(query))
+        # 1개 더 조회해서 다음 페이지가 있는지 확인
+        fetch = offset + limit + 1
+
+        searches = []
+        if "prompts" in types:
+            searches.append(self._search_prompts(project_id, query, fetch, pattern))
+        if "dialogs" in types:
+            searches.append(self._search_dialogs(project_id, query, fetch))
+        hits = [hit for result in await asyncio.gather(*searches) for hit in result]
+        hits.sort(key=lambda hit: hit["score"], reverse=True)
+
+        page = hits[offset:offset + limit]
+        dialogs = [hit for hit in page if hit["type"] == "dialog"]
+        if dialogs:
+            await self._highlight_dialogs(project_id, dialogs, query, pattern)
+        return {"results": page, "next_offset": offset + limit if len(hits) > offset + limit else None}
+
+    async def _find(self, filter_obj: MongoFilter, collection_name: str) -> List[Dict[str, Any]]:
+        try:
+            return await self.mongo_client.find(filter_obj.build_with_projection(), collection_name=collection_name)
+        except DataNotFoundException:
+            return []
+
+    async def _search_prompts(
+        self, project_id: str, query: str, fetch: int, pattern: Optional[re.Pattern]
+    ) -> List[Dict[str, Any]]:
+        filter_obj = (
+            MongoFilter()
+            .equals("project_id", project_id)
+            .text_search(query)
+            .fields(["_id", "prompt_version", "prompt_content"])
+            .text_score()
+            .limit(fetch)
+            )
+        return [
+            {
+                "type": "prompt",
+                "prompt_id": str(prompt["_id"]),
+                "prompt_version": prompt["prompt_version"],
+                "score": prompt["score"],
+                "highlights": [
+                    {"field": "prompt_content", **snippet} for snippet in highlight(prompt["prompt_content"], pattern)
+                ],
+            }
+            for prompt in await self._find(filter_obj, "prompts")
+        ]
+
+    async def _search_dialogs(self, project_id: str, query: str, fetch: int) -> List[Dict[str, Any]]:
+        if not self.chat_service.bucketed:
+            filter_obj = (
+                MongoFilter()
+                .equals("project_id", project_id)
+                .text_search(query)
+                .fields(["_id", "dialog_title"])
+                .text_score()
+                .limit(fetch)
+                )
+            return [
+                {
+                    "type": "dialog",
+                    "dialog_id": str(dialog["_id"]),
+                    "dialog_title": dialog["dialog_title"],
+                    "score": dialog["score"],
+                }
+                for dialog in await self._find(filter_obj, "dialogs")
+            ]
+
+        # 같은 대화의 여러 bucket이 걸리면 가장 높은 관련도로 대화 1건만 남긴 뒤 잘라야 다음 페이지 여부가 맞음
+        pipeline = [
+            {"$match": MongoFilter().equals("project_id", project_id).text_search(query).build()},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            {"$group": {"_id": "$dialog_id", "score": {"$max": "$score"}}},
+            {"$sort": {"score": -1}},
+            {"$limit": fetch},
+        ]
+        try:
+            scores = await self.mongo_client.aggregate(pipeline, collection_name="dialog_messages")
+        except DataNotFoundException:
+            return []
+        filter_obj = (
+            MongoFilter()
+            .in_list("_id", [ObjectId(score["_id"]) for score in scores])
+            .fields(["_id", "dialog_title"])
+            )
+        titles = {str(dialog["_id"]): dialog["dialog_title"] for dialog in await self._find(filter_obj, "dialogs")}
+        return [
+            {"type": "dialog", "dialog_id": score["_id"], "dialog_title": titles[score["_id"]], "score": score["score"]}
+            for score in scores
+            if score["_id"] in titles
+        ]
+
+    async def _highlight_dialogs(
+        self, project_id: str, hits: List[Dict[str, Any]], query: str, pattern: Optional[re.Pattern]
+    ):
+        """현재 페이지의 대화만 메시지를 읽어 검색어가 나온 메시지를 강조"""
+        msgs_by_dialog: Dict[str, List[Dict[str, Any]]] = {hit["dialog_id"]: [] for hit in hits}
+        if self.chat_service.bucketed:
+            # text index 앞의 project_id는 일치 조건이 있어야 사용 가능
+            filter_obj = (
+                MongoFilter()
+                .equals("project_id", project_id)
+                .in_list("dialog_id", list(msgs_by_dialog))
+                .text_search(query)
+                .fields(["dialog_id", "messages"])
+                )
+            for bucket in await self._find(filter_obj, "dialog_messages"):
+                msgs_by_dialog[bucket["dialog_id"]].extend(bucket["messages"])
+        else:
+            filter_obj = (
+                MongoFilter()
+                .in_list("_id", [ObjectId(dialog_id) for dialog_id in msgs_by_dialog])
+                .fields(["_id", "dialog_content"])
+                )
+            for dialog in await self._find(filter_obj, "dialogs"):
+                msgs_by_dialog[str(dialog["_id"])] = [
+                    {**msg, "index": index} for index, msg in enumerate(dialog.get("dialog_content", []))
+                ]
+
+        for hit in hits:
+            highlights = [{"field": "dialog_title", **snippet} for snippet in highlight(hit["dialog_title"], pattern)]
+            for msg in sorted(msgs_by_dialog[hit["dialog_id"]], key=lambda msg: msg["index"]):
+                snippets = highlight(msg["content"], pattern, max_snippets=1)
+                if snippets:
+                    highlights.append(
+                        {"field": "dialog_content", "index": msg["index"], "role": msg["role"], **snippets[0]}
+                    )
+                    if len(highlights) >= MAX_DIALOG_HIGHLIGHTS:
+                        break
+            hit["highlights"] = highlights
@@ -0,0 +1,230 @@
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pydantic import ValidationError
+
+from better_assistant.exceptions import InvalidDataException
+from better_assistant.models import Dialog, MongoFilter, Project, Prompt
+from better_assistant.services.cache import CachedPromptService
+from better_assistant.services.chat import ChatService
+from better_assistant.services.project import ProjectService
+from better_assistant.services.prompt import PromptService
+from better_assistant.utils import MongoClientWrapper
+from better_assistant.utils.ndjson import iter_lines
+from better_assistant.utils.tracing import traced
+
+# bucketed 저장 방식에서 대화 메시지를 한 번에 조회할 대화 수
+EXPORT_DIALOG_CHUNK = 200
+MAX_REPORTED_ERRORS = 20
+
+
+class ProjectTransferService:
+    """
+    프로젝트를 프롬프트, 대화와 함께 NDJSON으로 내보내고 가져오기
+    - 한 줄에 문서 1개, type 필드(project/prompt/dialog)로 구분하며 첫 줄은 project
+    - 내보낼 때는 cursor에서 읽는 대로 흘려보내고, 가져올 때는 IMPORT_BATCH_SIZE개씩 insert_many(ordered=False)
+    - 대화는 저장 방식(DIALOG_STORAGE)과 관계없이 dialog_content 배열로 주고받음
+    """
+
+    def __init__(
+        self,
+        mongo_client: MongoClientWrapper,
+        project_service: ProjectService,
+        prompt_service: PromptService,
+        chat_service: ChatService,
+    ):
+        self.mongo_client = mongo_client
+        self.project_service = project_service
+        self.prompt_service = prompt_service
+        self.chat_service = chat_service
+        self.batch_size = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+        self.max_line_bytes = int(os.getenv("IMPORT_MAX_LINE_BYTES", str(16 * 1024 * 1024)))
+
+    async def export_project(self, project_id: str, project: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """project(get_project 결과)와 프롬프트, 대화를 _id 순서로 반환"""
+        yield {"type": "project", **project}
+
+        filter_obj = (
+            MongoFilter()
+            .equals("project_id", project_id)
+            .fields(["prompt_version", "prompt_content", "created_at", "updated_at"])
+            .sort("_id", 1)
+            .build_with_projection()
+            )
+        async for prompt in self.mongo_client.find_iter(filter_obj, collection_name="prompts"):
+            yield {"type": "prompt", **prompt}
+
+        filter_obj = (
+            MongoFilter()
+            .equals("project_id", project_id)
+            .fields(["dialog_title", "created_at", "updated_at"])
+            .sort("_id", 1)
+            )
+        if not self.chat_service.bucketed:
+            filter_obj.fields(["dialog_content"])
+            async for dialog in self.mongo_client.find_iter(
+                filter_obj.build_with_projection(), collection_name="dialogs"
+            ):
+                yield {"type": "dialog", **dialog}
+            return
+
+        filter_obj.fields(["_id"])
+        chunk: List[Dict[str, Any]] = []
+        async for dialog in self.mongo_client.find_iter(filter_obj.build_with_projection(), collection_name="dialogs"):
+            chunk.append(dialog)
+            if len(chunk) >= EXPORT_DIALOG_CHUNK:
+                async for document in self._export_bucketed(chunk):
+                    yield document
+                chunk = []
+        async for document in self._export_bucketed(chunk):
+            yield document
+
+    async def _export_bucketed(self, dialogs: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        if not dialogs:
+            return
+        msgs_by_dialog: Dict[str, List[Dict[str, Any]]] = {str(dialog["_id"]): [] for dialog in dialogs}
+        filter_obj = (
+            MongoFilter()
+            .in_list("dialog_id", list(msgs_by_dialog))
+            .fields(["dialog_id", "messages"])
+            .sort("dialog_id", 1)
+            .sort("seq", 1)
+            .build_with_projection()
+            )
+        async for bucket in self.mongo_client.find_iter(filter_obj, collection_name="dialog_messages"):
+            msgs_by_dialog[bucket["dialog_id"]].extend(bucket["messages"])
+
+        for dialog in dialogs:
+            msgs = sorted(msgs_by_dialog[str(dialog.pop("_id"))], key=lambda msg: msg["index"])
+            yield {
+                "type": "dialog",
+                **dialog,
+                "dialog_content": [{"content": msg["content"], "role": msg["role"]} for msg in msgs],
+            }
+
+    @traced()
+    async def import_project(self, chunks: AsyncIterator[bytes], project_title: Optional[str] = None) -> Dict[str, Any]:
+        """
+        NDJSON(gzip 가능) upload를 새 프로젝트로 가져오기
+
+        첫 줄이 project가 아니거나 잘못되었으면 InvalidDataException, 이후 잘못된 줄은 건너뛰고 failed로 집계
+        중간에 연결이 끊기면 그때까지 저장된 프로젝트는 남음
+        가져오는 도중 프로젝트 삭제가 시작되면 더 저장하지 않고 DataNotFoundException
+
+        Args:
+            project_title (str): 지정하면 파일의 project_title 대신 사용 (같은 이름의 프로젝트가 있을 때)
+        """
+        result: Dict[str, Any] = {"project_id": None, "prompts": 0, "dialogs": 0, "failed": 0, "errors": []}
+        prompts: List[Dict[str, Any]] = []
+        dialogs: List[Dict[str, Any]] = []
+        buckets: List[Dict[str, Any]] = []
+        project_id = None
+        line_number = 0
+
+        async for line in iter_lines(chunks, self.max_line_bytes):
+            line_number += 1
+            if not line.strip():
+                continue
+            if project_id is None:
+                kind, data = self._parse_line(line, line_number)
+                if kind != "project":
+                    raise InvalidDataException(f"Line {line_number}: first line must be a project")
+                if project_title:
+                    data["project_title"] = project_title
+                try:
+                    project = Project(**data)
+                except ValidationError as e:
+                    raise InvalidDataException(f"Line {line_number}: {str(e)}")
+                project_id = str(await self.project_service.create_project(project))
+                result["project_id"] = project_id
+                continue
+
+            try:
+                kind, data = self._parse_line(line, line_number)
+                data["project_id"] = project_id
+                if kind == "prompt":
+                    prompts.append(Prompt(**data).to_dict())
+                elif kind == "dialog":
+                    self._add_dialog(Dialog(**data), dialogs, buckets)
+                else:
+                    raise InvalidDataException(f"Line {line_number}: unknown type {kind!r}")
+            except (ValidationError, InvalidDataException) as e:
+                self._record_error(result, line_number, str(e))
+
+            if len(prompts) >= self.batch_size:
+                await self._flush_prompts(prompts, result)
+            if len(dialogs) >= self.batch_size or len(buckets) >= self.batch_size:
+                await self._flush_dialogs(dialogs, buckets, result)
+
+        if project_id is None:
+            raise InvalidDataException("Empty import")
+        if prompts:
+            await self._flush_prompts(prompts, result)
+        if dialogs:
+            await self._flush_dialogs(dialogs, buckets, result)
+        if isinstance(self.prompt_service, CachedPromptService):
+            self.prompt_service.invalidate(project_id)
+        return result
+
+    def _parse_line(self, line: bytes, line_number: int) -> Tuple[Optional[str], Dict[str, Any]]:
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            raise InvalidDataException(f"Line {line_number}: invalid JSON ({str(e)})")
+        if not isinstance(data, dict):
+            raise InvalidDataException(f"Line {line_number}: expected a JSON object")
+        # 가져온 문서는 항상 새 _id로 저장
+        data.pop("_id", None)
+        return data.pop("type", None), data
+
+    def _add_dialog(self, dialog: Dialog, dialogs: List[Dict[str, Any]], buckets: List[Dict[str, Any]]):
+        document = dialog.to_dict()
+        if not self.chat_service.bucketed:
+            dialogs.append(document)
+            return
+
+        # bucket이 대화를 가리킬 수 있도록 _id를 미리 정함
+        dialog_id = ObjectId()
+        msgs = document.pop("dialog_content")
+        bucket_size = self.chat_service.bucket_size
+        dialogs.append({**document, "_id": dialog_id, "dialog_content": [], "message_count": len(msgs)})
+        for seq, start in enumerate(range(0, len(msgs), bucket_size)):
+            bucket_msgs = [
+                {"content": msg["content"], "role": msg["role"], "index": index}
+                for index, msg in enumerate(msgs[start:start + bucket_size], start=start)
+            ]
+            buckets.append(
+                {"dialog_id": str(dialog_id), "project_id": document["project_id"], "seq": seq, "messages": bucket_msgs}
+            )
+
+    async def _flush_prompts(self, prompts: List[Dict[str, Any]], result: Dict[str, Any]):
+        # deleting인 프로젝트면 get_project에서 DataNotFoundException
+        await self.project_service.get_project(result["project_id"])
+        failed = await self.mongo_client.insert_many(prompts, collection_name="prompts")
+        for index in failed:
+            self._record_error(result, None, f"Failed to insert prompt version: {prompts[index]['prompt_version']}")
+        result["prompts"] += len(prompts) - len(failed)
+        prompts.clear()
+
+    async def _flush_dialogs(
+        self, dialogs: List[Dict[str, Any]], buckets: List[Dict[str, Any]], result: Dict[str, Any]
+    ):
+        await self.project_service.get_project(result["project_id"])
+        failed = await self.mongo_client.insert_many(dialogs, collection_name="dialogs")
+        for index in failed:
+            self._record_error(result, None, f"Failed to insert dialog: {dialogs[index]['dialog_title']}")
+        result["dialogs"] += len(dialogs) - len(failed)
+
+        failed_ids = {str(dialogs[index].get("_id")) for index in failed}
+        stored_buckets = [bucket for bucket in buckets if bucket["dialog_id"] not in failed_ids]
+        if stored_buckets and await self.mongo_client.insert_many(stored_buckets, collection_name="dialog_messages"):
+            self._record_error(result, None, "Failed to insert some dialog message buckets")
+        dialogs.clear()
+        buckets.clear()
+
+    def _record_error(self, result: Dict[str, Any], line_number: Optional[int], error: str):
+        result["failed"] += 1
+        if len(result["errors"]) < MAX_REPORTED_ERRORS:
+            result["errors"].append({"line": line_number, "error": error})
@@ -1,7 +1,15 @@
 from datetime import timedelta, timezone
+from typing import Any, Dict, List, Optional
 
-from better_assistant.utils.mongo import MongoClientWrapper
+from better_assistant.utils.mongo import MongoClientWrapper, close_mongo_client, get_mongo_client
 
 
 def get_kst_timezone() -> timezone:
     return timezone(timedelta(hours=9), name="KST")
+
+
+def next_cursor(documents: List[Dict[str, Any]], limit: Optional[int]) -> Optional[str]:
+    """limit 만큼 채워진 페이지라면 마지막 문서의 _id를 다음 페이지의 after 토큰으로 반환"""
+    if not limit or len(documents) < limit:
+        return None
+    return str(documents[-1]["_id"])
@@ -0,0 +1,34 @@
+import json
+import zlib
+from difflib import SequenceMatcher
+from typing import List, Union
+
+# delta는 op 목록: [start, end]는 base의 줄 범위 복사, 문자열은 그대로 삽입
+DeltaOp = Union[List[int], str]
+
+
+def make_delta(base: str, target: str) -> List[DeltaOp]:
+    """target을 base 기준 줄 단위 delta로 표현"""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops: List[DeltaOp] = []
+    matcher = SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, base_start, base_end, target_start, target_end in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([base_start, base_end])
+        elif target_end > target_start:
+            ops.append("".join(target_lines[target_start:target_end]))
+    return ops
+
+
+def apply_delta(base: str, ops: List[DeltaOp]) -> str:
+    base_lines = base.splitlines(keepends=True)
+    return "".join("".join(base_lines[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+def encode_delta(ops: List[DeltaOp]) -> bytes:
+    return zlib.compress(json.dumps(ops, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_delta(data: bytes) -> List[DeltaOp]:
+    return json.loads(zlib.decompress(data))
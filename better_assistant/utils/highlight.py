@@ -0,0 +1,66 @@
+import re
+from typing import Any, Dict, List, Optional
+
+# text index 검색어 문법: "구문"은 그대로, -단어는 제외 조건이라 강조하지 않음
+_QUERY_TOKEN = re.compile(r'-?"[^"]*"|\S+')
+
+
+def query_terms(query: str) -> List[str]:
+    """검색어에서 강조할 단어/구문 목록 추출"""
+    terms = []
+    for token in _QUERY_TOKEN.findall(query):
+        if token.startswith("-"):
+            continue
+        term = token.strip('"').strip()
+        if term and term.lower() not in (existing.lower() for existing in terms):
+            terms.append(term)
+    # 긴 구문을 먼저 찾아 짧은 단어가 구문 일부만 강조하지 않게 함
+    return sorted(terms, key=len, reverse=True)
+
+
+def compile_terms(terms: List[str]) -> Optional[re.Pattern]:
+    if not terms:
+        return None
+    # text index는 단어 단위로 검색하므로 단어 일부에 걸친 위치는 강조하지 않음
+    return re.compile(r"(?<!\w)(?:" + "|".join(re.escape(term) for term in terms) + r")(?!\w)", re.IGNORECASE)
+
+
+def highlight(text: str, pattern: Optional[re.Pattern], context: int = 60, max_snippets: int = 3) -> List[Dict[str, Any]]:
+    """
+    검색어가 나온 부분 앞뒤 context 글자를 snippet으로 잘라 반환
+
+    matches는 snippet 안에서 검색어 위치 [start, end) 목록, client가 원하는 방식으로 강조
+    """
+    if pattern is None or not text:
+        return []
+
+    snippets: List[Dict[str, Any]] = []
+    window_start = window_end = None
+    window_matches: List[List[int]] = []
+
+    def close_window():
+        snippet = text[window_start:window_end]
+        snippets.append({
+            "snippet": snippet,
+            "matches": [[start - window_start, end - window_start] for start, end in window_matches],
+            "truncated_start": window_start > 0,
+            "truncated_end": window_end < len(text),
+        })
+
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        if window_end is not None and start - context <= window_end:
+            # 앞 snippet과 겹치면 이어 붙임
+            window_end = min(len(text), end + context)
+            window_matches.append([start, end])
+            continue
+        if window_end is not None:
+            close_window()
+            if len(snippets) >= max_snippets:
+                return snippets
+        window_start, window_end = max(0, start - context), min(len(text), end + context)
+        window_matches = [[start, end]]
+
+    if window_end is not None:
+        close_window()
+    return snippets
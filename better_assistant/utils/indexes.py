@@ -0,0 +1,198 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from bson import ObjectId
+from loguru import logger
+from pymongo.errors import OperationFailure
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    keys: Tuple[Tuple[str, Any], ...]
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.options.get("name") or "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+
+# 실제 조회 형태에 맞춘 collection별 index 선언
+# - 검색: project_id 일치 + text index (collection당 1개, 한국어 형태소 분석이 없으므로 default_language none)
+# - 목록 조회: project_id 일치 + _id keyset 정렬/범위
+# - 단건 조회: _id (+ project_id)
+INDEXES: Dict[str, List[IndexSpec]] = {
+    "projects": [
+        IndexSpec((("project_title", 1),), {"unique": True}),
+        # 재시작 시 삭제를 이어갈 프로젝트 조회용, 삭제 중인 문서만 포함
+        IndexSpec((("status", 1),), {"partialFilterExpression": {"status": "deleting"}}),
+    ],
+    "prompts": [
+        IndexSpec((("project_id", 1), ("_id", 1))),
+        IndexSpec((("project_id", 1), ("prompt_version", 1)), {"unique": True}),
+        IndexSpec((("project_id", 1), ("prompt_content", "text")), {"default_language": "none"}),
+    ],
+    "prompt_revisions": [
+        IndexSpec((("prompt_id", 1), ("revision", 1)), {"unique": True}),
+        IndexSpec((("project_id", 1), ("_id", 1))),
+    ],
+    "prompt_blobs": [
+        IndexSpec((("project_id", 1), ("hash", 1)), {"unique": True}),
+    ],
+    "dialogs": [
+        IndexSpec((("project_id", 1), ("_id", 1))),
+        IndexSpec(
+            (("project_id", 1), ("dialog_title", "text"), ("dialog_content.content", "text")),
+            {"default_language": "none"},
+        ),
+    ],
+    "dialog_messages": [
+        IndexSpec((("dialog_id", 1), ("seq", 1)), {"unique": True}),
+        IndexSpec((("project_id", 1), ("messages.content", "text")), {"default_language": "none"}),
+    ],
+    "rate_limits": [
+        IndexSpec((("expires_at", 1),), {"expireAfterSeconds": 0}),
+    ],
+    "generate_cache": [
+        IndexSpec((("expires_at", 1),), {"expireAfterSeconds": 0}),
+    ],
+    "batch_results": [
+        IndexSpec((("job_id", 1), ("index", 1)), {"unique": True}),
+    ],
+}
+
+# 더 이상 어떤 조회에도 쓰이지 않아 쓰기 비용만 늘리는 index
+OBSOLETE_INDEXES: Dict[str, List[str]] = {
+    "prompts": ["prompt_version_1"],
+    "dialogs": ["dialog_title_1"],
+    # project_id 없이 만든 text index, collection당 text index는 1개라 새 index보다 먼저 제거
+    "dialog_messages": ["messages.content_text"],
+}
+
+# services/managers의 조회 형태 (값은 explain용 placeholder), tests/test_indexes.py가 모두 index를 타는지 확인
+# stream=true 전체 목록은 모든 문서를 읽는 것이 목적이라 제외
+_OID = ObjectId("000000000000000000000000")
+QUERY_SHAPES: List[Tuple[str, Dict[str, Any], List[Tuple[str, int]]]] = [
+    ("projects", {"project_title": ""}, []),
+    (
+        "projects",
+        {"project_title": {"$exists": True}, "status": {"$ne": "deleting"}, "_id": {"$gt": _OID}},
+        [("_id", 1)],
+    ),
+    ("projects", {"_id": _OID, "status": {"$ne": "deleting"}}, []),
+    ("projects", {"status": "deleting"}, []),
+    ("prompts", {"project_id": ""}, [("_id", 1)]),
+    ("prompts", {"project_id": "", "_id": {"$gt": _OID}}, [("_id", 1)]),
+    ("prompts", {"_id": _OID}, []),
+    ("prompts", {"project_id": "", "prompt_version": ""}, []),
+    ("prompts", {"project_id": "", "$text": {"$search": "query"}}, []),
+    ("prompt_revisions", {"prompt_id": ""}, [("revision", -1)]),
+    ("prompt_revisions", {"prompt_id": "", "revision": 1}, []),
+    ("prompt_revisions", {"prompt_id": "", "revision": {"$gt": 1}}, [("revision", 1)]),
+    ("prompt_revisions", {"project_id": ""}, []),
+    ("prompt_blobs", {"project_id": "", "hash": {"$in": [""]}}, []),
+    ("prompt_blobs", {"project_id": ""}, []),
+    ("dialogs", {"project_id": ""}, [("_id", 1)]),
+    ("dialogs", {"project_id": "", "_id": {"$gt": _OID}}, [("_id", 1)]),
+    ("dialogs", {"_id": _OID, "project_id": ""}, []),
+    ("dialogs", {"_id": {"$in": [_OID]}}, []),
+    ("dialogs", {"project_id": "", "$text": {"$search": "query"}}, []),
+    ("dialog_messages", {"dialog_id": "", "seq": {"$gte": 0, "$lte": 1}}, [("seq", 1)]),
+    ("dialog_messages", {"dialog_id": {"$in": [""]}}, [("dialog_id", 1), ("seq", 1)]),
+    ("dialog_messages", {"project_id": "", "$text": {"$search": "query"}}, []),
+    ("dialog_messages", {"project_id": "", "dialog_id": {"$in": [""]}, "$text": {"$search": "query"}}, []),
+    ("batch_jobs", {"_id": _OID}, []),
+    ("batch_results", {"job_id": ""}, [("index", 1)]),
+    ("generate_cache", {"_id": "", "expires_at": {"$gt": datetime(2000, 1, 1, tzinfo=timezone.utc)}}, []),
+    ("rate_limits", {"_id": ""}, []),
+]
+
+# 문서를 index로 찾는 plan stage (_id 단건 조회는 IDHACK/EXPRESS_IXSCAN, text 검색은 TEXT/TEXT_MATCH 아래 IXSCAN)
+INDEX_STAGES = ("IXSCAN", "IDHACK", "EXPRESS_IXSCAN", "TEXT")
+
+_COMPARED_OPTIONS = ("unique", "expireAfterSeconds", "sparse", "partialFilterExpression")
+
+
+def _stored_keys(spec: IndexSpec) -> Tuple[List[Tuple[str, Any]], Dict[str, int]]:
+    """text index는 text field들이 _fts/_ftsx key와 weights로 저장되므로 같은 형태로 변환"""
+    keys: List[Tuple[str, Any]] = []
+    weights: Dict[str, int] = {}
+    for key, direction in spec.keys:
+        if direction != "text":
+            keys.append((key, direction))
+            continue
+        if not weights:
+            keys.extend([("_fts", "text"), ("_ftsx", 1)])
+        weights[key] = 1
+    return keys, weights
+
+
+def _matches(spec: IndexSpec, existing: Dict[str, Any]) -> bool:
+    keys, weights = _stored_keys(spec)
+    if [tuple(key) for key in existing["key"]] != keys:
+        return False
+    if weights:
+        language = spec.options.get("default_language", "english")
+        if existing.get("weights") != weights or existing.get("default_language") != language:
+            return False
+    return all(existing.get(option) == spec.options.get(option) for option in _COMPARED_OPTIONS)
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """선언된 index를 생성/갱신하고 사용하지 않는 index를 제거, 여러 번 실행해도 결과가 같음"""
+    changes: Dict[str, List[str]] = {}
+    for collection_name, specs in INDEXES.items():
+        collection = db.get_collection(collection_name)
+        existing = await collection.index_information()
+
+        for name in OBSOLETE_INDEXES.get(collection_name, []):
+            if name in existing:
+                await collection.drop_index(name)
+                changes.setdefault(collection_name, []).append(f"dropped {name}")
+
+        for spec in specs:
+            current = existing.get(spec.name)
+            if current is not None and _matches(spec, current):
+                continue
+            try:
+                if current is not None:
+                    await collection.drop_index(spec.name)
+                await collection.create_index(list(spec.keys), name=spec.name, **spec.options)
+                changes.setdefault(collection_name, []).append(f"created {spec.name}")
+            except OperationFailure as e:
+                # 예: 기존 데이터에 중복이 있어 unique index를 만들 수 없는 경우
+                logger.error("Failed to create index {} on {}: {}", spec.name, collection_name, e)
+    return changes
+
+
+async def verify_query_plans(db) -> List[str]:
+    """QUERY_SHAPES를 explain해서 index를 쓰지 않는 조회를 반환"""
+    collection_scans = []
+    for collection_name, filter, sort in QUERY_SHAPES:
+        plan = await explain_query(db, collection_name, filter, sort)
+        # 아직 collection이 없으면 EOF plan이라 판단할 수 없음
+        if plan["queryPlanner"]["winningPlan"].get("stage") == "EOF":
+            continue
+        if not uses_index(plan):
+            collection_scans.append(f"{collection_name} {filter} sort={sort}")
+    return collection_scans
+
+
+async def explain_query(db, collection_name: str, filter: Dict[str, Any], sort: List[Tuple[str, int]]) -> Dict[str, Any]:
+    return await db.get_collection(collection_name).find(filter, sort=sort or None).explain()
+
+
+def uses_index(plan: Dict[str, Any]) -> bool:
+    """explain 결과의 winning plan이 collection scan 없이 index로 문서를 찾는지"""
+    stages = _plan_stages(plan["queryPlanner"]["winningPlan"])
+    return "COLLSCAN" not in stages and any(stage in INDEX_STAGES for stage in stages)
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages.extend(_plan_stages(plan[child_key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
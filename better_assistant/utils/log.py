@@ -0,0 +1,172 @@
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import traceback
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from better_assistant.utils.tracing import current_request_id
+
+# 호출부(event loop)에서는 record를 queue에 넣기만 하고, 문자열 변환과 파일 쓰기는 writer thread에서 처리
+_sample_rate = 0.01
+
+
+class QueueSink:
+    """
+    크기가 제한된 queue를 거쳐 별도 thread에서 쓰는 loguru sink
+    디스크가 느려 queue가 가득 차면 기다리지 않고 버린 뒤 dropped로 집계
+    """
+
+    def __init__(self, path: Optional[str], serialize: bool, max_size: int, rotation_bytes: int = 0):
+        self.path = path
+        self.serialize = serialize
+        self.rotation_bytes = rotation_bytes
+        self.queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_size)
+        self.written = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name=f"log-writer-{path or 'stderr'}", daemon=True)
+        self._thread.start()
+
+    def write(self, message):
+        try:
+            self.queue.put_nowait(message.record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self, timeout: float = 5.0):
+        """남은 log를 모두 쓴 뒤 writer thread 종료"""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        if self.dropped:
+            sys.stderr.write(f"Dropped {self.dropped} log records for {self.path or 'stderr'}\n")
+
+    def _open(self):
+        if self.path is None:
+            return sys.stderr
+        return open(self.path, "a", encoding="utf-8")
+
+    def _run(self):
+        stream = self._open()
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            try:
+                stream.write(self._format(record) + "\n")
+                self.written += 1
+                if self.queue.empty():
+                    stream.flush()
+                if self.rotation_bytes and self.path and stream.tell() >= self.rotation_bytes:
+                    stream = self._rotate(stream)
+            except Exception as e:
+                sys.stderr.write(f"Failed to write log record: {str(e)}\n")
+        stream.flush()
+        if stream is not sys.stderr:
+            stream.close()
+
+    def _rotate(self, stream):
+        stream.close()
+        os.rename(self.path, f"{self.path}.{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        return self._open()
+
+    def _format(self, record: Dict[str, Any]) -> str:
+        extra = record["extra"]
+        exception = record["exception"]
+        error = "".join(traceback.format_exception(*exception)) if exception else None
+
+        if not self.serialize:
+            request_id = extra.get("request_id")
+            line = f"{record['time'].isoformat()} {record['level'].name} {record['message']}"
+            if request_id:
+                line = f"{line} request_id={request_id}"
+            return f"{line}\n{error.rstrip()}" if error else line
+
+        document = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "message": record["message"],
+            "logger": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            **extra,
+        }
+        if error:
+            document["exception"] = error
+        return json.dumps(document, ensure_ascii=False, default=str)
+
+
+class _SampledLogger:
+    """rate 비율의 호출만 loguru로 넘기는 logger, 버리는 event는 loguru record를 만들지 않음"""
+
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+
+    def debug(self, message: str, *args: Any, **kwargs: Any):
+        self._log("DEBUG", message, *args, **kwargs)
+
+    def info(self, message: str, *args: Any, **kwargs: Any):
+        self._log("INFO", message, *args, **kwargs)
+
+    def _log(self, level: str, message: str, *args: Any, **kwargs: Any):
+        rate = _sample_rate if self.rate is None else self.rate
+        if rate >= 1 or random.random() < rate:
+            # 호출한 위치(function, line)가 기록되도록 depth 지정
+            logger.opt(depth=2).log(level, message, *args, **kwargs)
+
+
+def _add_request_id(record):
+    request_id = current_request_id()
+    if request_id:
+        record["extra"]["request_id"] = request_id
+
+
+def sampled(rate: Optional[float] = None) -> _SampledLogger:
+    """
+    대량으로 발생하는 event용 logger, rate를 생략하면 기록 시점의 LOG_SAMPLE_RATE 사용
+    (setup_logging 전에 module 수준에서 만들어 둬도 됨)
+    """
+    return _SampledLogger(rate)
+
+
+_access_logger = sampled(1.0)
+
+
+def setup_logging() -> List[QueueSink]:
+    """
+    LOG_LEVEL 이상만 기록하고 LOG_FORMAT(text|json)에 맞게 stderr와 LOG_FILE로 non-blocking 출력
+    loguru의 기본 stderr handler는 동기로 쓰므로 제거
+    """
+    global _sample_rate, _access_logger
+    level = os.getenv("LOG_LEVEL", "INFO")
+    serialize = os.getenv("LOG_FORMAT", "text") == "json"
+    max_size = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    log_file = os.getenv("LOG_FILE", "app.log")
+
+    rotation_bytes = int(os.getenv("LOG_ROTATION_BYTES", str(500 * 1024 * 1024)))
+    _sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+    _access_logger = sampled(float(os.getenv("LOG_ACCESS_SAMPLE_RATE", "1.0")))
+
+    sinks = [QueueSink(None, serialize, max_size)]
+    if log_file:
+        sinks.append(QueueSink(log_file, serialize, max_size, rotation_bytes))
+
+    logger.remove()
+    logger.configure(patcher=_add_request_id)
+    for sink in sinks:
+        logger.add(sink.write, level=level, format="{message}", catch=False)
+    return sinks
+
+
+def access_log(route: str, method: str, status: int, latency_ms: float):
+    """요청 1건의 route, status, latency를 LOG_ACCESS_SAMPLE_RATE 비율로 기록"""
+    _access_logger.info(
+        "{method} {route} {status} {latency_ms}ms", method=method, route=route, status=status, latency_ms=latency_ms
+    )
@@ -1,18 +1,175 @@
+import asyncio
+import functools
+import inspect
 import os
-from typing import Dict, List
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from bson import ObjectId
-from pymongo import AsyncMongoClient
-from pymongo.errors import ServerSelectionTimeoutError
+from loguru import logger
+from pymongo import AsyncMongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError, ServerSelectionTimeoutError
+from pymongo.monitoring import ConnectionPoolListener
 from pymongo.server_api import ServerApi
 
 from better_assistant.exceptions import (
     CollectionNotDefinedException,
     DataNotCreatedException,
     DataNotFoundException,
+    DuplicateDataException,
     NoDataException,
     NoFilterException,
 )
+from better_assistant.utils.indexes import ensure_indexes, verify_query_plans
+from better_assistant.utils.log import sampled
+from better_assistant.utils.metrics import Counter, Histogram
+from better_assistant.utils.tracing import record_span, span
+
+_operation_logger = sampled()
+
+MONGO_OPERATION_SECONDS = Histogram(
+    "mongo_operation_duration_seconds", "MongoClientWrapper call latency", ("operation", "collection", "outcome")
+)
+MONGO_DOCUMENTS_RETURNED = Counter(
+    "mongo_documents_returned_total", "Documents returned by find operations", ("operation", "collection")
+)
+
+
+def _collection_getter(func):
+    position = list(inspect.signature(func).parameters).index("collection_name")
+    return lambda args, kwargs: kwargs.get("collection_name") or (args[position] if len(args) > position else None)
+
+
+def _outcome(error: Optional[BaseException]) -> str:
+    if error is None:
+        return "ok"
+    if isinstance(error, DataNotFoundException):
+        return "not_found"
+    return "error"
+
+
+def instrument(func):
+    """MongoClientWrapper 메서드의 latency와 반환 문서 수를 operation/collection별로 기록하고 trace span 생성"""
+    operation = func.__name__
+    get_collection = _collection_getter(func)
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def iter_wrapper(*args, **kwargs):
+            collection_name = str(get_collection(args, kwargs))
+            # 소비자가 문서를 처리하는 시간은 빼고 cursor를 기다린 시간만 합산
+            elapsed = 0.0
+            count = 0
+            error = None
+            started_ns = time.time_ns()
+            iterator = func(*args, **kwargs)
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        document = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        elapsed += time.perf_counter() - start
+                    count += 1
+                    yield document
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                await iterator.aclose()
+                MONGO_OPERATION_SECONDS.observe(elapsed, operation, collection_name, _outcome(error))
+                MONGO_DOCUMENTS_RETURNED.inc(operation, collection_name, value=count)
+                record_span(
+                    f"mongo.{operation}", started_ns,
+                    collection=collection_name, documents=count, cursor_ms=round(elapsed * 1000, 3),
+                )
+        return iter_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        collection_name = str(get_collection(args, kwargs))
+        start = time.perf_counter()
+        error = None
+        with span(f"mongo.{operation}", collection=collection_name) as current:
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                MONGO_OPERATION_SECONDS.observe(elapsed, operation, collection_name, _outcome(error))
+                _operation_logger.debug(
+                    "mongo.{} {} {} {}ms", operation, collection_name, _outcome(error), round(elapsed * 1000, 3)
+                )
+            if operation == "find":
+                MONGO_DOCUMENTS_RETURNED.inc(operation, collection_name, value=len(result))
+                if current is not None:
+                    current.attributes["documents"] = len(result)
+        return result
+    return wrapper
+
+
+class PoolMetrics(ConnectionPoolListener):
+    """connection pool checkout 대기 시간과 사용 중인 connection 수 집계"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.checked_out = 0
+        self.open_connections = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open_connections = max(0, self.open_connections - 1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        # 예: waitQueueTimeoutMS 안에 connection을 받지 못한 경우 reason="timeout"
+        self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        wait = event.duration or 0.0
+        self.checkouts += 1
+        self.checked_out += 1
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def connection_checked_in(self, event):
+        self.checked_out = max(0, self.checked_out - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "checkout_failures": dict(self.checkout_failures),
+            "checked_out": self.checked_out,
+            "open_connections": self.open_connections,
+            "wait_ms_avg": round(self.wait_seconds_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+        }
 
 
 class MongoClientWrapper:
@@ -22,25 +179,59 @@ class MongoClientWrapper:
         mongo_pass = os.getenv("MONGO_PASS")
         mongo_db = os.getenv("MONGO_DB_NAME")
 
-        uri = f"mongodb+srv://{mongo_user}:{mongo_pass}@{mongo_host}/?retryWrites=true&w=majority&appName=MLWoops"
+        # MONGO_URI가 있으면 그대로 사용 (local mongod 등), 없으면 Atlas srv 주소 구성
+        uri = os.getenv("MONGO_URI") or (
+            f"mongodb+srv://{mongo_user}:{mongo_pass}@{mongo_host}/?retryWrites=true&w=majority&appName=MLWoops"
+        )
 
-        print(f"Connecting to MongoDB: {mongo_host}")
+        logger.info("Connecting to MongoDB: {}", mongo_host or "MONGO_URI")
 
+        self.min_pool_size = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+        self.pool_metrics = PoolMetrics()
         self.client = AsyncMongoClient(
             uri,
             server_api=ServerApi('1'),
+            maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+            minPoolSize=self.min_pool_size,
+            maxIdleTimeMS=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+            waitQueueTimeoutMS=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+            event_listeners=[self.pool_metrics],
             )
         self.db = self.client.get_database(mongo_db)
 
+    async def warm_up(self):
+        """첫 요청이 connection 생성 비용을 내지 않도록 minPoolSize만큼 connection을 미리 연결"""
+        try:
+            await asyncio.gather(*(self.db.command("ping") for _ in range(max(1, self.min_pool_size))))
+        except PyMongoError as e:
+            logger.warning("Failed to warm up MongoDB connections: {}", e)
+
+    async def close(self):
+        await self.client.close()
+
     async def __create_index__(self):
-        print("Creating indexes...")
+        logger.info("Creating indexes...")
         try:
-            await self.db.get_collection("projects").create_index("project_title", unique=True, background=True)
-            await self.db.get_collection("prompts").create_index("prompt_version", background=True)
-            await self.db.get_collection("dialogs").create_index("dialog_title", background=True)
+            changes = await ensure_indexes(self.db)
+            if changes:
+                logger.info("Index changes: {}", changes)
+            if os.getenv("INDEX_VERIFY_PLANS", "false").lower() == "true":
+                for query in await verify_query_plans(self.db):
+                    logger.warning("Query is not covered by an index: {}", query)
         except ServerSelectionTimeoutError:
-            print("Failed to create indexes. Collection might not exist yet.")
+            logger.warning("Failed to create indexes. Collection might not exist yet.")
+
+    async def watch(self, collection_name: str=None) -> AsyncIterator[Dict[str, any]]:
+        """collection의 change stream 이벤트를 반환 (replica set 필요)"""
+
+        if not collection_name:
+            raise CollectionNotDefinedException("Collection is required")
+        collection = self.db.get_collection(collection_name)
+        async with await collection.watch() as stream:
+            async for change in stream:
+                yield change
 
+    @instrument
     async def insert(self, document: "MongoDocument", collection_name: str=None) -> ObjectId: # noqa
 
         if not collection_name:
@@ -51,7 +242,10 @@ class MongoClientWrapper:
 
         document = document.to_dict()
 
-        result = await collection.insert_one(document)
+        try:
+            result = await collection.insert_one(document)
+        except DuplicateKeyError:
+            raise DuplicateDataException(f"Duplicate data in collection: {collection_name}")
 
         if result.acknowledged:
             return result.inserted_id
@@ -59,6 +253,23 @@ class MongoClientWrapper:
         raise DataNotCreatedException("Data not created")
 
 
+    @instrument
+    async def insert_many(self, documents: List[Dict[str, any]], collection_name: str=None) -> List[int]:
+        """문서 목록을 한 번의 unordered insert_many로 저장하고 실패한 문서 index를 반환"""
+
+        if not collection_name:
+            raise CollectionNotDefinedException("Collection is required")
+        if not documents:
+            raise NoDataException("Data is required")
+        collection = self.db.get_collection(collection_name)
+        try:
+            await collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            return [error["index"] for error in e.details.get("writeErrors", [])]
+        return []
+
+
+    @instrument
     async def find(self, filter: Dict[str, Dict[str, any]], collection_name: str=None) -> List:
 
         if not collection_name:
@@ -67,14 +278,43 @@ class MongoClientWrapper:
             raise NoFilterException("Data is required")
         collection = self.db.get_collection(collection_name)
 
-        cursor = collection.find(filter=filter["filter"], projection=filter["projection"])
+        cursor = collection.find(
+            filter=filter["filter"],
+            projection=filter["projection"],
+            sort=filter.get("sort"),
+            limit=filter.get("limit", 0),
+            )
         result = await cursor.to_list(length=None)
 
         if result and len(result) > 0:
             return result
-        raise DataNotFoundException(f"No data found for filter: {filter} in collection: {collection_name}")
+        raise DataNotFoundException(f"No data found in collection: {collection_name}")
 
 
+    @instrument
+    async def find_iter(
+        self, filter: Dict[str, Dict[str, any]], collection_name: str=None, batch_size: int=500
+    ) -> AsyncIterator[Dict[str, any]]:
+        """결과 전체를 메모리에 올리지 않고 cursor에서 batch 단위로 문서를 하나씩 반환"""
+
+        if not collection_name:
+            raise CollectionNotDefinedException("Collection is required")
+        if not filter:
+            raise NoFilterException("Data is required")
+        collection = self.db.get_collection(collection_name)
+
+        cursor = collection.find(
+            filter=filter["filter"],
+            projection=filter["projection"],
+            sort=filter.get("sort"),
+            limit=filter.get("limit", 0),
+            batch_size=batch_size,
+            )
+        async for document in cursor:
+            yield document
+
+
+    @instrument
     async def update(self, filter: Dict[str, any], update: Dict[str, any], collection_name: str=None) -> bool:
 
         if not collection_name:
@@ -89,9 +329,103 @@ class MongoClientWrapper:
         if result.acknowledged:
             if result.modified_count > 0:
                 return True
-        raise DataNotFoundException(f"No data found for filter: {filter} in collection: {collection_name}")
+        raise DataNotFoundException(f"No data found in collection: {collection_name}")
+
+
+    @instrument
+    async def bulk_update(
+        self, operations: List[Tuple[Dict[str, any], Dict[str, any]]], collection_name: str=None, upsert: bool=False
+    ) -> List[int]:
+        """(filter, update) 목록을 한 번의 unordered bulk_write로 실행하고 실패한 operation index를 반환"""
+
+        if not collection_name:
+            raise CollectionNotDefinedException("Collection is required")
+        if not operations:
+            raise NoDataException("New data is required")
+        collection = self.db.get_collection(collection_name)
+        try:
+            await collection.bulk_write(
+                [UpdateOne(filter, update, upsert=upsert) for filter, update in operations], ordered=False
+            )
+        except BulkWriteError as e:
+            return [error["index"] for error in e.details.get("writeErrors", [])]
+        return []
+
+
+    @instrument
+    async def upsert(self, filter: Dict[str, any], update: Dict[str, any], collection_name: str=None) -> bool:
+
+        if not collection_name:
+            raise CollectionNotDefinedException("Collection is required")
+        if not filter:
+            raise NoFilterException("Data is required")
+        if not update:
+            raise NoDataException("New data is required")
+        collection = self.db.get_collection(collection_name)
+        result = await collection.update_one(filter, update, upsert=True)
+        return result.acknowledged
+
+
+    @instrument
+    async def increment(
+        self, filter: Dict[str, any], update: Dict[str, any], field: str, collection_name: str=None, upsert: bool=True
+    ) -> int:
+        """원자적으로 증가시킨 뒤 증가된 field 값을 반환, upsert가 아니면 문서가 없을 때 예외"""
+
+        if not collection_name:
+            raise CollectionNotDefinedException("Collection is required")
+        if not filter:
+            raise NoFilterException("Data is required")
+        if not update:
+            raise NoDataException("New data is required")
+        collection = self.db.get_collection(collection_name)
+        result = await collection.find_one_and_update(
+            filter, update, projection={field: 1}, upsert=upsert, return_document=ReturnDocument.AFTER
+        )
+        if result is None:
+            raise DataNotFoundException(f"No data found in collection: {collection_name}")
+        return result[field]
+
+
+    @instrument
+    async def find_and_update(
+        self, filter: Dict[str, any], update: Dict[str, any], fields: List[str], collection_name: str=None
+    ) -> Dict[str, any]:
+        """원자적으로 수정한 뒤 수정된 문서의 fields를 반환, 문서가 없으면 예외"""
+
+        if not collection_name:
+            raise CollectionNotDefinedException("Collection is required")
+        if not filter:
+            raise NoFilterException("Data is required")
+        if not update:
+            raise NoDataException("New data is required")
+        collection = self.db.get_collection(collection_name)
+        result = await collection.find_one_and_update(
+            filter, update, projection={field: 1 for field in fields}, return_document=ReturnDocument.AFTER
+        )
+        if result is None:
+            raise DataNotFoundException(f"No data found in collection: {collection_name}")
+        return result
+
+
+    @instrument
+    async def aggregate(self, pipeline: List[Dict[str, any]], collection_name: str=None) -> List:
+
+        if not collection_name:
+            raise CollectionNotDefinedException("Collection is required")
+        if not pipeline:
+            raise NoFilterException("Data is required")
+        collection = self.db.get_collection(collection_name)
+
+        cursor = await collection.aggregate(pipeline)
+        result = await cursor.to_list(length=None)
+
+        if result:
+            return result
+        raise DataNotFoundException(f"No data found in collection: {collection_name}")
 
 
+    @instrument
     async def delete(self, filter: Dict[str, any], collection_name: str=None) -> bool:
 
         if not collection_name:
@@ -105,4 +439,35 @@ class MongoClientWrapper:
         if result.acknowledged:
             if result.deleted_count > 0:
                 return True
-        raise DataNotFoundException(f"No data found for filter: {filter} in collection: {collection_name}")
+        raise DataNotFoundException(f"No data found in collection: {collection_name}")
+
+
+    @instrument
+    async def delete_many(self, filter: Dict[str, any], collection_name: str=None) -> int:
+
+        if not collection_name:
+            raise CollectionNotDefinedException("Collection is required")
+        if not filter:
+            raise NoFilterException("Data is required")
+
+        collection = self.db.get_collection(collection_name)
+        result = await collection.delete_many(filter)
+        return result.deleted_count
+
+
+_shared_client: Optional[MongoClientWrapper] = None
+
+
+def get_mongo_client() -> MongoClientWrapper:
+    """프로세스 전체가 하나의 connection pool을 공유하도록 MongoClientWrapper를 한 번만 생성"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = MongoClientWrapper()
+    return _shared_client
+
+
+async def close_mongo_client():
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.close()
+        _shared_client = None
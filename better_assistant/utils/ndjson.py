@@ -0,0 +1,76 @@
+import zlib
+from typing import AsyncIterator, List
+
+from better_assistant.exceptions import InvalidDataException
+
+GZIP_MAGIC = b"\x1f\x8b"
+# 압축 해제 1회에 만드는 최대 크기, 작은 upload가 메모리에서 크게 부풀지 않도록 제한
+_INFLATE_CHUNK = 1024 * 1024
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """chunk를 받는 대로 gzip으로 압축해 반환"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _inflate(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """앞 2 byte가 gzip magic이면 압축을 풀면서, 아니면 그대로 반환"""
+    head = b""
+    iterator = chunks.__aiter__()
+    async for chunk in iterator:
+        head += chunk
+        if len(head) >= 2:
+            break
+    if head[:2] != GZIP_MAGIC:
+        if head:
+            yield head
+        async for chunk in iterator:
+            yield chunk
+        return
+
+    decompressor = zlib.decompressobj(31)
+    pending = head
+    while True:
+        while pending:
+            yield decompressor.decompress(pending, _INFLATE_CHUNK)
+            pending = decompressor.unconsumed_tail
+        try:
+            pending = await iterator.__anext__()
+        except StopAsyncIteration:
+            break
+    yield decompressor.flush()
+
+
+def _check_line(line: bytes, max_line_bytes: int) -> bytes:
+    if len(line) > max_line_bytes:
+        raise InvalidDataException(f"Line exceeds {max_line_bytes} bytes")
+    return line
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    """NDJSON upload body를 받는 대로 줄 단위로 나눠 반환, gzip이면 풀면서 처리, max_line_bytes를 넘는 줄이 있으면 예외"""
+    # 여러 chunk에 걸친 긴 줄은 조각을 모아 두었다가 줄바꿈을 만나면 한 번만 합침
+    parts: List[bytes] = []
+    size = 0
+    async for chunk in _inflate(chunks):
+        lines = chunk.split(b"\n")
+        if len(lines) > 1:
+            parts.append(lines[0])
+            yield _check_line(b"".join(parts), max_line_bytes)
+            for line in lines[1:-1]:
+                yield _check_line(line, max_line_bytes)
+            parts = []
+            size = 0
+        if lines[-1]:
+            parts.append(lines[-1])
+            size += len(lines[-1])
+        # 줄바꿈이 오기 전에도 모아 둔 조각이 한도를 넘으면 바로 중단
+        if size > max_line_bytes:
+            raise InvalidDataException(f"Line exceeds {max_line_bytes} bytes")
+    if parts:
+        yield _check_line(b"".join(parts), max_line_bytes)
@@ -0,0 +1,29 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def bson_default(value: Any) -> Any:
+    """json으로 바로 변환되지 않는 MongoDB 값(ObjectId, datetime) 변환"""
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """MongoDB 문서를 변환 없이 바로 json bytes로 직렬화"""
+    return json.dumps(content, default=bson_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class BSONJSONResponse(JSONResponse):
+    """ObjectId, datetime이 포함된 MongoDB 문서를 그대로 받는 JSONResponse"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,100 @@
+import asyncio
+import contextlib
+from typing import AsyncIterator, List, Optional
+
+
+def format_sse(data: str, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """SSE frame 생성, data 안의 줄바꿈은 여러 data: 줄로 나눠 frame이 깨지지 않게 함"""
+    lines: List[str] = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    data = data.replace("\r\n", "\n").replace("\r", "\n")
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+class _Coalescer:
+    """upstream을 읽는 task 1개가 buffer를 채우고, flush할 때가 되면 내보내는 쪽을 깨움"""
+
+    def __init__(self, chunks: AsyncIterator[str], flush_interval: float, max_chars: int):
+        self.loop = asyncio.get_running_loop()
+        self.chunks = chunks
+        self.flush_interval = flush_interval
+        self.max_chars = max_chars
+        self.buffer: List[str] = []
+        self.buffered_chars = 0
+        self.last_flush = float("-inf")
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.ready = asyncio.Event()
+        self.drained = asyncio.Event()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    async def read(self):
+        try:
+            async for chunk in self.chunks:
+                self.buffer.append(chunk)
+                self.buffered_chars += len(chunk)
+                if self.buffered_chars >= self.max_chars:
+                    # 내보낼 때까지 더 읽지 않아 client가 느려도 buffer가 max_chars 근처에서 멈춤
+                    self.drained.clear()
+                    self.ready.set()
+                    await self.drained.wait()
+                elif self.loop.time() - self.last_flush >= self.flush_interval:
+                    self.ready.set()
+                elif self.timer is None:
+                    # chunk마다 timer를 만들지 않고 flush 구간마다 1개만 예약
+                    self.timer = self.loop.call_at(self.last_flush + self.flush_interval, self.ready.set)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self.ready.set()
+
+    def take(self) -> str:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        text = "".join(self.buffer)
+        self.buffer.clear()
+        self.buffered_chars = 0
+        self.last_flush = self.loop.time()
+        self.drained.set()
+        return text
+
+
+async def coalesce(chunks: AsyncIterator[str], flush_interval: float, max_chars: int) -> AsyncIterator[str]:
+    """
+    짧은 간격으로 들어오는 chunk를 묶어서 반환
+
+    첫 chunk는 바로 내보내고, 이후에는 마지막 flush로부터 flush_interval이 지나거나
+    모인 글자 수가 max_chars 이상일 때 한 번에 내보냄. 다음 chunk가 늦게 오더라도
+    모아둔 내용은 flush_interval 안에 내보냄.
+    chunk마다 task나 timer를 만들지 않도록 upstream은 task 1개가 계속 읽고, timer는 flush 구간마다 1개만 사용
+    """
+    if flush_interval <= 0:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    coalescer = _Coalescer(chunks, flush_interval, max_chars)
+    reader = asyncio.create_task(coalescer.read())
+    try:
+        while True:
+            await coalescer.ready.wait()
+            coalescer.ready.clear()
+            if coalescer.buffer:
+                yield coalescer.take()
+            if coalescer.done and not coalescer.buffer:
+                if coalescer.error is not None:
+                    raise coalescer.error
+                return
+    finally:
+        if coalescer.timer is not None:
+            coalescer.timer.cancel()
+        if not reader.done():
+            reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await reader
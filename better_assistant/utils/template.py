@@ -0,0 +1,136 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from better_assistant.exceptions import TemplateException
+
+# 지원 문법
+# - {{ name }}, {{ user.name }}: 변수 치환 (없으면 예외)
+# - {% if name %} ... {% else %} ... {% endif %}, {% if not name %}: 변수 값의 참/거짓으로 분기
+# - {% include "v2" %}: 같은 프로젝트의 다른 프롬프트 버전을 삽입
+_TOKEN = re.compile(r"\{\{(.*?)\}\}|\{%(.*?)%\}", re.S)
+_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+_INCLUDE = re.compile(r"""include\s+(["'])(.+?)\1$""")
+
+# 컴파일 결과는 node tuple 목록: 렌더링 시 새 객체 없이 문자열 조각만 list에 이어 붙임
+TEXT, VAR, IF, INCLUDE = range(4)
+
+
+class CompiledTemplate:
+    __slots__ = ("nodes", "includes")
+
+    def __init__(self, nodes: Tuple[tuple, ...], includes: Tuple[str, ...]):
+        self.nodes = nodes
+        self.includes = includes
+
+
+def _parse_name(expression: str) -> Tuple[str, ...]:
+    if not _NAME.match(expression):
+        raise TemplateException(f"Invalid variable name: {expression!r}")
+    return tuple(expression.split("."))
+
+
+def compile_template(source: str) -> CompiledTemplate:
+    """template 문자열을 한 번 파싱해 렌더링용 node 목록으로 변환"""
+    # (nodes, if 조건, then nodes) stack, else를 만나면 then nodes를 보관하고 새 목록에 이어 씀
+    stack: List[Tuple[List[tuple], Optional[tuple], Optional[List[tuple]]]] = []
+    nodes: List[tuple] = []
+    includes: List[str] = []
+    position = 0
+
+    for match in _TOKEN.finditer(source):
+        if match.start() > position:
+            nodes.append((TEXT, source[position:match.start()]))
+        position = match.end()
+
+        if match.group(1) is not None:
+            nodes.append((VAR, _parse_name(match.group(1).strip())))
+            continue
+
+        tag = match.group(2).strip()
+        if tag.startswith("if "):
+            condition = tag[3:].strip()
+            negate = condition.startswith("not ")
+            name = _parse_name(condition[4:].strip() if negate else condition)
+            stack.append((nodes, (name, negate), None))
+            nodes = []
+        elif tag == "else":
+            if not stack or stack[-1][2] is not None:
+                raise TemplateException("Unexpected {% else %}")
+            parent, condition, _ = stack.pop()
+            stack.append((parent, condition, nodes))
+            nodes = []
+        elif tag == "endif":
+            if not stack:
+                raise TemplateException("Unexpected {% endif %}")
+            parent, (name, negate), then_nodes = stack.pop()
+            if then_nodes is None:
+                then_nodes, else_nodes = nodes, []
+            else:
+                else_nodes = nodes
+            parent.append((IF, name, negate, tuple(then_nodes), tuple(else_nodes)))
+            nodes = parent
+        else:
+            include = _INCLUDE.match(tag)
+            if include is None:
+                raise TemplateException(f"Unknown tag: {{% {tag} %}}")
+            nodes.append((INCLUDE, include.group(2)))
+            if include.group(2) not in includes:
+                includes.append(include.group(2))
+
+    if stack:
+        raise TemplateException("Missing {% endif %}")
+    if position < len(source):
+        nodes.append((TEXT, source[position:]))
+    return CompiledTemplate(tuple(nodes), tuple(includes))
+
+
+def _lookup(variables: Dict[str, Any], name: Tuple[str, ...]) -> Any:
+    value: Any = variables
+    for part in name:
+        if not isinstance(value, dict) or part not in value:
+            raise KeyError(".".join(name))
+        value = value[part]
+    return value
+
+
+def _render_nodes(
+    nodes: Tuple[tuple, ...],
+    variables: Dict[str, Any],
+    templates: Dict[str, CompiledTemplate],
+    out: List[str],
+    depth: int,
+):
+    for node in nodes:
+        kind = node[0]
+        if kind == TEXT:
+            out.append(node[1])
+        elif kind == VAR:
+            try:
+                out.append(str(_lookup(variables, node[1])))
+            except KeyError as e:
+                raise TemplateException(f"Missing variable: {e.args[0]}")
+        elif kind == IF:
+            try:
+                truthy = bool(_lookup(variables, node[1]))
+            except KeyError:
+                truthy = False
+            _render_nodes(node[4] if truthy == node[2] else node[3], variables, templates, out, depth)
+        else:
+            included = templates.get(node[1])
+            if included is None:
+                raise TemplateException(f"Included prompt version not found: {node[1]}")
+            if depth <= 0:
+                raise TemplateException(f"Include depth exceeded at: {node[1]}")
+            _render_nodes(included.nodes, variables, templates, out, depth - 1)
+
+
+def render_template(
+    template: CompiledTemplate,
+    variables: Dict[str, Any],
+    templates: Optional[Dict[str, CompiledTemplate]] = None,
+    max_depth: int = 5,
+) -> str:
+    """컴파일된 template을 렌더링, include는 templates(prompt_version -> CompiledTemplate)에서 찾음"""
+    out: List[str] = []
+    _render_nodes(template.nodes, variables, templates or {}, out, max_depth)
+    return "".join(out)
@@ -0,0 +1,20 @@
+from typing import Dict, Iterable
+
+# 메시지마다 role/구분자로 붙는 대략적인 토큰 수
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """tokenizer 없이 토큰 수를 근사: ASCII는 4글자당 1토큰, 그 외(한글 등)는 글자당 1토큰"""
+    if not text:
+        return 0
+    ascii_count = sum(1 for char in text if char.isascii())
+    return (ascii_count + 3) // 4 + (len(text) - ascii_count)
+
+
+def estimate_message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_messages_tokens(messages: Iterable[Dict[str, str]]) -> int:
+    return sum(estimate_message_tokens(message) for message in messages)
@@ -0,0 +1,264 @@
+import functools
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+SERVICE_NAME = "better-assistant-be"
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """요청 1건 동안 생성된 span 목록, asyncio.gather로 나뉜 task도 같은 Trace에 기록"""
+
+    def __init__(self, request_id: str):
+        self.trace_id = uuid.uuid4().hex
+        self.request_id = request_id
+        self.spans: List[Span] = []
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "request_id": self.request_id,
+            "name": self.root.name,
+            "duration_ms": round(self.root.duration_ms, 3),
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON(ExportTraceServiceRequest) 형식"""
+        spans = []
+        for span in self.spans:
+            otlp_span = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 2 if span.parent_id is None else 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": "better_assistant"}, "spans": spans}],
+            }]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """현재 span의 하위 span을 기록, 진행 중인 trace가 없으면(background task 등) 아무것도 하지 않음"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, attributes)
+    trace.spans.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+def record_span(name: str, start_ns: int, **attributes: Any) -> Optional[Span]:
+    """이미 끝난 구간을 현재 span의 하위 span으로 기록 (async generator처럼 context var를 바꾸면 안 되는 곳에서 사용)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    parent = _current_span.get()
+    finished = Span(name, parent.span_id if parent else None, attributes)
+    finished.start_ns = start_ns
+    finished.end_ns = time.time_ns()
+    trace.spans.append(finished)
+    return finished
+
+
+def traced(name: Optional[str] = None):
+    """async 메서드 호출 전체를 span으로 기록하는 decorator"""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TraceRecorder:
+    """
+    TRACE_SLOW_MS 이상 걸린 trace를 ring buffer에 보관하고, TRACE_EXPORT_FILE이 있으면 OTLP JSON 한 줄씩 기록
+    파일 쓰기는 log의 QueueSink처럼 크기가 제한된 queue를 거쳐 writer thread에서 처리하고, queue가 가득 차면 버림
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+        self.slow_ms = float(os.getenv("TRACE_SLOW_MS", "500"))
+        self.export_file = os.getenv("TRACE_EXPORT_FILE")
+        self.traces: Deque[Trace] = deque(maxlen=int(os.getenv("TRACE_BUFFER_SIZE", "100")))
+        self.queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=int(os.getenv("TRACE_QUEUE_SIZE", "1000")))
+        self.exported = 0
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, trace: Trace):
+        if trace.root.duration_ms < self.slow_ms:
+            return
+        self.traces.append(trace)
+        if self.export_file:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._thread.start()
+            try:
+                self.queue.put_nowait(trace)
+            except queue.Full:
+                self.dropped += 1
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        return [trace.to_dict() for trace in list(self.traces)[::-1][:limit]]
+
+    def stop(self, timeout: float = 5.0):
+        """남은 trace를 모두 쓴 뒤 writer thread 종료"""
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+        if self.dropped:
+            logger.warning("Dropped {} traces for {}", self.dropped, self.export_file)
+
+    def _run(self):
+        try:
+            stream = open(self.export_file, "a", encoding="utf-8")
+        except OSError as e:
+            logger.warning("Failed to export trace: {}", e)
+            stream = None
+        while True:
+            trace = self.queue.get()
+            if trace is None:
+                break
+            if stream is None:
+                self.dropped += 1
+                continue
+            try:
+                stream.write(json.dumps(trace.to_otlp(), ensure_ascii=False) + "\n")
+                self.exported += 1
+                if self.queue.empty():
+                    stream.flush()
+            except OSError as e:
+                logger.warning("Failed to export trace: {}", e)
+        if stream is not None:
+            stream.close()
+
+
+recorder = TraceRecorder()
+
+
+class TracingMiddleware:
+    """요청마다 trace를 시작해 request id(X-Request-ID)를 context var로 전파하고 응답 header에 반환"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not recorder.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1") or uuid.uuid4().hex
+        trace = Trace(request_id)
+        trace_token = _current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            with span(f"{scope['method']} {scope['path']}", request_id=request_id) as root:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(trace_token)
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+            recorder.record(trace)
@@ -1,54 +1,131 @@
-from datetime import datetime
+import math
 import os
 from contextlib import asynccontextmanager
+from typing import AsyncIterator, Literal, Optional
 
 from bson import ObjectId
-from fastapi import FastAPI, HTTPException, Query, Response
+from bson.errors import InvalidId
+from fastapi import Depends, FastAPI, Header, HTTPException, Path, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
 from better_assistant.exceptions import (
     CollectionNotDefinedException,
     DataNotCreatedException,
     DataNotFoundException,
+    DuplicateDataException,
+    InvalidDataException,
     NoDataException,
     NoFilterException,
+    QueueFullException,
+    QueueTimeoutException,
+    TemplateException,
 )
-from better_assistant.models import Dialog, Project, Prompt
+from better_assistant.managers.persistence import DialogWriteQueue
+from better_assistant.managers.ratelimit import (
+    RATE_LIMIT_REJECTIONS,
+    RateLimiter,
+    create_rate_limiter,
+    rate_limit_key,
+)
+from better_assistant.managers.response_cache import ResponseCache
+from better_assistant.managers.scheduler import GenerationScheduler
+from better_assistant.managers.streams import StreamRegistry
+from better_assistant.managers.templates import PromptTemplateManager
+from better_assistant.models import BatchGenerateRequest, Dialog, Project, Prompt
 from better_assistant.models.models import GenerateRequest
-from better_assistant.services import ChatService, GenerateService, ProjectService, PromptService
-from better_assistant.utils import MongoClientWrapper
+from better_assistant.services import (
+    BatchService,
+    CachedProjectService,
+    CachedPromptService,
+    CacheInvalidationListener,
+    ChatService,
+    GenerateService,
+    ProjectDeletionService,
+    ProjectDetailService,
+    ProjectService,
+    ProjectTransferService,
+    PromptService,
+    SearchService,
+)
+from better_assistant.services.search import SEARCH_TYPES
+from better_assistant.utils import MongoClientWrapper, close_mongo_client, get_mongo_client, metrics, next_cursor
+from better_assistant.utils.log import setup_logging
+from better_assistant.utils.metrics import MetricsMiddleware
+from better_assistant.utils.ndjson import gzip_stream
+from better_assistant.utils.serialize import BSONJSONResponse, dumps
+from better_assistant.utils.tracing import TracingMiddleware, recorder
 
 mongo_client: MongoClientWrapper = None
-project_service: ProjectService = None
-prompt_service: PromptService = None
+project_service: CachedProjectService = None
+prompt_service: CachedPromptService = None
 dialog_service: ChatService = None
 generate_service: GenerateService = None
-
-generate_request_count: int = 0
-last_generate_request_time: datetime = datetime.now()
+project_detail_service: ProjectDetailService = None
+generate_limiter: RateLimiter = None
+generate_scheduler: GenerationScheduler = None
+response_cache: ResponseCache = None
+dialog_write_queue: DialogWriteQueue = None
+cache_listener: CacheInvalidationListener = None
+batch_service: BatchService = None
+stream_registry: StreamRegistry = None
+transfer_service: ProjectTransferService = None
+deletion_service: ProjectDeletionService = None
+search_service: SearchService = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     서버 시작 시 초기화 작업을 위한 함수
     """
-    global project_service, prompt_service, dialog_service, mongo_client, generate_service
-    mongo_client = MongoClientWrapper()
+    global project_service, prompt_service, dialog_service, mongo_client, generate_service, project_detail_service
+    global generate_limiter, generate_scheduler, response_cache, dialog_write_queue, cache_listener, batch_service
+    global stream_registry, transfer_service, deletion_service, search_service
+    log_sinks = setup_logging()
+    mongo_client = get_mongo_client()
+    await mongo_client.warm_up()
     await mongo_client.__create_index__()
 
-    project_service = ProjectService(mongo_client)
-    prompt_service = PromptService(mongo_client)
+    project_service = CachedProjectService(mongo_client)
+    prompt_service = CachedPromptService(mongo_client)
+    cache_listener = CacheInvalidationListener(mongo_client, project_service, prompt_service)
+    cache_listener.start()
     dialog_service = ChatService(mongo_client)
-    generate_service = GenerateService(dialog_service)
-
-    logger.add("app.log", rotation="500 MB", format="{time} {level} {message}", level="DEBUG", enqueue=True)
+    response_cache = ResponseCache(mongo_client)
+    dialog_write_queue = DialogWriteQueue(dialog_service)
+    dialog_write_queue.start()
+    template_manager = PromptTemplateManager(prompt_service)
+    generate_service = GenerateService(dialog_service, response_cache, dialog_write_queue, template_manager)
+    project_detail_service = ProjectDetailService(project_service, prompt_service, dialog_service)
+    transfer_service = ProjectTransferService(mongo_client, project_service, prompt_service, dialog_service)
+    deletion_service = ProjectDeletionService(mongo_client, project_service, prompt_service)
+    await deletion_service.resume()
+    search_service = SearchService(mongo_client, dialog_service)
+    generate_limiter = create_rate_limiter(mongo_client)
+    generate_scheduler = GenerationScheduler()
+    batch_service = BatchService(mongo_client, prompt_service, generate_service, generate_scheduler)
+    await batch_service.recover()
+    stream_registry = StreamRegistry()
 
     yield
 
+    await stream_registry.stop()
+    await batch_service.stop()
+    await deletion_service.stop()
+    await cache_listener.stop()
+    await dialog_write_queue.stop()
+    await generate_service.close()
+    await close_mongo_client()
+    recorder.stop()
+    for sink in log_sinks:
+        sink.stop()
+
 app = FastAPI(lifespan=lifespan)
 
+# keyset 페이지 cursor(after)와 batch 작업 ID는 ObjectId 문자열, 형식이 틀리면 422
+OBJECT_ID_PATTERN = r"^[0-9a-fA-F]{24}$"
+
 origins = [os.getenv("ALLOW_ORIGIN")]
 
 app.add_middleware(
@@ -58,6 +135,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
+async def ndjson_stream(documents: AsyncIterator[dict]):
+    """문서를 한 줄씩 NDJSON으로 흘려보내는 generator"""
+    async for document in documents:
+        yield dumps(document) + b"\n"
+
+async def generate_rate_limit(request: Request):
+    """/generate 요청을 key별 rate limit으로 제한, 초과 시 Retry-After와 함께 429"""
+    key = await rate_limit_key(request)
+    retry_after = await generate_limiter.hit(key)
+    if retry_after > 0:
+        RATE_LIMIT_REJECTIONS.inc(key.split(":", 1)[0])
+        raise HTTPException(
+            status_code=429, detail="Too Many Requests", headers={"Retry-After": str(math.ceil(retry_after))}
+        )
 
 @app.get("/health")
 async def health_check():
@@ -71,72 +165,61 @@ async def health_check():
 
 
 @app.get("/projects")
-async def fetch_projects():
+async def fetch_projects(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[str] = Query(None, pattern=OBJECT_ID_PATTERN),
+    stream: bool = False,
+):
     """
     프로젝트 목록 호출을 위한 API
+
+    Args:
+        limit (int): 페이지 크기, 지정 시 next_cursor 반환
+        after (str): 이전 페이지의 next_cursor
+        stream (bool): true면 전체 목록을 NDJSON으로 스트리밍
+
     Returns:
         Response: 프로젝트 목록
     """
+    if stream:
+        return StreamingResponse(ndjson_stream(project_service.iter_projects()), media_type="application/x-ndjson")
     try:
-        result = await project_service.get_projects()
-        return JSONResponse({"projects": result})
+        result = await project_service.get_projects(limit=limit, after=after)
+        return BSONJSONResponse({"projects": result, "next_cursor": next_cursor(result, limit)})
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except DataNotFoundException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=404, content="No data found.")
 
 @app.get("/project")
-async def fetch_project(projectId: str):
+async def fetch_project(projectId: str, limit: Optional[int] = Query(None, ge=1, le=1000)):
     """
     프로젝트 detail 호출을 위한 API
 
     Args:
         project_id (str): 프로젝트 ID
+        limit (int): 포함할 프롬프트/대화 최대 개수, 이후 목록은 각 목록 API의 after로 조회
 
     Returns:
         Response: {project_id}에 해당하는 프로젝트 정보
     """
     try:
-        project_result: dict = await project_service.get_project(projectId)
+        project_result: dict = await project_detail_service.get_project_detail(projectId, limit=limit)
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except DataNotFoundException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=404, content=f"No data found in requested project id: {projectId}.")
-
-    try:
-        prompt_result: list = await prompt_service.get_prompts(project_id=projectId)
-        project_result["prompts"] = prompt_result
-    except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
-        return Response(status_code=500, content="Contect to administator.")
-    except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
-        return Response(status_code=500, content="Contect to administator.")
-    except DataNotFoundException:
-        project_result["prompts"] = []
-
-    try:
-        dialog_result: list = await dialog_service.get_dialogs(project_id=projectId)
-        project_result["dialogs"] = dialog_result
-    except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
-        return Response(status_code=500, content="Contect to administator.")
-    except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
-        return Response(status_code=500, content="Contect to administator.")
-    except DataNotFoundException:
-        project_result["dialogs"] = []
-    return JSONResponse({"project_detail": project_result})
+    return BSONJSONResponse({"project_detail": project_result})
 
 
 @app.post("/project")
@@ -149,15 +232,18 @@ async def create_project(new_project: Project):
     """
     try:
         result: ObjectId = await project_service.create_project(new_project)
-        return JSONResponse({"project_id": str(result)})
+        return BSONJSONResponse({"project_id": str(result)})
+    except DuplicateDataException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=409, content="Data already exists.")
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except DataNotCreatedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
 
 @app.put("/project")
@@ -172,29 +258,29 @@ async def update_project(projectId: str, updated_project: Project):
         await project_service.update_project(projectId, updated_project)
         return Response()
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoDataException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=422, content="No data to update.")
     except DataNotFoundException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=404, content="No data found to update.")
 
 @app.delete("/project")
 async def delete_project(projectId: str):
     """
-    프로젝트 삭제 API
+    프로젝트 삭제 API, 프로젝트를 바로 숨기고 프롬프트/대화는 background에서 삭제
 
     Returns:
-        Response: 삭제된 프로젝트 정보
+        Response: 202와 삭제 진행률, 진행률은 GET /project/{project_id}/deletion으로 조회
     """
     try:
-        await project_service.delete_project(projectId)
-        return Response()
+        result = await deletion_service.delete_project(projectId)
+        return BSONJSONResponse(status_code=202, content={"project_id": projectId, **result})
     except CollectionNotDefinedException:
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException:
@@ -202,25 +288,110 @@ async def delete_project(projectId: str):
     except DataNotFoundException:
         return Response(status_code=404, content="No data found to delete.")
 
+@app.get("/project/{project_id}/deletion")
+async def fetch_project_deletion(project_id: str):
+    """
+    프로젝트 삭제 진행률 조회 API
+
+    Returns:
+        Response: 지금까지 삭제한 프롬프트/대화/메시지 bucket 수, 삭제가 끝났으면 404
+    """
+    try:
+        result = await project_service.get_deletion(project_id)
+        return BSONJSONResponse({"project_id": project_id, **result})
+    except DataNotFoundException:
+        return Response(status_code=404, content="No deletion in progress.")
+
+@app.get("/project/{project_id}/export")
+async def export_project(project_id: str, gzip: bool = False):
+    """
+    프로젝트 내보내기 API
+
+    Args:
+        project_id (str): 프로젝트 ID
+        gzip (bool): true면 gzip으로 압축해서 전송
+
+    Returns:
+        Response: 프로젝트, 프롬프트, 대화를 한 줄씩 담은 NDJSON 파일
+    """
+    try:
+        project = await project_service.get_project(project_id)
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content=f"No data found in requested project id: {project_id}.")
+
+    content = ndjson_stream(transfer_service.export_project(project_id, project))
+    filename = f"project_{project_id}.ndjson"
+    if gzip:
+        return StreamingResponse(
+            gzip_stream(content),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.gz"'},
+        )
+    return StreamingResponse(
+        content, media_type="application/x-ndjson", headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.post("/project/import")
+async def import_project(request: Request, title: Optional[str] = None):
+    """
+    프로젝트 가져오기 API, 요청 body는 /project/{project_id}/export 결과 (gzip 가능)
+
+    Args:
+        title (str): 지정하면 파일의 프로젝트 제목 대신 사용
+
+    Returns:
+        Response: 새 프로젝트 ID와 가져온 프롬프트/대화 수, 실패한 줄
+    """
+    try:
+        result = await transfer_service.import_project(request.stream(), project_title=title)
+        return BSONJSONResponse(result)
+    except InvalidDataException as e:
+        logger.warning("Invalid import: {}", e)
+        return Response(status_code=400, content=str(e))
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=409, content="Project is being deleted.")
+    except DuplicateDataException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=409, content="Data already exists.")
+    except DataNotCreatedException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+
 @app.get("/prompts/{projectId}")
-async def create_prompt(projectId: str):
+async def create_prompt(
+    projectId: str,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[str] = Query(None, pattern=OBJECT_ID_PATTERN),
+    stream: bool = False,
+):
     """
     프롬프트 목록 호출 API
 
+    Args:
+        limit (int): 페이지 크기, 지정 시 next_cursor 반환
+        after (str): 이전 페이지의 next_cursor
+        stream (bool): true면 전체 목록을 NDJSON으로 스트리밍
+
     Returns:
         Response: 프롬프트 목록
     """
+    if stream:
+        return StreamingResponse(
+            ndjson_stream(prompt_service.iter_prompts(projectId)), media_type="application/x-ndjson"
+        )
     try:
-        result = await prompt_service.get_prompts(project_id=projectId)
-        return JSONResponse(content={"prompts": result})
+        result = await prompt_service.get_prompts(project_id=projectId, limit=limit, after=after)
+        return BSONJSONResponse(content={"prompts": result, "next_cursor": next_cursor(result, limit)})
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except DataNotFoundException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=404, content="No data found.")
 
 @app.post("/prompt")
@@ -229,20 +400,28 @@ async def create_prompt(prompt: Prompt):
     프롬프트 생성 API
 
     Returns:
-        Response: 생성된 프롬프트 정보
+        Response: 생성된 프롬프트 정보, 프로젝트가 없거나 삭제 중이면 404
     """
     try:
+        # 삭제 중인 프로젝트는 get_project에서 DataNotFoundException
+        await project_service.get_project(prompt.project_id)
         result: ObjectId = await prompt_service.create_prompt(prompt)
-        return JSONResponse(content={"prompt_id": str(result)})
+        return BSONJSONResponse(content={"prompt_id": str(result)})
+    except DuplicateDataException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=409, content="Data already exists.")
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except DataNotCreatedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
+    except (DataNotFoundException, InvalidId) as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No data found.")
 
 @app.put("/prompt")
 async def update_prompt(promptId: str, prompt: Prompt):
@@ -251,21 +430,25 @@ async def update_prompt(promptId: str, prompt: Prompt):
 
     Returns:
         Response: 수정된 프롬프트 정보
+            (읽은 뒤 다른 요청이 먼저 수정했으면 409)
     """
     try:
         await prompt_service.update_prompt(promptId, prompt)
         return Response()
+    except DuplicateDataException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=409, content="Prompt was updated concurrently, retry.")
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoDataException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=422, content="No data to update.")
     except DataNotFoundException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=404, content="No data found to update.")
 
 @app.delete("/prompt")
@@ -286,25 +469,151 @@ async def delete_prompt(promptId: str):
     except DataNotFoundException:
         return Response(status_code=404, content="No data found to delete.")
 
+@app.get("/prompt/{prompt_id}/revisions")
+async def fetch_prompt_revisions(
+    prompt_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[int] = None,
+):
+    """
+    프롬프트 수정 이력 호출 API
+
+    Args:
+        limit (int): 페이지 크기, 지정 시 next_cursor 반환
+        after (int): 이전 페이지의 next_cursor (마지막 revision 번호)
+
+    Returns:
+        Response: revision 목록 (내용 제외)
+    """
+    try:
+        result = await prompt_service.revision_service.get_revisions(prompt_id, limit=limit, after=after)
+        cursor = result[-1]["revision"] if limit and len(result) >= limit else None
+        return BSONJSONResponse(content={"revisions": result, "next_cursor": cursor})
+    except CollectionNotDefinedException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+    except NoFilterException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No prompt found.")
+
+@app.get("/prompt/{prompt_id}/revisions/{revision}")
+async def fetch_prompt_revision(prompt_id: str, revision: int):
+    """
+    프롬프트의 특정 revision 호출 API
+
+    Returns:
+        Response: revision 정보와 그 시점의 prompt_content
+    """
+    try:
+        result = await prompt_service.revision_service.get_revision(prompt_id, revision)
+        return BSONJSONResponse(content=result)
+    except CollectionNotDefinedException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+    except NoFilterException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No revision found.")
+
+@app.get("/prompt/{prompt_id}/diff")
+async def diff_prompt_revisions(
+    prompt_id: str,
+    from_revision: int = Query(..., alias="from", ge=1),
+    to_revision: int = Query(..., alias="to", ge=1),
+    context: int = Query(3, ge=0, le=100),
+):
+    """
+    프롬프트 두 revision 사이의 diff 호출 API
+
+    Args:
+        from (int): 기준 revision 번호
+        to (int): 비교할 revision 번호
+        context (int): 변경된 줄 앞뒤로 보여줄 줄 수
+
+    Returns:
+        Response: unified diff 문자열
+    """
+    try:
+        result = await prompt_service.revision_service.diff(prompt_id, from_revision, to_revision, context=context)
+        return BSONJSONResponse(content=result)
+    except CollectionNotDefinedException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+    except NoFilterException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No revision found.")
+
+@app.get("/dialogs/{project_id}")
+async def fetch_dialogs(
+    project_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[str] = Query(None, pattern=OBJECT_ID_PATTERN),
+    stream: bool = False,
+):
+    """
+    대화 목록 호출 API
+
+    Args:
+        limit (int): 페이지 크기, 지정 시 next_cursor 반환
+        after (str): 이전 페이지의 next_cursor
+        stream (bool): true면 전체 목록을 NDJSON으로 스트리밍
+
+    Returns:
+        Response: 대화 목록
+    """
+    if stream:
+        return StreamingResponse(
+            ndjson_stream(dialog_service.iter_dialogs(project_id)), media_type="application/x-ndjson"
+        )
+    try:
+        result = await dialog_service.get_dialogs(project_id=project_id, limit=limit, after=after)
+        return BSONJSONResponse(content={"dialogs": result, "next_cursor": next_cursor(result, limit)})
+    except CollectionNotDefinedException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+    except NoFilterException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No data found.")
+
 @app.get("/dialog/{project_id}")
-async def fetch_dialog(project_id: str, dialogId: str):
+async def fetch_dialog(
+    project_id: str,
+    dialogId: str,
+    last_n: Optional[int] = Query(None, ge=1),
+    before: Optional[int] = Query(None, ge=0),
+):
     """
-    대화 생성 API
+    대화 조회 API
+
+    Args:
+        last_n (int): 최근 메시지 n개만 조회
+        before (int): 이전 응답의 next_before, 그 이전 메시지를 조회
 
     Returns:
-        Response: 생성된 대화 정보
+        Response: 대화 정보
     """
     try:
-        result = await dialog_service.get_dialog(project_id, dialogId)
-        return JSONResponse(content={"dialog": result})
+        result = await dialog_service.get_dialog(project_id, dialogId, last_n=last_n, before=before)
+        return BSONJSONResponse(content={"dialog": result})
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except DataNotFoundException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=404, content="No data found.")
 
 @app.post("/dialog")
@@ -313,20 +622,24 @@ async def create_dialog(dialog: Dialog):
     대화 생성 API
 
     Returns:
-        Response: 생성된 대화 정보
+        Response: 생성된 대화 정보, 프로젝트가 없거나 삭제 중이면 404
     """
     try:
+        await project_service.get_project(dialog.project_id)
         result = await dialog_service.create_dialog(dialog)
-        return JSONResponse(content={"dialog_id": str(result)})
+        return BSONJSONResponse(content={"dialog_id": str(result)})
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except DataNotCreatedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
+    except (DataNotFoundException, InvalidId) as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No data found.")
 
 
 @app.put("/dialog")
@@ -341,16 +654,16 @@ async def update_dialog(dialogId: str, dialog: Dialog):
         await dialog_service.update_dialog(dialogId, dialog)
         return Response()
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoDataException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=422, content="No data to update.")
     except DataNotFoundException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=404, content="No data found to update.")
 
 @app.delete("/dialog")
@@ -365,16 +678,49 @@ async def delete_dialog(dialogId: str):
         await dialog_service.delete_dialog(dialogId)
         return Response()
     except CollectionNotDefinedException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except NoFilterException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=500, content="Contect to administator.")
     except DataNotFoundException as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("An error occurred: {}", e)
         return Response(status_code=404, content="No data found to delete.")
 
-@app.post("/generate")
+@app.get("/search/{project_id}")
+async def search(
+    project_id: str,
+    q: str = Query(..., min_length=1, max_length=512),
+    type: Literal["all", "prompts", "dialogs"] = "all",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """
+    프로젝트 안의 프롬프트, 대화 내용 검색 API
+
+    Args:
+        q (str): 검색어, "구문"은 구문 그대로, -단어는 제외
+        type (str): all, prompts, dialogs 중 검색할 대상
+        limit (int): 페이지 크기
+        offset (int): 이전 응답의 next_offset
+
+    Returns:
+        Response: 관련도 순 검색 결과와 검색어 위치(highlights), next_offset
+    """
+    types = SEARCH_TYPES if type == "all" else (type,)
+    try:
+        result = await search_service.search(project_id, q, types=types, limit=limit, offset=offset)
+        return BSONJSONResponse(result)
+    except InvalidDataException as e:
+        return Response(status_code=400, content=str(e))
+    except CollectionNotDefinedException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+    except NoFilterException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+
+@app.post("/generate", dependencies=[Depends(generate_rate_limit)])
 async def generate_dialog(gererate_request: GenerateRequest):
     """
     대화 생성 API
@@ -382,19 +728,182 @@ async def generate_dialog(gererate_request: GenerateRequest):
     Returns:
         Response: 생성된 대화 정보
     """
-    global generate_request_count, last_generate_request_time
+    try:
+        messages = await generate_service.prepare_messages(gererate_request)
+        ticket = await generate_scheduler.acquire(gererate_request.project_id or gererate_request.dialog_id)
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No dialog or prompt found.")
+    except TemplateException as e:
+        logger.warning("Prompt rendering failed: {}", e)
+        return Response(status_code=400, content=str(e))
+    except (QueueFullException, QueueTimeoutException) as e:
+        logger.warning("Generation rejected: {}", e)
+        return Response(status_code=503, content="Server is busy.", headers={"Retry-After": "5"})
+    except (InvalidId, InvalidDataException) as e:
+        logger.warning("Invalid id: {}", e)
+        return Response(status_code=400, content="Invalid dialog or prompt id.")
+    except Exception as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+
+    try:
+        # 생성은 연결과 별개로 끝까지 진행되며, 끊기면 GET /generate/{generation_id}로 이어받을 수 있음
+        stream = stream_registry.start(generate_service.generate(gererate_request, messages), ticket)
+        return StreamingResponse(
+            stream_registry.subscribe(stream),
+            media_type="text/event-stream",
+            headers={"X-Generation-ID": stream.generation_id},
+        )
+    except Exception as e:
+        ticket.release()
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Too Many Requests")
+
+@app.get("/generate/{generation_id}")
+async def resume_generation(
+    generation_id: str,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID", ge=0),
+):
+    """
+    생성 stream 재연결 API
+
+    Args:
+        generation_id (str): POST /generate 응답의 X-Generation-ID
+        last_event_id (int): 마지막으로 받은 SSE id, 그 이후 frame부터 전송
 
-    if (datetime.now() - last_generate_request_time).seconds > 60:
-        generate_request_count = 0
-        last_generate_request_time = datetime.now()
+    Returns:
+        Response: 이어지는 SSE stream, 보관 기간(STREAM_RETENTION)이 지났으면 404
+    """
+    stream = stream_registry.get(generation_id)
+    if stream is None:
+        return Response(status_code=404, content="No generation found.")
+    return StreamingResponse(
+        stream_registry.subscribe(stream, last_event_id),
+        media_type="text/event-stream",
+        headers={"X-Generation-ID": stream.generation_id},
+    )
 
-    if generate_request_count > 10:
-        return Response(status_code=429, content="Too Many Requests")
-    
-    generate_request_count += 1
+@app.post("/generate/batch", dependencies=[Depends(generate_rate_limit)])
+async def create_batch_job(batch_request: BatchGenerateRequest):
+    """
+    batch 생성 작업 등록 API
+    프롬프트 하나를 여러 입력에 대해 background에서 실행
 
+    Returns:
+        Response: 생성된 작업 ID, 진행률은 GET /generate/batch/{job_id}로 조회
+    """
+    if len(batch_request.inputs) > batch_service.max_inputs:
+        return Response(status_code=400, content=f"Too many inputs (max {batch_service.max_inputs}).")
     try:
-        return StreamingResponse(generate_service.generate(gererate_request))
-    except Exception as e:
-        logger.error(f"An error occurred: {str(e)}")
-        return Response(status_code=500, content="Too Many Requests")
\ No newline at end of file
+        job_id = await batch_service.create_job(batch_request)
+        return BSONJSONResponse(status_code=202, content={"job_id": job_id})
+    except CollectionNotDefinedException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=500, content="Contect to administator.")
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No prompt found.")
+
+@app.get("/generate/batch/{job_id}")
+async def fetch_batch_job(job_id: str = Path(pattern=OBJECT_ID_PATTERN)):
+    """
+    batch 생성 작업 진행률 조회 API
+
+    Returns:
+        Response: 작업 상태, 전체/성공/실패 입력 수
+    """
+    try:
+        result = await batch_service.get_job(job_id)
+        return BSONJSONResponse(content={"job": result})
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No data found.")
+
+@app.get("/generate/batch/{job_id}/results")
+async def fetch_batch_results(job_id: str = Path(pattern=OBJECT_ID_PATTERN)):
+    """
+    batch 생성 결과 다운로드 API
+
+    Returns:
+        Response: 지금까지 저장된 결과를 입력 순서대로 NDJSON으로 스트리밍, 없는 작업이면 404
+    """
+    try:
+        await batch_service.get_job(job_id)
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No data found.")
+    return StreamingResponse(ndjson_stream(batch_service.iter_results(job_id)), media_type="application/x-ndjson")
+
+@app.delete("/generate/batch/{job_id}")
+async def cancel_batch_job(job_id: str = Path(pattern=OBJECT_ID_PATTERN)):
+    """
+    batch 생성 작업 취소 API
+
+    Returns:
+        Response: 취소 결과, 이미 끝난 작업이면 409
+            (다른 replica에서 실행 중인 작업은 해당 replica가 BATCH_HEARTBEAT_INTERVAL 안에 취소)
+    """
+    try:
+        if await batch_service.cancel_job(job_id):
+            return Response(status_code=200)
+        return Response(status_code=409, content="Job is not running.")
+    except DataNotFoundException as e:
+        logger.error("An error occurred: {}", e)
+        return Response(status_code=404, content="No data found.")
+
+@app.get("/cache")
+async def fetch_cache_stats():
+    """
+    캐시 상태 조회 API
+
+    Returns:
+        Response: 프로젝트/프롬프트 조회 캐시와 생성 결과 캐시의 hit/miss 및 사용량
+    """
+    return BSONJSONResponse(content={
+        "projects": project_service.cache.stats(),
+        "prompts": prompt_service.cache.stats(),
+        "generate": response_cache.stats(),
+    })
+
+
+@app.get("/pool")
+async def fetch_pool_stats():
+    """
+    MongoDB / upstream LLM connection pool 상태 조회 API
+
+    Returns:
+        Response: MongoDB checkout 대기 시간(평균/최대), 사용 중/열린 connection 수, checkout 실패 횟수와
+            upstream endpoint별 진행 중인 요청 수, 요청 수, connect 오류 수, 생성 scheduler의 실행/대기 수
+    """
+    return BSONJSONResponse(content={
+        "mongo": mongo_client.pool_metrics.stats(),
+        "upstream": generate_service.upstream.stats(),
+        "scheduler": generate_scheduler.stats(),
+    })
+
+
+@app.get("/metrics")
+async def fetch_metrics():
+    """
+    Prometheus scrape용 metric 조회 API
+
+    Returns:
+        Response: route별 요청 수/처리 시간, MongoDB operation latency, 생성 TTFT/stream 시간/token 속도, rate limit 거절 수,
+            대화 저장 queue 깊이/flush 시간
+    """
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/traces")
+async def fetch_slow_traces(limit: int = Query(20, ge=1, le=1000)):
+    """
+    최근 느린 요청 trace 조회 API
+
+    Args:
+        limit (int): 최신 순으로 반환할 trace 수
+
+    Returns:
+        Response: TRACE_SLOW_MS 이상 걸린 요청의 request id와 route → service → MongoDB / upstream span 목록
+    """
+    return BSONJSONResponse(content=recorder.recent(limit))
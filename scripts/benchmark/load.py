@@ -0,0 +1,365 @@
+"""
+FastAPI app을 local mongod와 mock LLM 서버에 연결해 띄우고, 고정된 동시성으로 섞인 요청을 보내는 부하 테스트
+
+- --mongo-uri가 없으면 PATH의 mongod를 임시 디렉토리로 띄우고 끝나면 정리
+- 매 실행마다 새 database(bench_<timestamp>)에 데이터를 만들고 끝나면 삭제
+- workload별 RPS, p50/p95/p99, 오류 수와 app 프로세스의 RSS를 출력하고 baseline과 비교
+
+    uv run python -m scripts.benchmark.load [--concurrency 32] [--duration 30] [--mix list=4,detail=3,dialog=2,generate=1]
+    uv run python -m scripts.benchmark.load --save-baseline   # 결과를 baselines/load.json에 저장
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from pymongo import MongoClient
+
+ROOT = Path(__file__).resolve().parents[2]
+BASELINE = Path(__file__).resolve().parent / "baselines" / "load.json"
+WORKLOADS = ("list", "prompts", "detail", "dialog", "generate")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))], 2)
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """/proc에서 읽은 프로세스 RSS(MB), /proc이 없는 OS면 None"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in WORKLOADS:
+            raise SystemExit(f"Unknown workload: {name} (choose from {', '.join(WORKLOADS)})")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"Process exited before {url} was ready")
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"Timed out waiting for {url}")
+
+
+@contextmanager
+def processes():
+    started: List[subprocess.Popen] = []
+    try:
+        yield started
+    finally:
+        for process in reversed(started):
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def start_mongod(started: List[subprocess.Popen], dbpath: str) -> str:
+    mongod = shutil.which("mongod")
+    if mongod is None:
+        raise SystemExit("mongod not found in PATH, pass --mongo-uri")
+    port = free_port()
+    started.append(subprocess.Popen(
+        [mongod, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+    ))
+    uri = f"mongodb://127.0.0.1:{port}/"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            MongoClient(uri, serverSelectionTimeoutMS=500).admin.command("ping")
+            return uri
+        except Exception:
+            if time.monotonic() > deadline:
+                raise SystemExit("Timed out waiting for mongod")
+            time.sleep(0.2)
+
+
+async def seed(client: httpx.AsyncClient, projects: int, prompts: int, dialogs: int, messages: int) -> Dict[str, list]:
+    """프로젝트마다 프롬프트와 대화를 만들고 요청에 쓸 ID 목록을 반환"""
+    data: Dict[str, list] = {"projects": [], "dialogs": []}
+    for p in range(projects):
+        response = await client.post("/project", json={"project_title": f"bench project {p}"})
+        response.raise_for_status()
+        project_id = response.json()["project_id"]
+        data["projects"].append(project_id)
+        for v in range(prompts):
+            response = await client.post("/prompt", json={
+                "project_id": project_id,
+                "prompt_version": f"v{v}",
+                "prompt_content": f"You are benchmark assistant {v}. Answer briefly.",
+            })
+            response.raise_for_status()
+        for d in range(dialogs):
+            content = [
+                {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " * 20}
+                for i in range(messages)
+            ]
+            response = await client.post(
+                "/dialog", json={"project_id": project_id, "dialog_title": f"dialog {d}", "dialog_content": content}
+            )
+            response.raise_for_status()
+            data["dialogs"].append((project_id, response.json()["dialog_id"]))
+    return data
+
+
+async def request(client: httpx.AsyncClient, workload: str, data: Dict[str, list], rng: random.Random) -> Dict:
+    """요청 1건을 보내고 status와 (generate면) 첫 frame까지의 시간을 반환"""
+    project_id = rng.choice(data["projects"])
+    if workload == "list":
+        response = await client.get("/projects", params={"limit": 20})
+    elif workload == "prompts":
+        response = await client.get(f"/prompts/{project_id}", params={"limit": 20})
+    elif workload == "detail":
+        response = await client.get("/project", params={"projectId": project_id, "limit": 20})
+    elif workload == "dialog":
+        project_id, dialog_id = rng.choice(data["dialogs"])
+        response = await client.get(f"/dialog/{project_id}", params={"dialogId": dialog_id, "last_n": 20})
+    else:
+        project_id, dialog_id = rng.choice(data["dialogs"])
+        body = {"dialog_id": dialog_id, "project_id": project_id, "user_input": f"question {rng.random()}"}
+        started = time.perf_counter()
+        ttft = None
+        async with client.stream("POST", "/generate", json=body) as response:
+            async for line in response.aiter_lines():
+                if ttft is None and line.startswith("data:"):
+                    ttft = (time.perf_counter() - started) * 1000
+        return {"status": response.status_code, "ttft_ms": ttft}
+    return {"status": response.status_code, "ttft_ms": None}
+
+
+async def drive(
+    client: httpx.AsyncClient, data: Dict[str, list], weights: Dict[str, int], concurrency: int, duration: float,
+    seed_value: int,
+) -> Dict[str, Dict[str, list]]:
+    samples = {name: {"latency_ms": [], "ttft_ms": [], "errors": []} for name in weights}
+    names, weight_values = list(weights), list(weights.values())
+    deadline = time.monotonic() + duration
+
+    async def worker(index: int):
+        rng = random.Random(seed_value + index)
+        while time.monotonic() < deadline:
+            workload = rng.choices(names, weights=weight_values)[0]
+            started = time.perf_counter()
+            try:
+                result = await request(client, workload, data, rng)
+            except httpx.HTTPError as e:
+                samples[workload]["errors"].append(type(e).__name__)
+                continue
+            samples[workload]["latency_ms"].append((time.perf_counter() - started) * 1000)
+            if result["status"] >= 400:
+                samples[workload]["errors"].append(str(result["status"]))
+            if result["ttft_ms"] is not None:
+                samples[workload]["ttft_ms"].append(result["ttft_ms"])
+
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return samples
+
+
+async def sample_memory(pid: int, readings: List[float], stop: asyncio.Event):
+    while not stop.is_set():
+        value = rss_mb(pid)
+        if value is not None:
+            readings.append(value)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+def summarize(samples: Dict[str, Dict[str, list]], duration: float, memory: List[float], config: Dict) -> Dict:
+    workloads = {}
+    for name, sample in samples.items():
+        latencies = sample["latency_ms"]
+        workloads[name] = {
+            "requests": len(latencies),
+            "errors": len(sample["errors"]),
+            "rps": round(len(latencies) / duration, 2),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+        if sample["ttft_ms"]:
+            workloads[name]["ttft_p50_ms"] = percentile(sample["ttft_ms"], 50)
+            workloads[name]["ttft_p95_ms"] = percentile(sample["ttft_ms"], 95)
+    all_latencies = [value for sample in samples.values() for value in sample["latency_ms"]]
+    return {
+        "config": config,
+        "total": {
+            "requests": len(all_latencies),
+            "errors": sum(len(sample["errors"]) for sample in samples.values()),
+            "rps": round(len(all_latencies) / duration, 2),
+            "p50_ms": percentile(all_latencies, 50),
+            "p95_ms": percentile(all_latencies, 95),
+            "p99_ms": percentile(all_latencies, 99),
+        },
+        "workloads": workloads,
+        "memory_mb": {
+            "start": memory[0] if memory else None,
+            "peak": max(memory) if memory else None,
+            "end": memory[-1] if memory else None,
+        },
+    }
+
+
+def _change(current, previous) -> str:
+    if current is None or not previous:
+        return ""
+    return f"({(current - previous) / previous * 100:+.1f}%)"
+
+
+def report(result: Dict, baseline: Optional[Dict]):
+    previous = (baseline or {}).get("workloads", {})
+    print(f"{'workload':<10} {'req':>7} {'err':>5} {'rps':>14} {'p50':>16} {'p95':>16} {'p99':>16}")
+    rows = [*result["workloads"].items(), ("total", result["total"])]
+    for name, row in rows:
+        before = (baseline or {}).get("total", {}) if name == "total" else previous.get(name, {})
+        cells = [
+            f"{row[key]}{_change(row[key], before.get(key))}" if row[key] is not None else "-"
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(f"{name:<10} {row['requests']:>7} {row['errors']:>5} " + " ".join(f"{cell:>16}" for cell in cells))
+    memory = result["memory_mb"]
+    print(f"app RSS MB: start={memory['start']} peak={memory['peak']} end={memory['end']}")
+    if baseline and baseline.get("config") != result["config"]:
+        print("warning: baseline was recorded with a different config, comparison is approximate")
+
+
+async def run(args):
+    weights = parse_mix(args.mix)
+    database = f"bench_{int(time.time())}"
+    llm_port, app_port = free_port(), free_port()
+    config = {
+        "concurrency": args.concurrency, "duration": args.duration, "mix": weights,
+        "ttft_ms": args.ttft_ms, "tokens_per_second": args.tokens_per_second, "tokens": args.tokens,
+        "projects": args.projects, "prompts": args.prompts, "dialogs": args.dialogs, "messages": args.messages,
+    }
+
+    with processes() as started, tempfile.TemporaryDirectory() as dbpath:
+        mongo_uri = args.mongo_uri or start_mongod(started, dbpath)
+
+        llm = subprocess.Popen([
+            sys.executable, "-m", "scripts.benchmark.mock_llm", "--port", str(llm_port),
+            "--ttft-ms", str(args.ttft_ms), "--tokens-per-second", str(args.tokens_per_second),
+            "--tokens", str(args.tokens),
+        ], cwd=ROOT)
+        started.append(llm)
+
+        env = {
+            **os.environ,
+            "ENV": "PROD",  # .env를 읽지 않고 아래 설정만 사용
+            "MONGO_URI": mongo_uri,
+            "MONGO_DB_NAME": database,
+            "API_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+            "API_KEY": "benchmark",
+            "MODEL_NAME": "mock",
+            "RATE_LIMIT_PER_MINUTE": "1000000",
+            "RATE_LIMIT_BURST": "1000000",
+            "GENERATE_MAX_CONCURRENCY": str(args.concurrency),
+            "GENERATE_MAX_QUEUE": str(args.concurrency * 4),
+            "LOG_FILE": "",
+            "LOG_LEVEL": "WARNING",
+            **dict(item.split("=", 1) for item in args.env),
+        }
+        app = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning",
+             "--no-access-log"],
+            cwd=ROOT, env=env,
+        )
+        started.append(app)
+
+        base_url = f"http://127.0.0.1:{app_port}"
+        await wait_ready(f"http://127.0.0.1:{llm_port}/docs", llm)
+        await wait_ready(f"{base_url}/health", app)
+
+        limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+        try:
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+                data = await seed(client, args.projects, args.prompts, args.dialogs, args.messages)
+                if args.warmup > 0:
+                    await drive(client, data, weights, args.concurrency, args.warmup, args.seed)
+
+                memory: List[float] = []
+                stop = asyncio.Event()
+                sampler = asyncio.create_task(sample_memory(app.pid, memory, stop))
+                started_at = time.perf_counter()
+                samples = await drive(client, data, weights, args.concurrency, args.duration, args.seed)
+                elapsed = time.perf_counter() - started_at
+                stop.set()
+                await sampler
+        finally:
+            if not args.keep_data:
+                MongoClient(mongo_uri).drop_database(database)
+
+    result = summarize(samples, elapsed, memory, config)
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() and not args.save_baseline else None
+    report(result, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+    if args.save_baseline:
+        BASELINE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Saved baseline to {BASELINE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the app against local mongod and a mock LLM server")
+    parser.add_argument("--mongo-uri", help="existing mongod to use instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before the run")
+    parser.add_argument("--mix", default="list=4,prompts=2,detail=3,dialog=2,generate=1", help="workload weights")
+    parser.add_argument("--ttft-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--tokens", type=int, default=128)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--prompts", type=int, default=10, help="prompts per project")
+    parser.add_argument("--dialogs", type=int, default=10, help="dialogs per project")
+    parser.add_argument("--messages", type=int, default=40, help="messages per dialog")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra app env, repeatable")
+    parser.add_argument("--output", help="write the result JSON to this path")
+    parser.add_argument("--save-baseline", action="store_true", help=f"overwrite {BASELINE.name}")
+    parser.add_argument("--keep-data", action="store_true", help="keep the benchmark database")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,237 @@
+"""
+Mongo/LLM 없이 hot path 함수만 반복 실행하는 microbenchmark
+
+- serialize: 문서 10k개를 필드별 문자열 변환 후 json.dumps 하던 방식과 utils.serialize.dumps 비교
+- sse: upstream chunk를 coalesce로 묶고 format_sse로 frame을 만드는 처리량 (events/sec)과,
+  chunk가 실제처럼 간격을 두고 오는 stream 여러 개를 동시에 처리할 때 stream 1개당 CPU 시간
+- logging: 요청 1건(access log + chunk별 sampled debug log)의 처리 비용, handler 없음과 QueueSink 비교
+- template: 캐시된 컴파일 결과로 렌더링할 때와 매번 컴파일할 때의 처리량
+
+    uv run python -m scripts.benchmark.micro [--only serialize,sse] [--repeat 5] [--save-baseline]
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from bson import ObjectId
+from loguru import logger
+
+from better_assistant.utils.log import QueueSink, sampled
+from better_assistant.utils.metrics import MetricsMiddleware
+from better_assistant.utils.serialize import dumps
+from better_assistant.utils.sse import coalesce, format_sse
+from better_assistant.utils.template import compile_template, render_template
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "micro.json"
+
+
+def measure(func: Callable[[], int], repeat: int, clock: Callable[[], float] = time.perf_counter) -> Dict[str, float]:
+    """
+    func를 repeat번 실행해 가장 빠른 회차의 초당 처리 수와 1건당 시간(us)을 반환, func는 처리한 건수를 반환
+    clock에 time.process_time을 넘기면 대기 시간을 뺀 CPU 시간 기준
+    """
+    best = None
+    for _ in range(repeat):
+        started = clock()
+        count = func()
+        elapsed = clock() - started
+        if best is None or elapsed / count < best:
+            best = elapsed / count
+    return {"ops_per_sec": round(1 / best, 1), "us_per_op": round(best * 1_000_000, 3)}
+
+
+def _documents(count: int) -> list:
+    now = datetime.now()
+    return [
+        {
+            "_id": ObjectId(),
+            "project_id": str(ObjectId()),
+            "prompt_version": f"v{index}",
+            "prompt_content": "프롬프트 내용 " * 20,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for index in range(count)
+    ]
+
+
+def _stringify(document: dict) -> dict:
+    # user-012 이전에 응답 전 문서마다 적용하던 변환
+    for key, value in document.items():
+        if isinstance(value, datetime):
+            document[key] = value.strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(value, ObjectId):
+            document[key] = value.__str__()
+    return document
+
+
+def bench_serialize(repeat: int) -> Dict[str, Dict[str, float]]:
+    count = 10_000
+
+    def stringify_then_json():
+        documents = [_stringify(document) for document in _documents(count)]
+        json.dumps(documents, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+        return count
+
+    def one_pass():
+        dumps(_documents(count))
+        return count
+
+    def build_only():
+        _documents(count)
+        return count
+
+    return {
+        # 문서 생성 비용은 build_only로 따로 측정해 두 방식 모두에서 빼고 비교
+        "build_only": measure(build_only, repeat),
+        "stringify_then_json": measure(stringify_then_json, repeat),
+        "dumps": measure(one_pass, repeat),
+    }
+
+
+def bench_sse(repeat: int) -> Dict[str, Dict[str, float]]:
+    count = 50_000
+
+    async def chunks():
+        for index in range(count):
+            yield f"tok{index} "
+
+    async def frames(flush_interval: float):
+        event_id = 0
+        async for text in coalesce(chunks(), flush_interval, 512):
+            event_id += 1
+            format_sse(text, event_id=event_id)
+        return count
+
+    streams = 200
+    chunks_per_stream = 100
+
+    async def paced_chunks():
+        # upstream token 간격, 두 방식에 같은 sleep 비용이 포함됨
+        for index in range(chunks_per_stream):
+            await asyncio.sleep(0.001)
+            yield f"tok{index} "
+
+    async def stream(flush_interval: float):
+        event_id = 0
+        async for text in coalesce(paced_chunks(), flush_interval, 512):
+            event_id += 1
+            format_sse(text, event_id=event_id)
+
+    async def concurrent(flush_interval: float):
+        await asyncio.gather(*(stream(flush_interval) for _ in range(streams)))
+        return streams
+
+    return {
+        "passthrough": measure(lambda: asyncio.run(frames(0)), repeat),
+        "coalesced": measure(lambda: asyncio.run(frames(0.05)), repeat),
+        # us_per_op는 stream 1개(chunk 100개)당 CPU 시간
+        "stream_cpu_passthrough": measure(lambda: asyncio.run(concurrent(0)), repeat, time.process_time),
+        "stream_cpu_coalesced": measure(lambda: asyncio.run(concurrent(0.05)), repeat, time.process_time),
+    }
+
+
+def bench_logging(repeat: int) -> Dict[str, Dict[str, float]]:
+    count = 5_000
+    chunks_per_request = 50
+    events = sampled()
+    scope = {"type": "http", "method": "POST", "path": "/generate", "headers": []}
+
+    async def handler(scope, receive, send):
+        # /generate처럼 chunk마다 sampled debug log를 남기는 요청
+        for index in range(chunks_per_request):
+            events.debug("Upstream chunk {}: {} chars", index, 5)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    app = MetricsMiddleware(handler)
+
+    async def send(message):
+        pass
+
+    async def requests():
+        for _ in range(count):
+            await app(scope, None, send)
+        return count
+
+    def run():
+        return asyncio.run(requests())
+
+    results = {}
+    logger.remove()
+    results["off"] = measure(run, repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        for name, serialize, level in (("text", False, "INFO"), ("json", True, "INFO"), ("json_debug", True, "DEBUG")):
+            # 요청마다 access log 1건 + DEBUG일 때 chunk log 50건 중 LOG_SAMPLE_RATE 비율
+            sink = QueueSink(str(Path(directory) / f"{name}.log"), serialize, max_size=count * repeat)
+            handler_id = logger.add(sink.write, level=level, format="{message}", catch=False)
+            results[f"queue_{name}"] = measure(run, repeat)
+            logger.remove(handler_id)
+            sink.stop()
+    return results
+
+
+def bench_template(repeat: int) -> Dict[str, Dict[str, float]]:
+    count = 20_000
+    source = (
+        "You are {{ assistant.name }}, helping with {{ topic }}.\n"
+        "{% if vip %}Answer in detail.{% else %}Answer briefly.{% endif %}\n"
+        "{% include 'rules' %}\nUser: {{ input }}"
+    )
+    templates = {"rules": compile_template("- be polite\n- cite {{ topic }} sources\n")}
+    variables = {"assistant": {"name": "bench"}, "topic": "benchmarks", "vip": False, "input": "hello"}
+    compiled = compile_template(source)
+
+    def cached():
+        for _ in range(count):
+            render_template(compiled, variables, templates)
+        return count
+
+    def compile_each():
+        for _ in range(count):
+            render_template(compile_template(source), variables, templates)
+        return count
+
+    return {"cached": measure(cached, repeat), "compile_each": measure(compile_each, repeat)}
+
+
+BENCHMARKS = {
+    "serialize": bench_serialize,
+    "sse": bench_sse,
+    "logging": bench_logging,
+    "template": bench_template,
+}
+
+
+def report(results: Dict[str, Dict[str, Dict[str, float]]], baseline: Optional[Dict]):
+    previous = (baseline or {}).get("results", {})
+    print(f"{'benchmark':<30} {'ops/sec':>14} {'us/op':>10} {'vs baseline':>12}")
+    for group, cases in results.items():
+        for case, result in cases.items():
+            before = previous.get(group, {}).get(case)
+            change = ""
+            if before:
+                change = f"{(result['ops_per_sec'] - before['ops_per_sec']) / before['ops_per_sec'] * 100:+.1f}%"
+            print(f"{group + '.' + case:<30} {result['ops_per_sec']:>14} {result['us_per_op']:>10} {change:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmarks for serialization, SSE, logging and templates")
+    parser.add_argument("--only", help=f"comma separated subset of {','.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save-baseline", action="store_true", help=f"overwrite {BASELINE.name}")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    results = {name: BENCHMARKS[name](args.repeat) for name in names}
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() and not args.save_baseline else None
+    report(results, baseline)
+    if args.save_baseline:
+        BASELINE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE.write_text(json.dumps({"repeat": args.repeat, "results": results}, indent=2) + "\n")
+        print(f"Saved baseline to {BASELINE}")
@@ -0,0 +1,99 @@
+"""
+benchmark용 OpenAI 호환 chat completion mock 서버
+
+첫 token까지 --ttft-ms만큼 기다린 뒤 --tokens-per-second 속도로 --tokens개의 token을 SSE로 흘려보냄
+stream=false 요청에는 같은 내용을 한 번에 반환
+
+    uv run python -m scripts.benchmark.mock_llm [--port 8100] [--ttft-ms 200] [--tokens-per-second 50] [--tokens 128]
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI()
+app.state.ttft = 0.2
+app.state.token_interval = 0.02
+app.state.tokens = 128
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None, usage=None) -> bytes:
+    body = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if usage is None else [],
+    }
+    if usage is not None:
+        body["usage"] = usage
+    return f"data: {json.dumps(body)}\n\n".encode("utf-8")
+
+
+def _usage(messages: list, tokens: int) -> dict:
+    prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in messages)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": tokens, "total_tokens": prompt_tokens + tokens}
+
+
+async def _stream(completion_id: str, model: str, messages: list, include_usage: bool):
+    await asyncio.sleep(app.state.ttft)
+    yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+    started = time.perf_counter()
+    for index in range(app.state.tokens):
+        # 누적 오차 없이 일정한 속도를 유지하도록 시작 시각 기준으로 대기
+        delay = started + index * app.state.token_interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        yield _chunk(completion_id, model, {"content": f"tok{index} "})
+    yield _chunk(completion_id, model, {}, finish_reason="stop")
+    if include_usage:
+        yield _chunk(completion_id, model, {}, usage=_usage(messages, app.state.tokens))
+    yield b"data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    model = body.get("model") or "mock"
+    messages = body.get("messages", [])
+
+    if body.get("stream"):
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        return StreamingResponse(
+            _stream(completion_id, model, messages, include_usage), media_type="text/event-stream"
+        )
+
+    await asyncio.sleep(app.state.ttft + app.state.tokens * app.state.token_interval)
+    return JSONResponse({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(f"tok{index} " for index in range(app.state.tokens))},
+            "finish_reason": "stop",
+        }],
+        "usage": _usage(messages, app.state.tokens),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI compatible streaming mock server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ttft-ms", type=float, default=200, help="delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--tokens", type=int, default=128, help="tokens per completion")
+    args = parser.parse_args()
+
+    app.state.ttft = args.ttft_ms / 1000
+    app.state.token_interval = 1 / args.tokens_per_second if args.tokens_per_second > 0 else 0.0
+    app.state.tokens = args.tokens
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
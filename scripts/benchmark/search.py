@@ -0,0 +1,123 @@
+"""
+대화 메시지 검색에서 text index($text)와 regex scan($regex)의 latency 비교
+
+local mongod에 --dialogs x --messages개(기본 10k x 100 = 1M) 메시지를 embedded 방식으로 만들고
+app과 같은 index(utils.indexes.INDEXES)를 만든 뒤, 자주/드물게 나오는 단어로 프로젝트 범위 검색을 반복
+
+    uv run python -m scripts.benchmark.search [--mongo-uri mongodb://localhost:27017] [--queries 50]
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from pymongo import AsyncMongoClient
+
+from better_assistant.utils.indexes import ensure_indexes
+from scripts.benchmark.load import percentile, processes, start_mongod
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "search.json"
+VOCABULARY = 50_000
+WORDS_PER_MESSAGE = 20
+
+
+def _word(rng: random.Random) -> str:
+    # Zipf에 가까운 분포: 앞쪽 단어일수록 자주 나옴
+    return f"w{int(VOCABULARY ** rng.random()) - 1}"
+
+
+async def seed(db, projects: int, dialogs: int, messages: int, rng: random.Random):
+    batch = []
+    for index in range(dialogs):
+        batch.append({
+            "project_id": f"project{index % projects}",
+            "dialog_title": f"dialog {index}",
+            "dialog_content": [
+                {"role": "user" if i % 2 == 0 else "assistant",
+                 "content": " ".join(_word(rng) for _ in range(WORDS_PER_MESSAGE))}
+                for i in range(messages)
+            ],
+        })
+        if len(batch) >= 200:
+            await db.dialogs.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.dialogs.insert_many(batch, ordered=False)
+
+
+async def measure(db, filters: List[Dict], sort) -> List[float]:
+    latencies = []
+    for filter in filters:
+        started = time.perf_counter()
+        await db.dialogs.find(filter, {"_id": 1}, sort=sort, limit=20).to_list(None)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    database = f"bench_search_{int(time.time())}"
+    with processes() as started, tempfile.TemporaryDirectory() as dbpath:
+        mongo_uri = args.mongo_uri or start_mongod(started, dbpath)
+        client = AsyncMongoClient(mongo_uri)
+        db = client.get_database(database)
+        try:
+            started_at = time.perf_counter()
+            await seed(db, args.projects, args.dialogs, args.messages, rng)
+            await ensure_indexes(db)
+            print(f"Seeded {args.dialogs * args.messages} messages in {time.perf_counter() - started_at:.1f}s")
+
+            results = {}
+            for frequency, words in (
+                ("common", [f"w{rng.randrange(10)}" for _ in range(args.queries)]),
+                ("rare", [f"w{rng.randrange(VOCABULARY // 2, VOCABULARY)}" for _ in range(args.queries)]),
+            ):
+                projects = [f"project{rng.randrange(args.projects)}" for _ in words]
+                text = await measure(
+                    db,
+                    [{"project_id": p, "$text": {"$search": w}} for p, w in zip(projects, words)],
+                    [("score", {"$meta": "textScore"})],
+                )
+                regex = await measure(
+                    db,
+                    [{"project_id": p, "dialog_content.content": {"$regex": w, "$options": "i"}}
+                     for p, w in zip(projects, words)],
+                    None,
+                )
+                for method, latencies in (("text", text), ("regex", regex)):
+                    results[f"{method}.{frequency}"] = {
+                        "p50_ms": percentile(latencies, 50),
+                        "p95_ms": percentile(latencies, 95),
+                        "p99_ms": percentile(latencies, 99),
+                    }
+        finally:
+            if not args.keep_data:
+                await client.drop_database(database)
+            await client.close()
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() and not args.save_baseline else None
+    print(f"{'query':<16} {'p50':>10} {'p95':>10} {'p99':>10} {'baseline p95':>14}")
+    for name, row in results.items():
+        before = ((baseline or {}).get("results", {}).get(name) or {}).get("p95_ms")
+        print(f"{name:<16} {row['p50_ms']:>10} {row['p95_ms']:>10} {row['p99_ms']:>10} {str(before or '-'):>14}")
+    if args.save_baseline:
+        config = {key: getattr(args, key) for key in ("projects", "dialogs", "messages", "queries", "seed")}
+        BASELINE.write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+        print(f"Saved baseline to {BASELINE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare $text and $regex search latency on dialog messages")
+    parser.add_argument("--mongo-uri", help="existing mongod to use instead of starting one")
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--dialogs", type=int, default=10_000)
+    parser.add_argument("--messages", type=int, default=100, help="messages per dialog")
+    parser.add_argument("--queries", type=int, default=50, help="queries per method and word frequency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", action="store_true", help=f"overwrite {BASELINE.name}")
+    parser.add_argument("--keep-data", action="store_true", help="keep the benchmark database")
+    asyncio.run(run(parser.parse_args()))
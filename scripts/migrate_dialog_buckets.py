@@ -0,0 +1,167 @@
+"""
+embedded 방식(dialog_content 배열)으로 저장된 대화를 bucketed 방식(dialog_messages collection)으로 옮기는 스크립트
+
+app을 DIALOG_STORAGE=embedded로 실행 중인 상태에서 돌리고, 끝난 뒤 bucketed로 전환
+옮기는 동안 bucketed 방식으로 실행 중인 app이 있으면 안 됨 (message_count를 함께 증가시켜 위치가 겹침)
+
+- bucket은 $set으로 덮어쓰므로 중간에 중단되어도 다시 실행하면 이어서 진행됨
+- 마지막 update는 읽은 시점의 dialog_content 길이와 message_count가 그대로일 때만 적용되므로, 옮기는 사이 app이
+  메시지를 추가한 대화는 그대로 남고 다음 실행에서 다시 옮김
+- 이미 옮긴 뒤 dialog_content에 다시 쌓인 메시지는 message_count 뒤에 이어 붙임
+- 마지막으로 project_id 없이 저장된 bucket에 대화의 project_id를 채움 (프로젝트 범위 검색용)
+
+    uv run python -m scripts.migrate_dialog_buckets [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+
+from bson import ObjectId
+from loguru import logger
+
+import better_assistant  # noqa: F401  (.env 로드)
+from better_assistant.exceptions import DataNotFoundException
+from better_assistant.models import MongoFilter, MongoUpdate
+from better_assistant.utils import MongoClientWrapper
+
+
+async def _partial_bucket(mongo_client: MongoClientWrapper, dialog_id: str, base: int, bucket_size: int) -> list:
+    """base가 bucket 중간이면 그 bucket에 이미 있는 base 이전 메시지 반환"""
+    if base % bucket_size == 0:
+        return []
+    filter_obj = (
+        MongoFilter()
+        .equals("dialog_id", dialog_id)
+        .equals("seq", base // bucket_size)
+        .fields(["messages"])
+        .build_with_projection()
+        )
+    try:
+        bucket = (await mongo_client.find(filter_obj, collection_name="dialog_messages"))[0]
+    except DataNotFoundException:
+        return []
+    return [msg for msg in bucket.get("messages", []) if msg["index"] < base]
+
+
+async def migrate(dry_run: bool):
+    mongo_client = MongoClientWrapper()
+    bucket_size = int(os.getenv("DIALOG_BUCKET_SIZE", "100"))
+    filter_obj = (
+        MongoFilter()
+        .exists("dialog_content.0")
+        .fields(["_id", "project_id", "dialog_content", "message_count"])
+        .build_with_projection()
+        )
+
+    migrated = 0
+    migrated_msgs = 0
+    async for dialog in mongo_client.find_iter(filter_obj, collection_name="dialogs"):
+        dialog_id = str(dialog["_id"])
+        msgs = dialog["dialog_content"]
+        base = dialog.get("message_count")
+
+        if not dry_run:
+            start = base or 0
+            bucket_msgs = await _partial_bucket(mongo_client, dialog_id, start, bucket_size)
+            bucket_msgs += [
+                {"content": msg["content"], "role": msg["role"], "index": index}
+                for index, msg in enumerate(msgs, start=start)
+            ]
+            first_seq = start // bucket_size
+            operations = []
+            for offset in range(0, len(bucket_msgs), bucket_size):
+                operations.append((
+                    MongoFilter().equals("dialog_id", dialog_id).equals("seq", first_seq + offset // bucket_size).build(),
+                    MongoUpdate()
+                    .set("messages", bucket_msgs[offset:offset + bucket_size])
+                    .set("project_id", dialog["project_id"])
+                    .build(),
+                ))
+            failed = await mongo_client.bulk_update(operations, collection_name="dialog_messages", upsert=True)
+            if failed:
+                logger.error("Failed to write {} buckets for dialog {}, skipping", len(failed), dialog_id)
+                continue
+
+            # 읽은 뒤 메시지가 추가됐으면 적용하지 않음
+            guard = MongoFilter().equals("_id", dialog["_id"]).array_size("dialog_content", len(msgs))
+            if base is None:
+                guard.exists("message_count", False)
+            else:
+                guard.equals("message_count", base)
+            try:
+                await mongo_client.update(
+                    guard.build(),
+                    MongoUpdate().set("message_count", start + len(msgs)).set("dialog_content", []).build(),
+                    collection_name="dialogs",
+                )
+            except DataNotFoundException:
+                logger.warning("Dialog {} changed while migrating, leaving it for the next run", dialog_id)
+                continue
+
+        migrated += 1
+        migrated_msgs += len(msgs)
+        if migrated % 1000 == 0:
+            logger.info("Migrated {} dialogs ({} messages)", migrated, migrated_msgs)
+
+    logger.info("Done: {} dialogs, {} messages{}", migrated, migrated_msgs, " (dry run)" if dry_run else "")
+    backfilled = await backfill_project_ids(mongo_client, dry_run)
+    logger.info("Set project_id on {} buckets{}", backfilled, " (dry run)" if dry_run else "")
+
+
+async def backfill_project_ids(mongo_client: MongoClientWrapper, dry_run: bool, batch_size: int = 500) -> int:
+    """project_id가 없는 bucket에 대화의 project_id를 채우고 채운 bucket 수 반환"""
+    filter_obj = (
+        MongoFilter()
+        .exists("project_id", False)
+        .fields(["_id", "dialog_id"])
+        .build_with_projection()
+        )
+    backfilled = 0
+    buckets = []
+    async for bucket in mongo_client.find_iter(filter_obj, collection_name="dialog_messages", batch_size=batch_size):
+        buckets.append(bucket)
+        if len(buckets) >= batch_size:
+            backfilled += await _set_project_ids(mongo_client, buckets, dry_run)
+            buckets = []
+    if buckets:
+        backfilled += await _set_project_ids(mongo_client, buckets, dry_run)
+    return backfilled
+
+
+async def _set_project_ids(mongo_client: MongoClientWrapper, buckets: list, dry_run: bool) -> int:
+    dialog_ids = list({bucket["dialog_id"] for bucket in buckets})
+    filter_obj = (
+        MongoFilter()
+        .in_list("_id", [ObjectId(dialog_id) for dialog_id in dialog_ids])
+        .fields(["_id", "project_id"])
+        .build_with_projection()
+        )
+    try:
+        dialogs = await mongo_client.find(filter_obj, collection_name="dialogs")
+    except DataNotFoundException:
+        dialogs = []
+    project_ids = {str(dialog["_id"]): dialog["project_id"] for dialog in dialogs}
+    # 대화가 이미 삭제된 bucket은 건너뜀
+    operations = [
+        (
+            MongoFilter().equals("_id", bucket["_id"]).build(),
+            MongoUpdate().set("project_id", project_ids[bucket["dialog_id"]]).build(),
+        )
+        for bucket in buckets
+        if bucket["dialog_id"] in project_ids
+    ]
+    if dry_run or not operations:
+        return len(operations)
+    failed = await mongo_client.bulk_update(operations, collection_name="dialog_messages")
+    if failed:
+        logger.error("Failed to set project_id on {} buckets", len(failed))
+    return len(operations) - len(failed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move dialog_content arrays into dialog_messages buckets and backfill bucket project_id"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="count dialogs and messages without writing")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.dry_run))
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+import pytest
+from pymongo import AsyncMongoClient, MongoClient
+
+from better_assistant.utils.indexes import INDEXES, QUERY_SHAPES, ensure_indexes, explain_query, uses_index
+
+
+def test_query_shapes_cover_indexed_collections():
+    assert set(INDEXES) <= {collection_name for collection_name, _, _ in QUERY_SHAPES}
+
+
+@pytest.fixture(scope="module")
+def mongo_uri():
+    """MONGO_URI가 있으면 사용하고, 없으면 PATH의 mongod를 임시 dbpath로 실행"""
+    uri = os.getenv("MONGO_URI")
+    if uri:
+        yield uri
+        return
+    if shutil.which("mongod") is None:
+        pytest.skip("MONGO_URI is not set and mongod is not in PATH")
+
+    from scripts.benchmark.load import processes, start_mongod
+
+    with processes() as started, tempfile.TemporaryDirectory() as dbpath:
+        yield start_mongod(started, dbpath)
+
+
+@pytest.fixture(scope="module")
+def database(mongo_uri):
+    name = f"test_indexes_{int(time.time() * 1000)}"
+
+    async def setup():
+        client = AsyncMongoClient(mongo_uri)
+        db = client.get_database(name)
+        # index 선언이 없는 collection도 있어야 explain이 EOF가 아닌 실제 plan을 반환
+        existing = await db.list_collection_names()
+        for collection_name in {collection_name for collection_name, _, _ in QUERY_SHAPES} - set(existing):
+            await db.create_collection(collection_name)
+        await ensure_indexes(db)
+        await client.close()
+
+    asyncio.run(setup())
+    yield name
+    MongoClient(mongo_uri).drop_database(name)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "collection_name, filter, sort",
+    QUERY_SHAPES,
+    ids=[f"{shape[0]}-{index}" for index, shape in enumerate(QUERY_SHAPES)],
+)
+async def test_query_uses_index(mongo_uri, database, collection_name, filter, sort):
+    client = AsyncMongoClient(mongo_uri)
+    try:
+        plan = await explain_query(client.get_database(database), collection_name, filter, sort)
+    finally:
+        await client.close()
+    assert uses_index(plan), f"{collection_name} {filter} sort={sort}: {plan['queryPlanner']['winningPlan']}"
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from better_assistant.exceptions import QueueTimeoutException
+from better_assistant.managers import scheduler as scheduler_module
+from better_assistant.managers.scheduler import GenerationScheduler
+
+
+@pytest.mark.asyncio
+async def test_timeout_during_handoff_returns_slot(monkeypatch):
+    scheduler = GenerationScheduler(max_concurrency=1, max_queue=10, max_wait=1)
+    first = await scheduler.acquire("a")
+
+    async def wait_for(waiter, timeout):
+        # 시간 초과가 나는 순간 앞 요청이 끝나 슬롯이 이 대기 요청으로 넘어온 경우
+        first.release()
+        assert waiter.done()
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(scheduler_module.asyncio, "wait_for", wait_for)
+    with pytest.raises(QueueTimeoutException):
+        await scheduler.acquire("b")
+    monkeypatch.undo()
+
+    assert scheduler.stats() == {"active": 0, "queued": 0, "max_concurrency": 1}
+    ticket = await asyncio.wait_for(scheduler.acquire("c"), 1)
+    ticket.release()
+
+
+@pytest.mark.asyncio
+async def test_timeout_while_queued_discards_waiter():
+    scheduler = GenerationScheduler(max_concurrency=1, max_queue=10, max_wait=0.01)
+    first = await scheduler.acquire("a")
+    with pytest.raises(QueueTimeoutException):
+        await scheduler.acquire("b")
+    assert scheduler.stats() == {"active": 1, "queued": 0, "max_concurrency": 1}
+    first.release()
+    assert scheduler.active == 0